@@ -5,3 +5,7 @@ class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
     verbose_name = 'API приложения отзывов'
+
+    def ready(self):
+        from api import checks, metrics, signals  # noqa: F401
+        from ratereviewrevive import sqlite  # noqa: F401
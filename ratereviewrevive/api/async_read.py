@@ -0,0 +1,89 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.permissions import SAFE_METHODS
+
+DEFAULTS = {
+    'ENABLED': False,
+    # Потоков чтения на процесс: каждый держит своё соединение с базой,
+    # их не должно быть больше, чем выдержит база или пул PgBouncer.
+    'MAX_WORKERS': 8,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def async_read_setting(name):
+    return getattr(settings, 'ASYNC_READ_PATH', {}).get(name, DEFAULTS[name])
+
+
+def read_executor():
+    """Общий ограниченный пул потоков для чтений из базы."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=async_read_setting('MAX_WORKERS'),
+                thread_name_prefix='api-read'
+            )
+        return _executor
+
+
+def _read(view, request, args, kwargs):
+    # Сигналы запроса закрывают соединения только своего потока,
+    # соединения пула проверяются здесь, как в request_started/finished.
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        # JSON собирается в потоке пула, а не в общем потоке
+        # sync_to_async, где Django иначе вызвал бы render().
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    """Асинхронная обёртка view вьюсета.
+
+    GET, HEAD и OPTIONS выполняются в пуле read_executor() и не ждут
+    друг друга; под ASGI Django 3.2 все синхронные view идут через
+    один поток. Записи остаются в этом общем потоке, как и без обёртки.
+    Атрибуты view (cls, actions, csrf_exempt) сохраняются.
+    """
+    write = sync_to_async(view)
+
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return await write(request, *args, **kwargs)
+        # Профиль метрик и выбранная реплика переходят в поток пула.
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            read_executor(), context.run, _read, view, request, args, kwargs
+        )
+
+    return async_view
+
+
+class AsyncReadMixin:
+    """С ASYNC_READ_PATH['ENABLED'] роутер получает async-view.
+
+    Настройка читается при сборке URL; включать её стоит под ASGI,
+    под WSGI каждое обращение к async-view стоит лишнего цикла событий.
+    """
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not async_read_setting('ENABLED'):
+            return view
+        return async_read_view(view)
@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+
+DEFAULTS = {
+    # Сколько секунд запись о пользователе живёт в кэше процесса.
+    'TIMEOUT': 30,
+    'MAX_SIZE': 10000,
+}
+# Поля пользователя в claims токена и в кэше.
+CLAIMS = ('username', 'role', 'is_superuser')
+CACHED_FIELDS = CLAIMS + ('is_active',)
+
+
+def user_cache_setting(name):
+    return getattr(settings, 'JWT_USER_CACHE', {}).get(name, DEFAULTS[name])
+
+
+def token_for_user(user):
+    """Access-токен с ролью пользователя в claims."""
+    token = AccessToken.for_user(user)
+    for claim in CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class UserCache:
+    """LRU-кэш полей пользователя с коротким временем жизни.
+
+    Кэш живёт в памяти процесса: изменения в этом процессе сбрасывают
+    запись сразу, в остальных они видны не позже чем через TIMEOUT.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        """Поля пользователя или None, если его нет в базе."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+        fields = User.objects.filter(pk=user_id).values(
+            *CACHED_FIELDS
+        ).first()
+        with self._lock:
+            self._entries[user_id] = (
+                now + user_cache_setting('TIMEOUT'), fields
+            )
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > user_cache_setting('MAX_SIZE'):
+                self._entries.popitem(last=False)
+        return fields
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без запроса пользователя на каждый запрос.
+
+    Пользователь собирается из claims токена и сверяется с кэшем:
+    изменённая роль или блокировка действуют, не дожидаясь истечения
+    токена. Это несохранённый «лёгкий» экземпляр User — у него есть только id,
+    username, role и флаги; полная запись загружается явно.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            raise AuthenticationFailed(
+                _('Token contained no recognizable user identification')
+            )
+        fields = user_cache.get(user_id)
+        if fields is None:
+            raise AuthenticationFailed(_('User not found'),
+                                       code='user_not_found')
+        if not fields['is_active']:
+            raise AuthenticationFailed(_('User is inactive'),
+                                       code='user_inactive')
+        # Кэш главнее claims: токен мог быть выдан до смены роли.
+        claims = {claim: validated_token[claim] for claim in CLAIMS
+                  if claim in validated_token}
+        user = User(pk=user_id, **{**claims, **fields})
+        user._state.adding = False
+        user._state.db = User.objects.db
+        return user
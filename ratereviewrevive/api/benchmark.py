@@ -0,0 +1,68 @@
+import math
+import statistics
+import subprocess
+import time
+
+from django.conf import settings
+from django.db import connection
+
+
+def percentile(values, percent):
+    """Процентиль по ближайшему рангу, values отсортированы."""
+    if not values:
+        return None
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def summarize(latencies, elapsed, queries=None):
+    """Сводка по замерам: задержки в мс, пропускная способность в rps.
+
+    elapsed — настенное время всего прогона, а не сумма задержек:
+    та дала бы просто 1 / mean.
+    """
+    latencies = sorted(latencies)
+    summary = {
+        'requests': len(latencies),
+        'mean_ms': statistics.mean(latencies) * 1000 if latencies else None,
+        'p50_ms': _ms(percentile(latencies, 50)),
+        'p95_ms': _ms(percentile(latencies, 95)),
+        'p99_ms': _ms(percentile(latencies, 99)),
+        'throughput_rps': len(latencies) / elapsed if elapsed else None,
+    }
+    if queries is not None:
+        summary['queries_per_request'] = (sum(queries) / len(queries)
+                                          if queries else None)
+    return summary
+
+
+def fill_template(value, values):
+    """Подставляет values в строки тела запроса, в том числе вложенные."""
+    if isinstance(value, str):
+        return value.format(**values)
+    if isinstance(value, list):
+        return [fill_template(item, values) for item in value]
+    if isinstance(value, dict):
+        return {key: fill_template(item, values)
+                for key, item in value.items()}
+    return value
+
+
+def _ms(value):
+    return None if value is None else value * 1000
+
+
+def run_metadata():
+    """Коммит и окружение прогона, чтобы сравнивать результаты."""
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        'commit': revision,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'database': connection.vendor,
+    }
@@ -0,0 +1,213 @@
+from abc import ABC, abstractmethod
+
+from django.db import IntegrityError, transaction
+
+from api import serializers
+from api.slugs import category_ids, genre_ids
+from reviews import models
+from reviews.bulk import bulk_insert
+from users.models import User
+
+BULK_MAX_ITEMS = 500
+# Сколько раз пакет проверяется заново после гонки с другой записью.
+BULK_ATTEMPTS = 3
+
+
+class BulkCreate(ABC):
+    """Пакетное создание объектов с результатом по каждому элементу.
+
+    Элементы сначала проверяются сериализатором по отдельности, без
+    запросов к базе, затем ссылки и ограничения проверяются на весь
+    пакет сразу, а годные объекты вставляются одним bulk_insert.
+    Проверка и вставка идут в одной транзакции; если параллельная запись
+    всё же нарушила ограничение, пакет проверяется заново, и занятые
+    элементы получают ошибки.
+    """
+    model = None
+    serializer_class = None
+
+    def __init__(self, items, user):
+        self.items = items
+        self.user = user
+        self.data = {}
+        self.errors = {}
+
+    def validate_items(self):
+        for index, item in enumerate(self.items):
+            serializer = self.serializer_class(data=item)
+            if serializer.is_valid():
+                self.data[index] = serializer.validated_data
+            else:
+                self.errors[index] = serializer.errors
+
+    def fail(self, index, field, message):
+        self.errors[index] = {field: [message]}
+        del self.data[index]
+
+    def resolve_authors(self):
+        """Id авторов по индексам элементов; usernames — одним запросом."""
+        usernames = {data['author'] for data in self.data.values()
+                     if 'author' in data}
+        ids = dict(User.objects.filter(
+            username__in=usernames
+        ).values_list('username', 'pk')) if usernames else {}
+        authors = {}
+        for index, data in list(self.data.items()):
+            username = data.get('author')
+            if username is None or username == self.user.username:
+                authors[index] = self.user.pk
+            elif not self.user.is_admin:
+                self.fail(index, 'author',
+                          'Указывать автора может только администратор.')
+            elif username not in ids:
+                self.fail(index, 'author', 'Пользователь не найден.')
+            else:
+                authors[index] = ids[username]
+        return authors
+
+    @abstractmethod
+    def build(self):
+        """Возвращает [(индекс, объект)] для элементов без ошибок."""
+
+    def insert(self, built):
+        bulk_insert(self.model, [obj for _, obj in built])
+
+    def run(self):
+        self.validate_items()
+        validated, invalid = dict(self.data), dict(self.errors)
+        for attempt in range(1, BULK_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    built = self.build()
+                    self.insert(built)
+                break
+            except IntegrityError:
+                self.data, self.errors = dict(validated), dict(invalid)
+                if attempt == BULK_ATTEMPTS:
+                    for index in validated:
+                        self.fail(index, 'non_field_errors',
+                                  'Конфликт с параллельной записью, '
+                                  'повторите запрос.')
+                    built = []
+        created = {index: obj.pk for index, obj in built}
+        results = []
+        for index in range(len(self.items)):
+            if index in created:
+                results.append({'status': 201, 'id': created[index]})
+            else:
+                results.append({'status': 400,
+                                'errors': self.errors[index]})
+        return results
+
+
+class BulkReviewCreate(BulkCreate):
+    model = models.Review
+    serializer_class = serializers.BulkReviewSerializer
+
+    def build(self):
+        authors = self.resolve_authors()
+        title_ids = {data['title'] for data in self.data.values()}
+        titles = set(models.Title.objects.filter(
+            pk__in=title_ids, pending_deletion=False
+        ).values_list('pk', flat=True))
+        # Одним запросом все существующие пары автор-произведение
+        # (с запасом: пересечение множеств авторов и произведений).
+        taken = set(models.Review.objects.filter(
+            title_id__in=titles, author_id__in=set(authors.values())
+        ).values_list('author_id', 'title_id'))
+        built = []
+        for index, data in list(self.data.items()):
+            pair = (authors[index], data['title'])
+            if data['title'] not in titles:
+                self.fail(index, 'title', 'Произведение не найдено.')
+            elif pair in taken:
+                self.fail(index, 'non_field_errors',
+                          'Нельзя оставлять более одного отзыва!')
+            else:
+                taken.add(pair)
+                built.append((index, self.model(
+                    title_id=data['title'], author_id=authors[index],
+                    text=data['text'], score=data['score']
+                )))
+        return built
+
+
+class BulkCommentCreate(BulkCreate):
+    model = models.Comment
+    serializer_class = serializers.BulkCommentSerializer
+
+    def build(self):
+        authors = self.resolve_authors()
+        reviews = set(models.Review.objects.filter(
+            pk__in={data['review'] for data in self.data.values()},
+            title__pending_deletion=False
+        ).values_list('pk', flat=True))
+        built = []
+        for index, data in list(self.data.items()):
+            if data['review'] not in reviews:
+                self.fail(index, 'review', 'Отзыв не найден.')
+            else:
+                built.append((index, self.model(
+                    review_id=data['review'], author_id=authors[index],
+                    text=data['text']
+                )))
+        return built
+
+
+class BulkTitleCreate(BulkCreate):
+    """Пакетное создание произведений для импорта каталога.
+
+    Категории и жанры берутся из SlugCache, занятые пары название-год —
+    одним запросом на весь пакет.
+    """
+    model = models.Title
+    serializer_class = serializers.BulkTitleSerializer
+
+    def build(self):
+        categories = category_ids.resolve(
+            data['category'] for data in self.data.values()
+        )
+        genres = genre_ids.resolve(
+            slug for data in self.data.values()
+            for slug in data.get('genre', ())
+        )
+        # С запасом: все произведения с названиями и годами пакета.
+        taken = set(models.Title.objects.filter(
+            name__in={data['name'] for data in self.data.values()},
+            year__in={data['year'] for data in self.data.values()}
+        ).values_list('name', 'year'))
+        built = []
+        for index, data in list(self.data.items()):
+            pair = (data['name'], data['year'])
+            unknown = [slug for slug in data.get('genre', ())
+                       if slug not in genres]
+            if data['category'] not in categories:
+                self.fail(index, 'category',
+                          f'Категория {data["category"]} не найдена.')
+            elif unknown:
+                self.fail(index, 'genre',
+                          f'Жанры не найдены: {", ".join(unknown)}.')
+            elif pair in taken:
+                self.fail(index, 'non_field_errors',
+                          'Произведение с таким названием и годом уже есть.')
+            else:
+                taken.add(pair)
+                title = self.model(
+                    name=data['name'], year=data['year'],
+                    description=data.get('description', ''),
+                    category_id=categories[data['category']]
+                )
+                title.genre_ids = list(dict.fromkeys(
+                    genres[slug] for slug in data.get('genre', ())
+                ))
+                built.append((index, title))
+        return built
+
+    def insert(self, built):
+        through = self.model.genre.through
+        with transaction.atomic():
+            super().insert(built)
+            through.objects.bulk_create([
+                through(title_id=title.pk, genre_id=genre_id)
+                for _, title in built for genre_id in title.genre_ids
+            ])
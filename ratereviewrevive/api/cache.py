@@ -0,0 +1,121 @@
+import threading
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.http import urlencode
+from rest_framework.response import Response
+
+from ratereviewrevive.routers import primary_reads
+
+CACHE_ALIAS = getattr(settings, 'API_CACHE_ALIAS', 'api')
+CACHE_GROUPS = ('categories', 'genres', 'titles')
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _record(group, outcome):
+    with _stats_lock:
+        _stats[(group, outcome)] += 1
+
+
+def get_stats():
+    """Счётчики попаданий и промахов кэша этого процесса по группам."""
+    with _stats_lock:
+        stats = dict(_stats)
+    result = {}
+    for group in CACHE_GROUPS:
+        hits = stats.get((group, 'hit'), 0)
+        misses = stats.get((group, 'miss'), 0)
+        total = hits + misses
+        result[group] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / total if total else None,
+        }
+    return result
+
+
+def is_shared():
+    """Виден ли кэш API всем процессам.
+
+    LocMemCache у каждого процесса свой: версию группы, сброшенную
+    другим воркером или командой manage.py, этот процесс не увидит.
+    """
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def group_version(group):
+    """Текущая версия группы; ключи старых версий просто не читаются.
+
+    Версия — случайный токен, а не счётчик: если ключ версии вытеснен
+    из кэша, новый токен не совпадёт ни с одной старой записью.
+    """
+    cache = get_cache()
+    key = f'version:{group}'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(*groups):
+    cache = get_cache()
+    cache.set_many(
+        {f'version:{group}': uuid.uuid4().hex for group in groups},
+        timeout=None
+    )
+
+
+def make_key(group, request):
+    # Параметры сортируются: ?limit=5&offset=10 и ?offset=10&limit=5
+    # дают одну запись. Хост входит в ключ из-за абсолютных ссылок
+    # next/previous в ответе пагинатора.
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    return (f'response:{group}:{group_version(group)}:'
+            f'{request.get_host()}{request.path}?{query}')
+
+
+class CachedResponseMixin:
+    """Кэширует ответы list и retrieve для группы cache_group.
+
+    В кэш кладутся данные ответа до рендеринга, поэтому одна запись
+    обслуживает и JSON, и browsable API.
+    """
+    cache_group = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve,
+                                    request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        key = make_key(self.cache_group, request)
+        data = cache.get(key)
+        if data is not None:
+            _record(self.cache_group, 'hit')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        _record(self.cache_group, 'miss')
+        # Общий кэш наполняется только с основной базы: отстающая реплика
+        # положила бы в него старый ответ до конца API_CACHE_TIMEOUT, и его
+        # получил бы даже клиент, который только что записал.
+        with primary_reads():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,23 @@
+from django.core.checks import Warning, register
+
+from api.cache import CACHE_ALIAS, is_shared
+
+
+@register(deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Кэш API должен быть общим для всех процессов.
+
+    Сброс групп после записей воркеров и команд manage.py
+    (recalculate_ratings, fill_db, process_deletions) доходит только
+    до процессов, которые видят тот же кэш.
+    """
+    if is_shared():
+        return []
+    return [Warning(
+        f'Кэш API «{CACHE_ALIAS}» виден только своему процессу.',
+        hint=('Задайте API_CACHE_BACKEND с общим хранилищем (Redis, '
+              'Memcached, FileBasedCache): иначе записи других процессов '
+              'и команд manage.py не сбрасывают кэш сервера до '
+              'API_CACHE_TIMEOUT.'),
+        id='api.W001',
+    )]
@@ -0,0 +1,75 @@
+import hashlib
+from abc import ABC, abstractmethod
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, urlencode
+from rest_framework.exceptions import NotFound
+
+
+def make_etag(request, *parts):
+    """Сильный ETag из версии данных и всего, от чего зависит ответ.
+
+    Кроме версии в него входят путь, параметры, хост (абсолютные ссылки
+    пагинатора) и формат ответа: JSON и browsable API — разные байты.
+    """
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    source = '|'.join(map(str, (
+        *parts, request.get_host(), request.path, query,
+        request.accepted_renderer.format,
+    )))
+    return f'"{hashlib.md5(source.encode()).hexdigest()}"'
+
+
+class ConditionalGetMixin(ABC):
+    """Отвечает 304 на If-None-Match/If-Modified-Since в list и retrieve.
+
+    Валидаторы считает get_validators() одним дешёвым запросом —
+    до основного запроса и сериализатора. Миксин ставится первым, перед
+    CachedResponseMixin: 304 не ходит и в кэш.
+    """
+
+    @abstractmethod
+    def get_validators(self, request):
+        """(etag, last_modified) или NotFound, если объекта нет."""
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list,
+                                         request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve,
+                                         request, *args, **kwargs)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        timestamp = (int(last_modified.timestamp())
+                     if last_modified is not None else None)
+        response = get_conditional_response(request, etag=etag,
+                                            last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        if etag is not None:
+            response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+class NestedConditionalGetMixin(ConditionalGetMixin):
+    """ETag вложенного ресурса из версии родителя.
+
+    Тот же запрос проверяет и существование родителя, поэтому
+    NestedViewSetMixin не проверяет его ещё раз.
+    """
+    version_field = None
+
+    def get_validators(self, request):
+        version = self.get_parent_queryset().values_list(
+            self.version_field, flat=True
+        ).first()
+        if version is None:
+            raise NotFound()
+        self._parent_exists = True
+        return make_etag(request, version), None
@@ -6,7 +6,13 @@ from reviews.models import Title
 class TitleFilter(django_filters.FilterSet):
     genre = django_filters.CharFilter(field_name="genre__slug")
     category = django_filters.CharFilter(field_name="category__slug")
-    year = django_filters.NumberFilter(field_name="year", lookup_expr="iexact")
+    # Целочисленные сравнения, а не iexact: он сравнивает строки и не
+    # использует индекс title_year_idx.
+    year = django_filters.NumberFilter(field_name="year")
+    year_min = django_filters.NumberFilter(field_name="year",
+                                           lookup_expr="gte")
+    year_max = django_filters.NumberFilter(field_name="year",
+                                           lookup_expr="lte")
     name = django_filters.CharFilter(field_name="name", lookup_expr="contains")
 
     class Meta:
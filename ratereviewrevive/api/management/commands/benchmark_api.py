@@ -0,0 +1,192 @@
+import json
+import time
+import urllib.request
+from urllib.error import HTTPError
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.benchmark import fill_template, run_metadata, summarize
+from api.cache import get_cache
+from reviews import models
+from users.models import User
+
+# (имя, метод, шаблон URL, нужен ли администратор, тело запроса)
+READ_ROUTES = (
+    ('titles-list', 'get', '/api/v1/titles/', False, None),
+    ('titles-list-filtered', 'get',
+     '/api/v1/titles/?genre={genre}&ordering=-rating', False, None),
+    ('titles-detail', 'get', '/api/v1/titles/{title}/', False, None),
+    ('reviews-list', 'get', '/api/v1/titles/{title}/reviews/', False, None),
+    ('reviews-list-cursor', 'get',
+     '/api/v1/titles/{title}/reviews/?pagination=cursor', False, None),
+    ('reviews-detail', 'get', '/api/v1/titles/{title}/reviews/{review}/',
+     False, None),
+    ('comments-list', 'get',
+     '/api/v1/titles/{title}/reviews/{review}/comments/', False, None),
+    ('comments-detail', 'get',
+     '/api/v1/titles/{title}/reviews/{review}/comments/{comment}/',
+     False, None),
+    ('categories-list', 'get', '/api/v1/categories/', False, None),
+    ('genres-list', 'get', '/api/v1/genres/', False, None),
+    ('search', 'get', '/api/v1/search/?q={word}', False, None),
+    ('users-list', 'get', '/api/v1/users/', True, None),
+    ('users-detail', 'get', '/api/v1/users/{username}/', True, None),
+    ('users-me', 'get', '/api/v1/users/me/', True, None),
+    ('cache-stats', 'get', '/api/v1/cache/stats/', True, None),
+)
+WRITE_ROUTES = (
+    ('reviews-create', 'post', '/api/v1/titles/{title}/reviews/', False,
+     {'text': 'Отзыв для замера', 'score': 7}),
+    ('comments-create', 'post',
+     '/api/v1/titles/{title}/reviews/{review}/comments/', False,
+     {'text': 'Комментарий для замера'}),
+    ('titles-update', 'patch', '/api/v1/titles/{title}/', True,
+     {'description': 'Описание для замера', 'category': '{category}',
+      'genre': ['{genre}']}),
+    ('signup', 'post', '/api/v1/auth/signup/', False,
+     {'username': 'benchmark', 'email': 'benchmark@ratereviewrevive.fake'}),
+)
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный прогон эндпоинтов /api/v1: задержки p50/p95/p99, '
+            'пропускная способность и число запросов к БД в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='запросов на маршрут')
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--routes', nargs='*',
+                            help='только перечисленные маршруты')
+        parser.add_argument('--writes', action='store_true',
+                            help='замерить и запросы на запись; каждая '
+                                 'запись откатывается, поэтому только '
+                                 'без --base-url')
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='не сбрасывать кэш ответов между запросами')
+        parser.add_argument('--base-url',
+                            help='гонять запросы на запущенный сервер, '
+                                 'а не через тестовый клиент Django')
+        parser.add_argument('--output', help='файл для JSON-результата')
+
+    def fixtures(self):
+        comment = models.Comment.objects.select_related(
+            'review', 'author'
+        ).first()
+        if comment is None:
+            raise CommandError('Нет данных: загрузите их через fill_db.')
+        title_id = comment.review.title_id
+        title = models.Title.objects.select_related('category').get(
+            pk=title_id
+        )
+        genre = title.genre.first() or models.Genre.objects.first()
+        word = (title.name.split() or [''])[0]
+        admin = User.objects.filter(role=User.ADMIN).first()
+        reviewer = User.objects.exclude(reviews__title_id=title_id).first()
+        return {
+            'title': title_id,
+            'review': comment.review_id,
+            'comment': comment.pk,
+            'genre': genre.slug if genre else '',
+            'category': title.category.slug if title.category else '',
+            'word': word,
+            'username': comment.author.username,
+        }, admin, reviewer
+
+    def handle(self, *args, **options):
+        if options['writes'] and options['base_url']:
+            # Откатить записи можно только в своей транзакции.
+            raise CommandError('--writes нельзя сочетать с --base-url: '
+                               'записи останутся в базе сервера.')
+        values, admin, reviewer = self.fixtures()
+        routes = READ_ROUTES + (WRITE_ROUTES if options['writes'] else ())
+        if options['routes']:
+            routes = [route for route in routes
+                      if route[0] in options['routes']]
+        results = {}
+        for name, method, template, needs_admin, data in routes:
+            user = admin if needs_admin else reviewer
+            if needs_admin and admin is None:
+                self.stderr.write(f'{name}: skipped, no admin user')
+                continue
+            url = template.format(**values)
+            data = fill_template(data, values)
+            results[name] = self.run_route(method, url, data, user, options)
+            self.stderr.write(f'{name}: {results[name]["p50_ms"]:.2f} ms p50')
+        report = {'meta': run_metadata(), 'routes': results}
+        report['meta']['requests_per_route'] = options['requests']
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+    def run_route(self, method, url, data, user, options):
+        headers = {}
+        if user is not None:
+            headers['HTTP_AUTHORIZATION'] = (
+                f'Bearer {AccessToken.for_user(user)}'
+            )
+        latencies, queries = [], []
+        started = None
+        for i in range(options['warmup'] + options['requests']):
+            if i == options['warmup']:
+                started = time.perf_counter()
+            if not options['warm_cache']:
+                get_cache().clear()
+            if options['base_url']:
+                latency, count = self.remote_request(
+                    options['base_url'], method, url, data, headers
+                )
+            else:
+                latency, count = self.local_request(method, url, data,
+                                                    headers)
+            if i >= options['warmup']:
+                latencies.append(latency)
+                if count is not None:
+                    queries.append(count)
+        # Пропускная способность — по настенному времени всего прогона.
+        elapsed = time.perf_counter() - started if started else 0
+        return summarize(latencies, elapsed,
+                         None if options['base_url'] else queries)
+
+    def local_request(self, method, url, data, headers):
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0].lstrip('.'))
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = getattr(client, method)(
+                    url, data=data, content_type='application/json',
+                    **headers
+                ) if data else client.get(url, **headers)
+                latency = time.perf_counter() - started
+            # Записи не должны менять данные между прогонами.
+            transaction.set_rollback(True)
+        if response.status_code >= 400:
+            raise CommandError(f'{method.upper()} {url}: '
+                               f'{response.status_code}')
+        # Точки сохранения вложенных atomic не считаются запросами.
+        return latency, len([query for query in captured.captured_queries
+                             if 'SAVEPOINT' not in query['sql']])
+
+    def remote_request(self, base_url, method, url, data, headers):
+        request = urllib.request.Request(
+            base_url.rstrip('/') + url, method=method.upper(),
+            data=json.dumps(data).encode() if data else None,
+            headers={'Content-Type': 'application/json',
+                     **({'Authorization': headers['HTTP_AUTHORIZATION']}
+                        if headers else {})}
+        )
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+        except HTTPError as error:
+            raise CommandError(f'{method.upper()} {url}: {error.code}')
+        return time.perf_counter() - started, None
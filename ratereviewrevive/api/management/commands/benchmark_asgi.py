@@ -0,0 +1,196 @@
+import asyncio
+import importlib
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import cycle, islice
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from django.urls import clear_url_caches
+
+from api.benchmark import run_metadata, summarize
+from api.cache import get_cache
+from reviews import models
+
+# wsgi — потоки сервера вроде gunicorn --threads; asgi-sync — ASGI с
+# обычными view, как uvicorn или daphne до этой настройки; asgi-async —
+# ASGI с ASYNC_READ_PATH (api/async_read.py).
+MODES = ('wsgi', 'asgi-sync', 'asgi-async')
+# Задержка каждого SQL-запроса, мс: имитирует базу по сети.
+_query_delay = 0
+
+
+def _delay_query(execute, sql, params, many, context):
+    if _query_delay:
+        time.sleep(_query_delay / 1000)
+    return execute(sql, params, many, context)
+
+
+def _add_delay(sender, connection, **kwargs):
+    if _delay_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_delay_query)
+
+
+def reload_urls():
+    """Пересобирает URL: AsyncReadMixin читает настройку в as_view()."""
+    for name in ('api.urls', settings.ROOT_URLCONF):
+        importlib.reload(importlib.import_module(name))
+    clear_url_caches()
+
+
+@contextmanager
+def async_read_path(enabled):
+    with override_settings(ASYNC_READ_PATH={**settings.ASYNC_READ_PATH,
+                                            'ENABLED': enabled}):
+        reload_urls()
+        try:
+            yield
+        finally:
+            get_cache().clear()
+    reload_urls()
+
+
+class Command(BaseCommand):
+    help = ('Конкурентные GET произведений, отзывов и комментариев '
+            'через WSGI и ASGI в процессе: пропускная способность и '
+            'задержки. Обработчики Django вызываются напрямую, вместо '
+            'сервера — пул потоков (WSGI) или цикл событий (ASGI).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=32,
+                            help='одновременных запросов')
+        parser.add_argument('--requests', type=int, default=500,
+                            help='запросов на режим')
+        parser.add_argument('--query-delay-ms', type=float, default=0,
+                            help='задержка каждого SQL-запроса')
+        parser.add_argument('--modes', nargs='*', choices=MODES,
+                            default=list(MODES))
+        parser.add_argument('--output', help='файл для JSON-результата')
+
+    def handle(self, *args, **options):
+        global _query_delay
+        paths = self.paths(options['requests'])
+        if not paths:
+            raise CommandError('Нет данных: загрузите их через fill_db.')
+        _query_delay = options['query_delay_ms']
+        connection_created.connect(_add_delay)
+        connections.close_all()
+        results = {}
+        try:
+            for mode in options['modes']:
+                get_cache().clear()
+                with async_read_path(mode == 'asgi-async'):
+                    run = (self.run_wsgi if mode == 'wsgi'
+                           else self.run_asgi)
+                    latencies, errors, elapsed = run(
+                        paths, options['concurrency']
+                    )
+                results[mode] = summarize(latencies, elapsed)
+                results[mode]['errors'] = errors
+                self.stderr.write(
+                    f'{mode}: {results[mode]["throughput_rps"]:.1f} rps, '
+                    f'p95 {results[mode]["p95_ms"] or 0:.2f} ms, '
+                    f'{errors} errors'
+                )
+        finally:
+            _query_delay = 0
+            connection_created.disconnect(_add_delay)
+            connections.close_all()
+        report = {'meta': run_metadata(), 'modes': results}
+        report['meta'].update(concurrency=options['concurrency'],
+                              query_delay_ms=options['query_delay_ms'])
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+    def paths(self, count):
+        """Разные адреса по кругу: ответы не берутся из кэша API."""
+        routes = []
+        for title_id, review_id in models.Review.objects.order_by(
+                'title_id', 'pk').values_list('title_id', 'pk')[:count]:
+            routes += [f'/api/v1/titles/{title_id}/',
+                       f'/api/v1/titles/{title_id}/reviews/',
+                       f'/api/v1/titles/{title_id}/reviews/{review_id}/'
+                       f'comments/']
+        routes += [f'/api/v1/titles/?offset={offset}'
+                   for offset in range(0, count, 10)]
+        return list(islice(cycle(routes), count)) if routes else []
+
+    def run_wsgi(self, paths, concurrency):
+        handler = WSGIHandler()
+        host = settings.ALLOWED_HOSTS[0].lstrip('.')
+
+        def call(path):
+            path, _, query = path.partition('?')
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path,
+                'QUERY_STRING': query, 'SERVER_NAME': host,
+                'SERVER_PORT': '80', 'HTTP_HOST': host,
+                'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+                'wsgi.errors': io.StringIO(),
+            }
+            statuses = []
+            started = time.perf_counter()
+            body = b''.join(handler(
+                environ, lambda status, headers: statuses.append(status)
+            ))
+            latency = time.perf_counter() - started
+            return latency, statuses[0].startswith('200') and bool(body)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            outcomes = list(pool.map(call, paths))
+        elapsed = time.perf_counter() - started
+        return ([latency for latency, ok in outcomes if ok],
+                sum(not ok for _, ok in outcomes), elapsed)
+
+    def run_asgi(self, paths, concurrency):
+        handler = ASGIHandler()
+        host = settings.ALLOWED_HOSTS[0].lstrip('.').encode()
+
+        async def call(path, slots):
+            path, _, query = path.partition('?')
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'},
+                'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+                'path': path, 'raw_path': path.encode(), 'root_path': '',
+                'query_string': query.encode(),
+                'headers': [(b'host', host)],
+                'server': (host.decode(), 80), 'client': ('127.0.0.1', 0),
+            }
+            messages = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b'',
+                        'more_body': False}
+
+            async def send(message):
+                messages.append(message)
+
+            async with slots:
+                started = time.perf_counter()
+                await handler(scope, receive, send)
+                latency = time.perf_counter() - started
+            return latency, messages[0]['status'] == 200
+
+        async def run():
+            slots = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(*(call(path, slots)
+                                          for path in paths))
+
+        started = time.perf_counter()
+        outcomes = asyncio.run(run())
+        elapsed = time.perf_counter() - started
+        return ([latency for latency, ok in outcomes if ok],
+                sum(not ok for _, ok in outcomes), elapsed)
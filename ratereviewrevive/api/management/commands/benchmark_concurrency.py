@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+
+from api.authentication import token_for_user
+from api.benchmark import run_metadata, summarize
+from reviews import models
+from users.models import User
+
+# Профили SQLITE_PROFILE (ratereviewrevive/sqlite.py) для сравнения;
+# baseline — значения SQLite и Django по умолчанию.
+PROFILES = {
+    'baseline': {'JOURNAL_MODE': 'DELETE', 'SYNCHRONOUS': 'FULL',
+                 'MMAP_SIZE': 0, 'CACHE_SIZE': -2000,
+                 'BUSY_TIMEOUT_MS': 5000, 'WRITE_QUEUE': False},
+    'wal': {'WRITE_QUEUE': False},
+    'wal-queue': {'WRITE_QUEUE': True},
+}
+USERNAME_PREFIX = 'bench-writer-'
+
+
+class Command(BaseCommand):
+    help = ('Конкурентная нагрузка на SQLite: параллельные POST отзывов и '
+            'GET списков; пропускная способность и ошибки по профилям.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8,
+                            help='потоков, создающих отзывы')
+        parser.add_argument('--readers', type=int, default=4,
+                            help='потоков, читающих списки')
+        parser.add_argument('--requests', type=int, default=25,
+                            help='отзывов на поток-писатель')
+        parser.add_argument('--profiles', nargs='*', choices=PROFILES,
+                            default=list(PROFILES))
+        parser.add_argument('--output', help='файл для JSON-результата')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Замер только для SQLite.')
+        title_ids = list(models.Title.objects.order_by('pk').values_list(
+            'pk', flat=True
+        )[:options['requests']])
+        if not title_ids:
+            raise CommandError('Нет данных: загрузите их через fill_db.')
+        results = {}
+        for name in options['profiles']:
+            with override_settings(SQLITE_PROFILE=PROFILES[name]):
+                # Новые соединения получат прагмы профиля.
+                connections.close_all()
+                try:
+                    results[name] = self.run_profile(title_ids, options)
+                finally:
+                    User.objects.filter(
+                        username__startswith=USERNAME_PREFIX
+                    ).delete()
+                    connections.close_all()
+            self.stderr.write(
+                f'{name}: {results[name]["writes"]["throughput_rps"]:.1f} '
+                f'writes/s, {results[name]["errors"]} errors, reads p95 '
+                f'{results[name]["reads"]["p95_ms"] or 0:.2f} ms'
+            )
+        report = {'meta': run_metadata(), 'profiles': results}
+        report['meta'].update(writers=options['writers'],
+                              readers=options['readers'],
+                              requests_per_writer=len(title_ids))
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+    def run_profile(self, title_ids, options):
+        users = [User.objects.create(
+            username=f'{USERNAME_PREFIX}{number}',
+            email=f'{USERNAME_PREFIX}{number}@ratereviewrevive.fake'
+        ) for number in range(options['writers'])]
+        threads = options['writers'] + options['readers']
+        start = threading.Barrier(threads + 1)
+        writers_done = threading.Event()
+        writes, reads, errors = [], [], []
+
+        def writer(user):
+            client = self.client()
+            headers = {'HTTP_AUTHORIZATION':
+                       f'Bearer {token_for_user(user)}'}
+            start.wait()
+            for title_id in title_ids:
+                started = time.perf_counter()
+                response = client.post(
+                    f'/api/v1/titles/{title_id}/reviews/',
+                    {'text': 'Отзыв для замера', 'score': 7},
+                    content_type='application/json', **headers
+                )
+                latency = time.perf_counter() - started
+                if response.status_code == 201:
+                    writes.append(latency)
+                else:
+                    errors.append(response.status_code)
+            connection.close()
+
+        def reader(number):
+            client = self.client()
+            url = f'/api/v1/titles/{title_ids[number % len(title_ids)]}' \
+                  f'/reviews/'
+            start.wait()
+            while not writers_done.is_set():
+                started = time.perf_counter()
+                response = client.get(url)
+                reads.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+            connection.close()
+
+        writer_threads = [threading.Thread(target=writer, args=(user,))
+                          for user in users]
+        reader_threads = [threading.Thread(target=reader, args=(number,))
+                          for number in range(options['readers'])]
+        for thread in writer_threads + reader_threads:
+            thread.start()
+        start.wait()
+        started = time.perf_counter()
+        for thread in writer_threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        writers_done.set()
+        for thread in reader_threads:
+            thread.join()
+        return {
+            'writes': summarize(writes, elapsed),
+            'reads': summarize(reads, elapsed),
+            'errors': len(errors),
+        }
+
+    def client(self):
+        # Ошибка «database is locked» — ответ 500, а не исключение.
+        return Client(HTTP_HOST=settings.ALLOWED_HOSTS[0].lstrip('.'),
+                      raise_request_exception=False)
@@ -0,0 +1,90 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from api import fast, serializers
+from api.benchmark import run_metadata
+from api.renderers import FastJSONRenderer, orjson
+from reviews import models
+
+# (имя, queryset для сериализатора, сериализатор, читатель)
+TARGETS = (
+    ('titles', lambda: models.Title.objects.select_related(
+        'category'
+    ).prefetch_related(
+        Prefetch('genre', queryset=models.Genre.objects.order_by('id'))
+    ).order_by('id'), serializers.TitleSerializer, fast.TitleReader()),
+    ('reviews', lambda: models.Review.objects.select_related(
+        'author'
+    ).order_by('id'), serializers.ReviewSerializer, fast.ReviewReader()),
+    ('comments', lambda: models.Comment.objects.select_related(
+        'author'
+    ).order_by('id'), serializers.CommentSerializer, fast.CommentReader()),
+)
+
+
+class Command(BaseCommand):
+    help = ('Микробенчмарк чтения: сериализаторы DRF и JSONRenderer против '
+            'api/fast.py и FastJSONRenderer, мс на 1000 объектов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000,
+                            help='объектов в выборке')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='прогонов; в отчёт идёт медиана')
+        parser.add_argument('--output', help='файл для JSON-результата')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        results = {}
+        for name, queryset, serializer_class, reader in TARGETS:
+            queryset = queryset()[:count]
+            objects = len(queryset)
+            if not objects:
+                self.stderr.write(f'{name}: skipped, no data')
+                continue
+
+            def drf():
+                data = serializer_class(queryset.all(), many=True).data
+                return JSONRenderer().render(data)
+
+            def fast_read():
+                rows = list(reader.values(queryset.all()))
+                return FastJSONRenderer().render(reader.build(rows))
+
+            if drf() != fast_read():
+                raise CommandError(f'{name}: ответы различаются')
+            per_1k = 1000 / objects
+            result = {
+                'objects': objects,
+                'drf_ms_per_1k': self.measure(drf, options) * per_1k,
+                'fast_ms_per_1k': self.measure(fast_read, options) * per_1k,
+            }
+            result['speedup'] = (result['drf_ms_per_1k']
+                                 / result['fast_ms_per_1k'])
+            results[name] = result
+            self.stderr.write(f'{name}: {result["drf_ms_per_1k"]:.2f} -> '
+                              f'{result["fast_ms_per_1k"]:.2f} ms per 1k, '
+                              f'x{result["speedup"]:.1f}')
+        report = {'meta': run_metadata(), 'targets': results}
+        report['meta'].update(repeat=options['repeat'],
+                              orjson=orjson is not None)
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+    def measure(self, run, options):
+        """Медиана времени прогона в мс, с запросами к базе."""
+        timings = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings) * 1000
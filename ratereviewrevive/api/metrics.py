@@ -0,0 +1,255 @@
+import contextlib
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from api.cache import get_stats
+
+DEFAULTS = {
+    'ENABLED': True,
+    # Сколько маршрутов хранится; самый давно не вызывавшийся вытесняется.
+    'MAX_ROUTES': 200,
+    'SLOW_REQUEST_MS': 500,
+    # Доля медленных запросов, чьи SQL-запросы пишутся в журнал.
+    'SLOW_LOG_SAMPLE_RATE': 0.1,
+    'SLOW_LOG_PATH': None,
+}
+# Границы корзин гистограммы времени ответа, секунды.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_profile = contextvars.ContextVar('request_profile', default=None)
+_serializing = contextvars.ContextVar('serializing', default=False)
+
+
+def monitoring_setting(name):
+    return getattr(settings, 'PERFORMANCE_MONITORING',
+                   {}).get(name, DEFAULTS[name])
+
+
+class RequestProfile:
+    """Замеры одного запроса: SQL-запросы и время сериализации."""
+
+    def __init__(self):
+        self.queries = []
+        self.serializer_time = 0.0
+
+    @property
+    def db_time(self):
+        return sum(duration for _, _, duration in self.queries)
+
+    @property
+    def duplicate_queries(self):
+        """Повторы одного и того же запроса с теми же параметрами."""
+        return len(self.queries) - len({
+            (sql, repr(params)) for sql, params, _ in self.queries
+        })
+
+    @property
+    def similar_queries(self):
+        """Повторы запроса с другими параметрами — признак N+1."""
+        return len(self.queries) - len({sql for sql, _, _ in self.queries})
+
+
+def start_profile():
+    profile = RequestProfile()
+    return profile, _profile.set(profile)
+
+
+def finish_profile(token):
+    _profile.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper: засекает время каждого SQL-запроса."""
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries.append((sql, params,
+                                time.perf_counter() - started))
+
+
+@receiver(connection_created)
+def record_connection_queries(sender, connection, **kwargs):
+    """Ставит record_query на каждое соединение с базой.
+
+    Профиль берётся из контекста, поэтому запросы попадают в него, в
+    каком бы потоке ни выполнялись: под ASGI и в пуле api/async_read.py.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextlib.contextmanager
+def timed_serialization():
+    """Добавляет время блока к serializer_time профиля запроса.
+
+    Вложенные блоки уже учтены внешним и не считаются повторно.
+    """
+    profile = _profile.get()
+    if profile is None or _serializing.get():
+        yield
+        return
+    token = _serializing.set(True)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.serializer_time += time.perf_counter() - started
+        _serializing.reset(token)
+
+
+class TimedSerializerMixin:
+    """Суммирует в профиль запроса время to_representation.
+
+    Считается только внешний сериализатор: вложенные выполняются
+    внутри него и уже учтены.
+    """
+
+    def to_representation(self, instance):
+        with timed_serialization():
+            return super().to_representation(instance)
+
+
+class RouteStats:
+    FIELDS = ('requests', 'wall_seconds', 'db_seconds', 'queries',
+              'duplicate_queries', 'similar_queries', 'serializer_seconds',
+              'response_bytes', 'slow_requests')
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+        self.buckets = [0] * len(BUCKETS)
+
+
+class MetricsStore:
+    """Агрегаты по маршрутам в памяти процесса, не больше max_routes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = OrderedDict()
+
+    def record(self, route, wall, profile, response_bytes, slow):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = RouteStats()
+                while len(self._routes) > monitoring_setting('MAX_ROUTES'):
+                    self._routes.popitem(last=False)
+            else:
+                self._routes.move_to_end(route)
+            stats.requests += 1
+            stats.wall_seconds += wall
+            stats.db_seconds += profile.db_time
+            stats.queries += len(profile.queries)
+            stats.duplicate_queries += profile.duplicate_queries
+            stats.similar_queries += profile.similar_queries
+            stats.serializer_seconds += profile.serializer_time
+            stats.response_bytes += response_bytes
+            stats.slow_requests += slow
+            for i, bound in enumerate(BUCKETS):
+                if wall <= bound:
+                    stats.buckets[i] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return [(route, vars(stats).copy())
+                    for route, stats in self._routes.items()]
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+
+store = MetricsStore()
+_log_lock = threading.Lock()
+
+
+def log_slow_request(request, route, wall, profile):
+    """Пишет SQL-запросы медленного запроса в журнал, выборочно."""
+    path = monitoring_setting('SLOW_LOG_PATH')
+    if not path or random.random() >= monitoring_setting(
+            'SLOW_LOG_SAMPLE_RATE'):
+        return
+    entry = json.dumps({
+        'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'route': route,
+        'method': request.method,
+        'path': request.get_full_path(),
+        'wall_ms': round(wall * 1000, 3),
+        'db_ms': round(profile.db_time * 1000, 3),
+        'serializer_ms': round(profile.serializer_time * 1000, 3),
+        'duplicate_queries': profile.duplicate_queries,
+        'queries': [{'sql': sql, 'ms': round(duration * 1000, 3)}
+                    for sql, _, duration in profile.queries],
+    }, ensure_ascii=False)
+    with _log_lock:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(entry + '\n')
+
+
+def _escape(value):
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def render_prometheus():
+    """Метрики в текстовом формате Prometheus 0.0.4."""
+    lines = []
+
+    def family(name, kind, help_text):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    routes = store.snapshot()
+    counters = (
+        ('requests', 'api_requests_total', 'Processed requests.'),
+        ('db_seconds', 'api_db_seconds_total', 'Time spent in SQL queries.'),
+        ('queries', 'api_db_queries_total', 'Executed SQL queries.'),
+        ('duplicate_queries', 'api_db_duplicate_queries_total',
+         'Queries repeated with the same parameters.'),
+        ('similar_queries', 'api_db_similar_queries_total',
+         'Queries repeated with other parameters (N+1 candidates).'),
+        ('serializer_seconds', 'api_serializer_seconds_total',
+         'Time spent in serializers.'),
+        ('response_bytes', 'api_response_bytes_total',
+         'Size of response bodies.'),
+        ('slow_requests', 'api_slow_requests_total',
+         'Requests slower than SLOW_REQUEST_MS.'),
+    )
+    for field, name, help_text in counters:
+        family(name, 'counter', help_text)
+        for route, stats in routes:
+            lines.append(f'{name}{{route="{_escape(route)}"}} '
+                         f'{stats[field]}')
+
+    name = 'api_request_duration_seconds'
+    family(name, 'histogram', 'Wall time of requests.')
+    for route, stats in routes:
+        label = f'route="{_escape(route)}"'
+        for bound, count in zip(BUCKETS, stats['buckets']):
+            lines.append(f'{name}_bucket{{{label},le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{{label},le="+Inf"}} '
+                     f'{stats["requests"]}')
+        lines.append(f'{name}_sum{{{label}}} {stats["wall_seconds"]}')
+        lines.append(f'{name}_count{{{label}}} {stats["requests"]}')
+
+    cache_stats = get_stats()
+    for outcome in ('hits', 'misses'):
+        name = f'api_cache_{outcome}_total'
+        family(name, 'counter', f'Response cache {outcome}.')
+        for group, stats in cache_stats.items():
+            lines.append(f'{name}{{group="{group}"}} {stats[outcome]}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,159 @@
+import time
+
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from api import metrics
+from api.cache import get_cache
+from ratereviewrevive.routers import (finish_replica_reads, replicas,
+                                      start_replica_reads)
+
+# Cookie и ключ кэша, которые держат клиента на основной базе после
+# записи, пока реплики догоняют её.
+PIN_COOKIE = 'db_primary'
+PIN_KEY = 'db-primary:{}'
+
+
+class PerformanceMiddleware:
+    """Замеряет время, SQL-запросы и размер ответа по маршрутам.
+
+    Маршрут — имя view из resolver_match, а не путь: все произведения
+    попадают в один ряд titles-detail, и хранилище не разрастается.
+    SQL-запросы профиль получает от record_query на соединениях.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not metrics.monitoring_setting('ENABLED'):
+            return self.get_response(request)
+        profile, token = metrics.start_profile()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.finish_profile(token)
+        self.record(request, response, profile, started)
+        return response
+
+    async def __acall__(self, request):
+        if not metrics.monitoring_setting('ENABLED'):
+            return await self.get_response(request)
+        profile, token = metrics.start_profile()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.finish_profile(token)
+        self.record(request, response, profile, started)
+        return response
+
+    def record(self, request, response, profile, started):
+        wall = time.perf_counter() - started
+        match = request.resolver_match
+        route = match.view_name if match else 'unresolved'
+        response_bytes = (0 if response.streaming
+                          else len(response.content))
+        slow = wall * 1000 >= metrics.monitoring_setting('SLOW_REQUEST_MS')
+        metrics.store.record(route, wall, profile, response_bytes, slow)
+        if slow:
+            metrics.log_slow_request(request, route, wall, profile)
+
+
+class ReplicaMiddleware:
+    """GET вьюсетов с read_from_replica = True читает с реплики.
+
+    После успешной записи клиент на REPLICA_PIN_SECONDS остаётся на
+    основной базе (read-your-writes): браузер — по cookie, клиент с
+    JWT — по отметке в кэше API для его пользователя, на любом
+    устройстве. Отметка кэша видна всем процессам, если кэш общий.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.authentication = JWTAuthentication()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.finish(request)
+        if self.should_pin(request, response):
+            self.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.finish(request)
+        if self.should_pin(request, response):
+            await sync_to_async(self.pin)(request, response)
+        return response
+
+    def finish(self, request):
+        token = getattr(request, '_replica_token', None)
+        if token is not None:
+            finish_replica_reads(token)
+
+    def should_pin(self, request, response):
+        return (replicas() and request.method not in SAFE_METHODS
+                and response.status_code < 400)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if (request.method in SAFE_METHODS and replicas()
+                and getattr(view_class, 'read_from_replica', False)
+                and not self.is_pinned(request)):
+            request._replica_token = start_replica_reads()
+
+    def is_pinned(self, request):
+        if PIN_COOKIE in request.COOKIES:
+            return True
+        user_id = self.token_user_id(request)
+        return (user_id is not None
+                and get_cache().get(PIN_KEY.format(user_id)) is not None)
+
+    def token_user_id(self, request):
+        """Id пользователя из заголовка; без запроса к базе."""
+        header = self.authentication.get_header(request)
+        if header is None:
+            return None
+        try:
+            raw_token = self.authentication.get_raw_token(header)
+            if raw_token is None:
+                return None
+            token = self.authentication.get_validated_token(raw_token)
+        except AuthenticationFailed:
+            # И кривой заголовок, и InvalidToken: 401 ответит
+            # аутентификация DRF, а запрос просто не закреплён.
+            return None
+        return token.get(api_settings.USER_ID_CLAIM)
+
+    def pin(self, request, response):
+        seconds = settings.REPLICA_PIN_SECONDS
+        response.set_cookie(PIN_COOKIE, '1', max_age=seconds,
+                            httponly=True, samesite='Lax')
+        # DRF кладёт пользователя из токена и в request Django.
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            get_cache().set(PIN_KEY.format(user.pk), True, seconds)
@@ -0,0 +1,147 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination,
+                                       LimitOffsetPagination,
+                                       _positive_int)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по ключу (pub_date, id), от новых к старым.
+
+    Страница выбирается условием по индексированным полям вместо OFFSET,
+    общее число записей не считается: стоимость запроса не зависит от
+    глубины страницы.
+    """
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    offset_query_param = 'offset'
+    default_limit = api_settings.PAGE_SIZE
+    max_limit = 100
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        position, self.reverse = self.decode_cursor(request)
+        if self.reverse:
+            queryset = queryset.order_by('pub_date', 'id')
+        else:
+            queryset = queryset.order_by('-pub_date', '-id')
+        if position is not None:
+            pub_date, pk = position
+            if self.reverse:
+                queryset = queryset.filter(
+                    Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+                )
+        # Одна лишняя запись показывает, есть ли страница дальше.
+        page = list(queryset[:self.limit + 1])
+        has_more = len(page) > self.limit
+        page = page[:self.limit]
+        if self.reverse:
+            page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = page
+        return page
+
+    def get_limit(self, request):
+        try:
+            return _positive_int(request.query_params[self.limit_query_param],
+                                 strict=True, cutoff=self.max_limit)
+        except (KeyError, ValueError):
+            return self.default_limit
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            pub_date, pk, reverse = urlsafe_b64decode(
+                encoded.encode('ascii')
+            ).decode('ascii').split('|')
+            pub_date = parse_datetime(pub_date)
+            if pub_date is None:
+                raise ValueError
+            return (pub_date, int(pk)), reverse == '1'
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, item, reverse):
+        if isinstance(item, dict):
+            pub_date, pk = item['pub_date'], item['id']
+        else:
+            pub_date, pk = item.pub_date, item.id
+        token = f'{pub_date.isoformat()}|{pk}|{int(reverse)}'
+        url = remove_query_param(self.request.build_absolute_uri(),
+                                 self.offset_query_param)
+        return replace_query_param(
+            url, self.cursor_query_param,
+            urlsafe_b64encode(token.encode('ascii')).decode('ascii')
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+class OffsetOrKeysetPagination(BasePagination):
+    """Limit/offset по умолчанию, по ключу — по запросу или для вьюсета.
+
+    Режим выбирается параметром ?pagination=cursor|offset, наличием
+    ?cursor=... или атрибутом pagination_mode вьюсета.
+    """
+    mode_query_param = 'pagination'
+    default_mode = 'offset'
+    paginator_classes = {
+        'offset': LimitOffsetPagination,
+        'cursor': KeysetPagination,
+    }
+
+    def get_mode(self, request, view):
+        if request.query_params.get(KeysetPagination.cursor_query_param):
+            return 'cursor'
+        mode = request.query_params.get(self.mode_query_param)
+        if mode in self.paginator_classes:
+            return mode
+        return getattr(view, 'pagination_mode', self.default_mode)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.paginator_classes[self.get_mode(request,
+                                                              view)]()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    @property
+    def display_page_controls(self):
+        paginator = getattr(self, 'paginator', None)
+        return paginator is not None and paginator.display_page_controls
+
+    def to_html(self):
+        return self.paginator.to_html()
@@ -1,19 +1,27 @@
 import datetime as dt
 
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
 from rest_framework import serializers
+from rest_framework.exceptions import NotFound
 from rest_framework.relations import SlugRelatedField
 from rest_framework.validators import (UniqueTogetherValidator,
                                        UniqueValidator,
                                        ValidationError)
 
+from api.metrics import TimedSerializerMixin
+from api.slugs import category_ids, genre_ids
+from changes.models import ChangeLog
+from rankings.leaderboard import ORDERINGS
+from rankings.models import TitleRanking
+from recommendations.models import SimilarTitle
 from reviews import models
 from users.models import User
 
 THE_OLDEST_TITLE = -2200
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     username = serializers.RegexField(
         regex=r'^[\w.@+-]+$',
         max_length=100,
@@ -65,23 +73,89 @@ class TokenSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField(required=True)
 
 
+class SearchQuerySerializer(serializers.Serializer):
+    SEARCH_TYPES = ('title', 'review', 'comment')
+
+    q = serializers.CharField(required=True, max_length=256)
+    type = serializers.MultipleChoiceField(choices=SEARCH_TYPES,
+                                           required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class ChangeFeedQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(min_value=0, required=False)
+    limit = serializers.IntegerField(min_value=1, required=False)
+    model = serializers.MultipleChoiceField(choices=ChangeLog.MODELS,
+                                            required=False)
+
+
+class ChangeSerializer(serializers.ModelSerializer):
+    class Meta:
+        fields = ('id', 'position', 'model', 'object_id', 'action',
+                  'title_id', 'review_id', 'created_at')
+        model = ChangeLog
+
+
+class RankingQuerySerializer(serializers.Serializer):
+    by = serializers.ChoiceField(choices=tuple(ORDERINGS), default='rating')
+    genre = serializers.SlugField(required=False)
+    category = serializers.SlugField(required=False)
+    limit = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        if 'genre' in attrs and 'category' in attrs:
+            raise serializers.ValidationError(
+                'Рейтинг строится либо по жанру, либо по категории.'
+            )
+        return attrs
+
+
+class BulkReviewSerializer(serializers.Serializer):
+    """Элемент пакетной загрузки отзывов; база проверяется пакетом."""
+    title = serializers.IntegerField(min_value=1)
+    text = serializers.CharField()
+    score = serializers.IntegerField(min_value=1, max_value=10)
+    # Автора из другой площадки указывает только администратор.
+    author = serializers.CharField(required=False)
+
+
+class BulkCommentSerializer(serializers.Serializer):
+    review = serializers.IntegerField(min_value=1)
+    text = serializers.CharField()
+    author = serializers.CharField(required=False)
+
+
+class BulkTitleSerializer(serializers.Serializer):
+    """Элемент пакетного создания; slug и уникальность — пакетом."""
+    name = serializers.CharField(max_length=256)
+    year = serializers.IntegerField()
+    description = serializers.CharField(max_length=256, required=False,
+                                        allow_blank=True)
+    category = serializers.SlugField()
+    genre = serializers.ListField(child=serializers.SlugField(),
+                                  required=False)
+
+    def validate_year(self, value):
+        return validate_title_year(value)
+
+
 # Самым древним литературным произведением является
 # "Эпос о Гильгамеше"(также поэма "О всём видавшем"),
 # шедевр и главное достояние аккадской литературы.
 # Его создание большинство учёных относят к 22 веку до нашей эры
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Genre
         exclude = ['id']
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Category
         exclude = ['id']
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
     rating = serializers.FloatField(read_only=True)
@@ -96,6 +170,28 @@ class TitleSerializer(serializers.ModelSerializer):
                   'category')
         model = models.Title
         read_only_fields = ['id', 'rating']
+
+
+def validate_title_year(value):
+    year = dt.datetime.now().year
+    if not (THE_OLDEST_TITLE < value <= year):
+        raise serializers.ValidationError('Проверьте год произведения!')
+    return value
+
+
+class TitleWriteSerializer(serializers.ModelSerializer):
+    """Создание и правка произведения; ответ — как у TitleSerializer.
+
+    Категория и жанры передаются slug и берутся из SlugCache, поэтому
+    запись не читает справочники, а произведение сохраняется один раз.
+    """
+    category = serializers.SlugField()
+    genre = serializers.ListField(child=serializers.SlugField(),
+                                  required=False)
+
+    class Meta:
+        fields = ('name', 'year', 'description', 'genre', 'category')
+        model = models.Title
         # Сделал проверку уникальности произведения в сочетании название-год
         # Ведь может быть переиздание произведения, которое также называется
         validators = [
@@ -106,13 +202,61 @@ class TitleSerializer(serializers.ModelSerializer):
         ]
 
     def validate_year(self, value):
-        year = dt.datetime.now().year
-        if not (THE_OLDEST_TITLE < value <= year):
-            raise serializers.ValidationError('Проверьте год произведения!')
-        return value
+        return validate_title_year(value)
 
+    def validate(self, attrs):
+        # slug заменяются на id: category_id и genre_ids.
+        errors = {}
+        if 'category' in attrs:
+            slug = attrs.pop('category')
+            found = category_ids.resolve([slug])
+            if slug in found:
+                attrs['category_id'] = found[slug]
+            else:
+                errors['category'] = [f'Категория {slug} не найдена.']
+        if 'genre' in attrs:
+            slugs = attrs.pop('genre')
+            found = genre_ids.resolve(slugs)
+            unknown = [slug for slug in slugs if slug not in found]
+            if unknown:
+                errors['genre'] = [f'Жанры не найдены: {", ".join(unknown)}.']
+            else:
+                attrs['genre_ids'] = list(dict.fromkeys(found[slug]
+                                                        for slug in slugs))
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
 
-class ReviewSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        genre_ids = validated_data.pop('genre_ids', ())
+        with transaction.atomic():
+            title = models.Title.objects.create(**validated_data)
+            if genre_ids:
+                # updated_at только что выставлен INSERT: отметка от
+                # m2m_changed (reviews/signals.py) была бы второй записью.
+                title._skip_genre_touch = True
+                title.genre.add(*genre_ids)
+                del title._skip_genre_touch
+        return title
+
+    def update(self, instance, validated_data):
+        genre_ids = validated_data.pop('genre_ids', None)
+        with transaction.atomic():
+            if validated_data:
+                for field, value in validated_data.items():
+                    setattr(instance, field, value)
+                instance.save(update_fields=[*validated_data, 'updated_at'])
+            if genre_ids is not None:
+                # set() сравнивает с текущими жанрами: удаляет убранные и
+                # добавляет новые, m2m_changed отправляется как обычно.
+                instance.genre.set(genre_ids)
+        return instance
+
+    def to_representation(self, instance):
+        return TitleSerializer(instance, context=self.context).data
+
+
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = SlugRelatedField(slug_field='username', read_only=True)
 
     class Meta:
@@ -123,17 +267,61 @@ class ReviewSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request.method == 'POST':
             title = self.context.get('view').kwargs.get('title_id')
-            if models.Review.objects.filter(author=request.user,
-                                            title=title).exists():
+            # Один запрос: есть ли произведение и есть ли уже отзыв автора.
+            already_reviewed = models.Title.objects.filter(
+                pk=title, pending_deletion=False
+            ).annotate(already_reviewed=Exists(
+                models.Review.objects.filter(author=request.user,
+                                             title=OuterRef('pk'))
+            )).values_list('already_reviewed', flat=True).first()
+            if already_reviewed is None:
+                raise NotFound()
+            if already_reviewed:
                 raise serializers.ValidationError(
                     'Нельзя оставлять более одного отзыва!'
                 )
         return attrs
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = SlugRelatedField(slug_field='username', read_only=True)
 
     class Meta:
         fields = ('id', 'text', 'author', 'pub_date')
         model = models.Comment
+
+
+class RankingSerializer(serializers.ModelSerializer):
+    title = TitleSerializer(read_only=True)
+
+    class Meta:
+        fields = ('score', 'review_count', 'title')
+        model = TitleRanking
+
+
+class DeletionJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        fields = ('id', 'model', 'object_id', 'status', 'total', 'deleted',
+                  'progress', 'created_at', 'finished_at')
+        model = models.DeletionJob
+
+    def get_progress(self, job):
+        if job.status == models.DeletionJob.DONE:
+            return 1.0
+        if not job.total:
+            return None
+        return min(job.deleted / job.total, 1.0)
+
+
+class SimilarQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(min_value=1, required=False)
+
+
+class SimilarTitleSerializer(serializers.ModelSerializer):
+    title = TitleSerializer(source='similar', read_only=True)
+
+    class Meta:
+        fields = ('score', 'co_reviews', 'title')
+        model = SimilarTitle
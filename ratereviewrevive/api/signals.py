@@ -0,0 +1,89 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.authentication import user_cache
+from api.cache import CACHE_GROUPS, invalidate
+from api.slugs import SLUG_CACHES
+from reviews import models
+from reviews.signals import (bulk_created, data_imported, ratings_rebuilt,
+                             soft_deleted)
+from users.models import User
+
+# Какие закэшированные группы ответов устаревают при изменении модели.
+# Произведения вкладывают категорию и жанры, а их рейтинг зависит от
+# отзывов.
+INVALIDATES = {
+    models.Category: ('categories', 'titles'),
+    models.Genre: ('genres', 'titles'),
+    models.Title: ('titles',),
+    models.Review: ('titles',),
+}
+
+
+def invalidate_on_commit(groups):
+    # Сброс после коммита: иначе параллельный запрос успеет положить
+    # в кэш данные, которые ещё не видны его транзакции.
+    transaction.on_commit(partial(invalidate, *groups))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_model_cache(sender, **kwargs):
+    groups = INVALIDATES.get(sender)
+    if groups:
+        invalidate_on_commit(groups)
+
+
+@receiver(bulk_created)
+def invalidate_after_bulk_create(sender, **kwargs):
+    groups = INVALIDATES.get(sender)
+    if groups:
+        invalidate_on_commit(groups)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Сразу и после коммита: между ними кэш мог прочитать старую роль.
+    user_cache.invalidate(instance.pk)
+    transaction.on_commit(partial(user_cache.invalidate, instance.pk))
+
+
+@receiver(post_save, sender=models.Category)
+@receiver(post_delete, sender=models.Category)
+@receiver(post_save, sender=models.Genre)
+@receiver(post_delete, sender=models.Genre)
+def invalidate_slug_cache(sender, **kwargs):
+    # Как и с пользователями: сразу и после коммита.
+    SLUG_CACHES[sender].clear()
+    transaction.on_commit(SLUG_CACHES[sender].clear)
+
+
+@receiver(m2m_changed, sender=models.Title.genre.through)
+def invalidate_title_genres(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_on_commit(INVALIDATES[models.Title])
+
+
+@receiver(soft_deleted)
+def invalidate_soft_deleted(sender, instance, **kwargs):
+    # Скрытие — запрос UPDATE, post_save для него не было.
+    if sender is User:
+        invalidate_cached_user(sender, instance)
+    else:
+        invalidate_on_commit(INVALIDATES[sender])
+
+
+@receiver(ratings_rebuilt)
+def invalidate_rebuilt_ratings(sender, **kwargs):
+    invalidate_on_commit(('titles',))
+
+
+@receiver(data_imported)
+def invalidate_after_import(sender, **kwargs):
+    invalidate(*CACHE_GROUPS)
+    for cache in SLUG_CACHES.values():
+        cache.clear()
@@ -0,0 +1,62 @@
+import threading
+import time
+
+from api.cache import group_version, is_shared
+from reviews import models
+
+# Срок жизни записей, если кэш API не общий и смену версии в другом
+# процессе этот не увидит.
+LOCAL_TTL_SECONDS = 60
+
+
+class SlugCache:
+    """Id категорий и жанров по slug в памяти процесса.
+
+    Справочники маленькие и меняются редко: запись произведения не
+    читает их из базы, пока кэш не сброшен. В своём процессе его сразу
+    сбрасывают сигналы api/signals.py, в остальных — смена версии группы
+    cache_group в общем кэше API, которую те же сигналы делают после
+    коммита. С кэшем API в памяти процесса записи живут не дольше
+    LOCAL_TTL_SECONDS. Неизвестные slug не кэшируются и каждый раз
+    проверяются в базе.
+    """
+
+    def __init__(self, model, cache_group):
+        self.model = model
+        self.cache_group = cache_group
+        self._lock = threading.Lock()
+        self._ids = {}
+        self._version = None
+
+    def resolve(self, slugs):
+        """{slug: id} для найденных slug; промахи — одним запросом."""
+        slugs = set(slugs)
+        version = group_version(self.cache_group)
+        if not is_shared():
+            version = (version, int(time.monotonic() // LOCAL_TTL_SECONDS))
+        with self._lock:
+            if version != self._version:
+                self._ids.clear()
+                self._version = version
+            found = {slug: self._ids[slug] for slug in slugs
+                     if slug in self._ids}
+        missing = slugs - found.keys()
+        if missing:
+            loaded = dict(self.model.objects.filter(
+                slug__in=missing
+            ).values_list('slug', 'pk'))
+            with self._lock:
+                # Версия сменилась, пока шёл запрос: ответ мог устареть.
+                if version == self._version:
+                    self._ids.update(loaded)
+            found.update(loaded)
+        return found
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+
+category_ids = SlugCache(models.Category, 'categories')
+genre_ids = SlugCache(models.Genre, 'genres')
+SLUG_CACHES = {models.Category: category_ids, models.Genre: genre_ids}
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TransactionTestCase,
+                         override_settings)
+
+from api import metrics
+from api.async_read import async_read_view
+from api.views import ReviewViewSet, TitleViewSet
+from reviews import models
+from users.models import User
+
+
+def thread_name(request):
+    with metrics.timed_serialization():
+        time.sleep(0.001)
+    return HttpResponse(threading.current_thread().name)
+
+
+class AsyncReadViewTests(SimpleTestCase):
+
+    def setUp(self):
+        self.view = async_to_sync(async_read_view(thread_name))
+        self.factory = RequestFactory()
+
+    def test_reads_run_in_pool(self):
+        response = self.view(self.factory.get('/'))
+        self.assertTrue(response.content.startswith(b'api-read'))
+        response = self.view(self.factory.post('/'))
+        self.assertFalse(response.content.startswith(b'api-read'))
+
+    def test_profile_reaches_pool(self):
+        profile, token = metrics.start_profile()
+        try:
+            self.view(self.factory.get('/'))
+        finally:
+            metrics.finish_profile(token)
+        self.assertGreater(profile.serializer_time, 0)
+
+    def test_router_views(self):
+        actions = {'get': 'list', 'post': 'create'}
+        self.assertFalse(asyncio.iscoroutinefunction(
+            TitleViewSet.as_view(actions)
+        ))
+        with override_settings(ASYNC_READ_PATH={'ENABLED': True}):
+            view = TitleViewSet.as_view(actions)
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        # По атрибутам view работают ReplicaMiddleware, CSRF и схема API.
+        self.assertIs(view.cls, TitleViewSet)
+        self.assertEqual(view.actions, actions)
+        self.assertTrue(view.csrf_exempt)
+
+
+class AsyncReadPathTests(TransactionTestCase):
+    """Потоки пула и ASGI ходят в базу своими соединениями."""
+
+    def setUp(self):
+        author = User.objects.create(username='author',
+                                     email='author@example.com')
+        category = models.Category.objects.create(name='Фильм', slug='film')
+        genre = models.Genre.objects.create(name='Драма', slug='drama')
+        self.title = models.Title.objects.create(name='Побег', year=1994,
+                                                 category=category)
+        self.title.genre.add(genre)
+        models.Review.objects.create(title=self.title, author=author,
+                                     text='Отзыв', score=8)
+        metrics.store.clear()
+
+    def test_same_response_as_sync_view(self):
+        factory = RequestFactory()
+        for viewset, actions, path, kwargs in (
+                (TitleViewSet, {'get': 'retrieve'},
+                 f'/api/v1/titles/{self.title.pk}/', {'pk': self.title.pk}),
+                (ReviewViewSet, {'get': 'list'},
+                 f'/api/v1/titles/{self.title.pk}/reviews/',
+                 {'title_id': self.title.pk})):
+            sync_view = viewset.as_view(actions)
+            with override_settings(ASYNC_READ_PATH={'ENABLED': True}):
+                async_view = async_to_sync(viewset.as_view(actions))
+            expected = sync_view(factory.get(path), **kwargs)
+            expected.render()
+            response = async_view(factory.get(path), **kwargs)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual(json.loads(response.content),
+                             json.loads(expected.content), path)
+
+    async def test_asgi_middleware(self):
+        response = await self.async_client.get(
+            f'/api/v1/titles/{self.title.pk}/reviews/'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)['results']), 1)
+        # Запросы к базе из другого потока попали в профиль запроса.
+        self.assertGreater(
+            dict(metrics.store.snapshot())['reviews-list']['queries'], 0
+        )
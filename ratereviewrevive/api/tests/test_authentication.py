@@ -0,0 +1,61 @@
+from rest_framework.test import APITestCase
+
+from api.authentication import token_for_user, user_cache
+from users.models import User
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin',
+                                        email='admin@example.com',
+                                        role=User.ADMIN)
+        cls.user = User.objects.create(username='reader',
+                                       email='reader@example.com')
+
+    def setUp(self):
+        user_cache.clear()
+
+    def authenticate(self, user):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {token_for_user(user)}'
+        )
+
+    def test_token_carries_role_claims(self):
+        token = token_for_user(self.admin)
+        self.assertEqual(token['role'], User.ADMIN)
+        self.assertEqual(token['username'], 'admin')
+        self.assertFalse(token['is_superuser'])
+
+    def test_cached_user_is_not_queried(self):
+        self.authenticate(self.admin)
+        url = f'/api/v1/users/{self.user.username}/'
+        self.client.get(url)
+        # Пользователь уже в кэше: остаётся запрос самой записи.
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_role_change_applies_to_issued_token(self):
+        self.authenticate(self.user)
+        self.assertEqual(self.client.get('/api/v1/users/').status_code, 403)
+        self.authenticate(self.admin)
+        response = self.client.patch(f'/api/v1/users/{self.user.username}/',
+                                     {'role': User.ADMIN})
+        self.assertEqual(response.status_code, 200)
+        self.authenticate(self.user)
+        self.assertEqual(self.client.get('/api/v1/users/').status_code, 200)
+
+    def test_me_returns_full_user(self):
+        self.authenticate(self.user)
+        response = self.client.get('/api/v1/users/me/')
+        self.assertEqual(response.data['email'], 'reader@example.com')
+
+    def test_deleted_user_is_rejected(self):
+        self.authenticate(self.user)
+        self.client.get('/api/v1/categories/')
+        User.objects.filter(pk=self.user.pk).delete()
+        user_cache.invalidate(self.user.pk)
+        self.assertEqual(self.client.get('/api/v1/categories/').status_code,
+                         401)
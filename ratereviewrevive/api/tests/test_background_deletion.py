@@ -0,0 +1,161 @@
+import csv
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from api.authentication import token_for_user, user_cache
+from rankings.models import TitleRanking
+from reviews import models
+from reviews.deletion import process_deletions
+from search.backends import get_backend
+from users.models import User
+
+FAST = {'ENABLED': True, 'PAUSE_SECONDS': 0, 'BATCH_SIZE': 2}
+
+
+@override_settings(BACKGROUND_DELETION=FAST)
+class BackgroundDeletionTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin',
+                                        email='admin@example.com',
+                                        role=User.ADMIN)
+        cls.users = [User.objects.create(username=f'user{i}',
+                                         email=f'user{i}@example.com')
+                     for i in range(3)]
+        category = models.Category.objects.create(name='Фильм', slug='film')
+        cls.title = models.Title.objects.create(name='Побег', year=1994,
+                                                category=category)
+        cls.other = models.Title.objects.create(name='Сталкер', year=1979,
+                                                category=category)
+        for title in (cls.title, cls.other):
+            for score, user in enumerate(cls.users, start=5):
+                review = models.Review.objects.create(
+                    title=title, author=user, text='Отзыв', score=score
+                )
+                for author in cls.users:
+                    models.Comment.objects.create(review=review,
+                                                  author=author,
+                                                  text='Комментарий')
+
+    def setUp(self):
+        user_cache.clear()
+        self.client.force_authenticate(self.admin)
+
+    def test_title_is_hidden_then_deleted(self):
+        url = f'/api/v1/titles/{self.title.pk}/'
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], models.DeletionJob.PENDING)
+        self.assertTrue(response['Location'].endswith(
+            f'/api/v1/deletions/{response.data["id"]}/'
+        ))
+        # Строки ещё в базе, но API их уже не показывает.
+        self.assertTrue(models.Review.objects.filter(title=self.title)
+                        .exists())
+        for path in ('', 'reviews/', 'similar/'):
+            self.assertEqual(self.client.get(f'{url}{path}').status_code,
+                             404, path)
+        self.assertFalse(TitleRanking.objects.filter(title=self.title)
+                         .exists())
+
+        job, deleted, error = process_deletions()
+        self.assertIsNone(error)
+        # Девять комментариев, три отзыва и само произведение.
+        self.assertEqual(deleted, 13)
+        self.assertFalse(models.Title.objects.filter(pk=self.title.pk)
+                         .exists())
+        self.assertEqual(models.Review.objects.count(), 3)
+        self.assertEqual(models.Comment.objects.count(), 9)
+        response = self.client.get(response['Location'])
+        self.assertEqual(response.data['status'], models.DeletionJob.DONE)
+        self.assertEqual((response.data['total'], response.data['deleted'],
+                          response.data['progress']), (13, 13, 1.0))
+        self.assertEqual(process_deletions(), (None, 0, None))
+
+    def test_hidden_title_children(self):
+        review = models.Review.objects.filter(title=self.title).first()
+        comment = review.comments.first()
+        review_url = f'/api/v1/titles/{self.title.pk}/reviews/{review.pk}/'
+        comment_url = f'{review_url}comments/{comment.pk}/'
+        get_backend().rebuild()
+        self.client.delete(f'/api/v1/titles/{self.title.pk}/')
+        for url in (review_url, comment_url):
+            self.assertEqual(self.client.get(url).status_code, 404, url)
+            response = self.client.patch(url, {'text': 'Правка'})
+            self.assertEqual(response.status_code, 404, url)
+            self.assertEqual(self.client.delete(url).status_code, 404, url)
+        results = self.client.get('/api/v1/search/',
+                                  {'q': 'Отзыв Комментарий'}).data['results']
+        self.assertNotIn(self.title.pk,
+                         {result['title_id'] for result in results})
+        hidden_reviews = {str(pk) for pk in models.Review.objects.filter(
+            title=self.title
+        ).values_list('pk', flat=True)}
+        for dataset, column, hidden in (
+                ('titles', 'id', {str(self.title.pk)}),
+                ('reviews', 'title_id', {str(self.title.pk)}),
+                ('comments', 'review_id', hidden_reviews)):
+            response = self.client.get(f'/api/v1/export/{dataset}/',
+                                       {'output': 'csv'})
+            values = {row[column] for row in csv.DictReader(
+                b''.join(response.streaming_content).decode().splitlines()
+            )}
+            self.assertTrue(values, dataset)
+            self.assertFalse(values & hidden, dataset)
+
+    def test_user_is_deactivated_then_deleted(self):
+        user = self.users[0]
+        token = token_for_user(user)
+        response = self.client.delete(f'/api/v1/users/{user.username}/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(
+            self.client_class().get('/api/v1/users/me/',
+                                    HTTP_AUTHORIZATION=f'Bearer {token}')
+            .status_code,
+            401
+        )
+        self.assertEqual(
+            self.client.get(f'/api/v1/users/{user.username}/').status_code,
+            404
+        )
+
+        call_command('process_deletions', stdout=StringIO())
+        self.assertFalse(User.objects.filter(pk=user.pk).exists())
+        # Свои комментарии, отзывы и комментарии к ним.
+        self.assertFalse(models.Comment.objects.filter(author=user)
+                         .exists())
+        self.assertFalse(models.Review.objects.filter(author=user).exists())
+        self.assertEqual(models.Comment.objects.count(), 8)
+        self.other.refresh_from_db()
+        self.assertEqual((self.other.rating_count, self.other.rating),
+                         (2, 6.5))
+
+    def test_failed_job_is_retried(self):
+        self.client.delete(f'/api/v1/titles/{self.title.pk}/')
+        with override_settings(BACKGROUND_DELETION={**FAST,
+                                                    'BATCH_SIZE': -1}):
+            job, deleted, error = process_deletions()
+        self.assertIsNotNone(error)
+        job.refresh_from_db()
+        self.assertEqual(job.status, models.DeletionJob.RUNNING)
+        self.assertEqual(job.last_error, error)
+        # Срок повтора ещё не вышел.
+        self.assertEqual(process_deletions(), (None, 0, None))
+
+    def test_progress_is_admin_only(self):
+        response = self.client.delete(f'/api/v1/titles/{self.title.pk}/')
+        self.client.force_authenticate(self.users[0])
+        self.assertEqual(self.client.get(response['Location']).status_code,
+                         403)
+
+    def test_disabled(self):
+        with override_settings(BACKGROUND_DELETION={'ENABLED': False}):
+            response = self.client.delete(f'/api/v1/titles/{self.title.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(models.Review.objects.filter(title=self.title)
+                         .exists())
+        self.assertFalse(models.DeletionJob.objects.exists())
@@ -0,0 +1,18 @@
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+from api.benchmark import summarize
+
+
+class BenchmarkTests(SimpleTestCase):
+
+    def test_throughput_is_wall_clock(self):
+        # Четыре запроса по 0,1 с за 0,2 с настенного времени.
+        summary = summarize([0.1] * 4, 0.2)
+        self.assertAlmostEqual(summary['throughput_rps'], 20)
+        self.assertAlmostEqual(summary['mean_ms'], 100)
+
+    def test_remote_writes_are_refused(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark_api', '--writes',
+                         '--base-url', 'http://127.0.0.1:8000')
@@ -0,0 +1,145 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from reviews import models
+from users.models import User
+
+
+class BulkCreateTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin',
+                                        email='admin@example.com',
+                                        role=User.ADMIN)
+        cls.user = User.objects.create(username='reader',
+                                       email='reader@example.com')
+        category = models.Category.objects.create(name='Фильм', slug='film')
+        cls.titles = [
+            models.Title.objects.create(name=f'Произведение {i}',
+                                        year=2000, category=category)
+            for i in range(3)
+        ]
+        cls.review = models.Review.objects.create(
+            title=cls.titles[0], author=cls.user, text='Отзыв', score=2
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_reviews(self):
+        items = [
+            {'title': self.titles[1].pk, 'text': 'Да', 'score': 8},
+            {'title': self.titles[2].pk, 'text': 'Нет', 'score': 4},
+            {'title': self.titles[0].pk, 'text': 'Повтор', 'score': 5},
+            {'title': self.titles[1].pk, 'text': 'Повтор', 'score': 5},
+            {'title': 999, 'text': 'Нет такого', 'score': 5},
+            {'title': self.titles[2].pk, 'text': 'Оценка', 'score': 11},
+        ]
+        response = self.client.post('/api/v1/reviews/bulk/', items,
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, [201, 201, 400, 400, 400, 400])
+        created = models.Review.objects.get(
+            pk=response.data['results'][0]['id']
+        )
+        self.assertEqual((created.title, created.author, created.text),
+                         (self.titles[1], self.user, 'Да'))
+        self.titles[2].refresh_from_db()
+        self.assertEqual(self.titles[2].rating, 4)
+        self.assertEqual(self.titles[2].rating_count, 1)
+
+    def test_review_queries_do_not_grow_with_batch(self):
+        authors = [User.objects.create(username=f'author{i}',
+                                       email=f'author{i}@example.com')
+                   for i in range(4)]
+        self.client.force_authenticate(self.admin)
+        counts = []
+        # Одни и те же произведения: на каждое из них приходится свой
+        # пересчёт рейтинга и таблиц лидеров, от числа отзывов он не
+        # зависит. Первый пакет ещё создаёт строки таблиц лидеров.
+        for batch in (authors[:1], authors[1:2], authors[2:]):
+            items = [{'title': title.pk, 'text': 'Отзыв', 'score': 5,
+                      'author': author.username}
+                     for title in self.titles[1:] for author in batch]
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.post('/api/v1/reviews/bulk/', items,
+                                            format='json')
+            self.assertEqual(response.data['created'], len(items))
+            counts.append(len(captured))
+        self.assertEqual(counts[1], counts[2])
+
+    def test_author_requires_admin(self):
+        response = self.client.post(
+            '/api/v1/reviews/bulk/',
+            [{'title': self.titles[1].pk, 'text': 'Отзыв', 'score': 5,
+              'author': 'admin'}],
+            format='json'
+        )
+        self.assertEqual(response.data['results'][0]['status'], 400)
+        self.assertIn('author', response.data['results'][0]['errors'])
+
+    def test_comments(self):
+        response = self.client.post(
+            '/api/v1/comments/bulk/',
+            [{'review': self.review.pk, 'text': 'Комментарий'},
+             {'review': 999, 'text': 'Нет отзыва'}],
+            format='json'
+        )
+        self.assertEqual(response.data['created'], 1)
+        comment = models.Comment.objects.get(
+            pk=response.data['results'][0]['id']
+        )
+        self.assertEqual(comment.review, self.review)
+
+    def test_comments_of_hidden_title(self):
+        models.Title.objects.filter(pk=self.titles[0].pk).update(
+            pending_deletion=True
+        )
+        response = self.client.post(
+            '/api/v1/comments/bulk/',
+            [{'review': self.review.pk, 'text': 'Комментарий'}],
+            format='json'
+        )
+        self.assertEqual(response.data['results'][0]['status'], 400)
+        self.assertIn('review', response.data['results'][0]['errors'])
+        self.assertFalse(self.review.comments.exists())
+
+    def test_concurrent_review_fails_only_its_item(self):
+        # Параллельный запрос вставил отзыв после проверки пакета: первая
+        # проверка занятых пар его ещё не видит.
+        models.Review.objects.create(title=self.titles[1], author=self.user,
+                                     text='Параллельно', score=3)
+        reads = []
+        real_filter = models.Review.objects.filter
+
+        def stale_filter(*args, **kwargs):
+            reads.append(kwargs)
+            if len(reads) == 1:
+                return models.Review.objects.none()
+            return real_filter(*args, **kwargs)
+
+        items = [{'title': self.titles[1].pk, 'text': 'Да', 'score': 8},
+                 {'title': self.titles[2].pk, 'text': 'Нет', 'score': 4}]
+        with mock.patch.object(models.Review.objects, 'filter',
+                               side_effect=stale_filter):
+            response = self.client.post('/api/v1/reviews/bulk/', items,
+                                        format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status']
+                          for result in response.data['results']],
+                         [400, 201])
+        self.assertEqual(len(reads), 2)
+        self.assertEqual(models.Review.objects.filter(
+            author=self.user, title=self.titles[1]
+        ).get().text, 'Параллельно')
+
+    def test_body_must_be_list(self):
+        response = self.client.post('/api/v1/reviews/bulk/', {},
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,128 @@
+from django.core.checks import run_checks
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from api import cache
+from api.cache import get_cache
+from reviews import models
+from users.models import User
+
+
+class ResponseCacheTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin',
+                                        email='admin@example.com',
+                                        role=User.ADMIN)
+        cls.category = models.Category.objects.create(name='Фильм',
+                                                      slug='film')
+        cls.genre = models.Genre.objects.create(name='Драма', slug='drama')
+        cls.title = models.Title.objects.create(name='Побег', year=1994,
+                                                category=cls.category)
+
+    def setUp(self):
+        get_cache().clear()
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response
+
+    def assertCached(self, url):
+        self.assertEqual(self.get(url)['X-Cache'], 'HIT', url)
+
+    def test_hit_and_miss(self):
+        # У произведений до кэша проверяется ETag (api/conditional.py).
+        for url, queries in (('/api/v1/categories/', 0),
+                             ('/api/v1/genres/', 0),
+                             ('/api/v1/titles/', 1),
+                             (f'/api/v1/titles/{self.title.pk}/', 1)):
+            first = self.get(url)
+            self.assertEqual(first['X-Cache'], 'MISS', url)
+            with self.assertNumQueries(queries):
+                second = self.get(url)
+            self.assertEqual(second['X-Cache'], 'HIT', url)
+            self.assertEqual(second.data, first.data)
+
+    def test_query_order_shares_entry(self):
+        self.get('/api/v1/titles/?limit=5&offset=0')
+        self.assertCached('/api/v1/titles/?offset=0&limit=5')
+        self.assertEqual(self.get('/api/v1/titles/?limit=1')['X-Cache'],
+                         'MISS')
+
+    def test_invalidation(self):
+        author = User.objects.create(username='author',
+                                     email='author@example.com')
+        changes = {
+            'category': (lambda: models.Category.objects.create(
+                name='Книга', slug='book'
+            ), ('/api/v1/categories/', '/api/v1/titles/')),
+            'genre': (lambda: models.Genre.objects.create(
+                name='Ужасы', slug='horror'
+            ), ('/api/v1/genres/', '/api/v1/titles/')),
+            'title': (lambda: models.Title.objects.create(
+                name='Сталкер', year=1979
+            ), ('/api/v1/titles/',)),
+            'review': (lambda: models.Review.objects.create(
+                title=self.title, author=author, text='Отзыв', score=8
+            ), ('/api/v1/titles/',)),
+            'genres of title': (lambda: self.title.genre.add(self.genre),
+                                (f'/api/v1/titles/{self.title.pk}/',)),
+        }
+        for name, (change, urls) in changes.items():
+            for url in (*urls, '/api/v1/categories/'):
+                self.get(url)
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            for url in urls:
+                self.assertEqual(self.get(url)['X-Cache'], 'MISS',
+                                 f'{name}: {url}')
+            if '/api/v1/categories/' not in urls:
+                # Чужие группы не сбрасываются.
+                self.assertCached('/api/v1/categories/')
+
+    def test_invalidated_after_commit(self):
+        url = '/api/v1/titles/'
+        self.get(url)
+        with self.captureOnCommitCallbacks() as callbacks:
+            models.Title.objects.create(name='Сталкер', year=1979)
+            # До коммита параллельный запрос ещё видит старую версию.
+            self.assertCached(url)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.get(url).data['count'], 2)
+
+    def test_stats(self):
+        url = '/api/v1/cache/stats/'
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_authenticate(self.admin)
+        before = self.get(url).data['genres']
+        self.get('/api/v1/genres/')
+        self.get('/api/v1/genres/')
+        after = self.get(url).data['genres']
+        self.assertEqual((after['hits'] - before['hits'],
+                          after['misses'] - before['misses']), (1, 1))
+        self.assertGreater(after['hit_ratio'], 0)
+        self.assertEqual(set(self.get(url).data), set(cache.CACHE_GROUPS))
+
+
+class SharedCacheCheckTests(APITestCase):
+
+    def test_process_local_cache_warns_on_deploy(self):
+        self.assertIn('api.W001', [
+            message.id
+            for message in run_checks(include_deployment_checks=True)
+        ])
+        self.assertNotIn('api.W001', [message.id for message in run_checks()])
+
+    @override_settings(CACHES={'api': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/tmp/ratereviewrevive-test-cache',
+    }})
+    def test_shared_cache(self):
+        self.assertTrue(cache.is_shared())
+        self.assertNotIn('api.W001', [
+            message.id
+            for message in run_checks(include_deployment_checks=True)
+        ])
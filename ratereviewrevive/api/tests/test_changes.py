@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from changes.feed import prune
+from changes.models import ChangeLog
+from reviews import models
+from users.models import User
+
+
+class ChangeFeedTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin',
+                                        email='admin@example.com',
+                                        role=User.ADMIN)
+        cls.category = models.Category.objects.create(name='Фильм',
+                                                      slug='film')
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def get_changes(self, **params):
+        return self.client.get('/api/v1/changes/', params)
+
+    def test_events_after_cursor(self):
+        cursor = self.get_changes().data['next_cursor']
+        title = models.Title.objects.create(name='Побег', year=1994,
+                                            category=self.category)
+        review = models.Review.objects.create(title=title, author=self.admin,
+                                              text='Отзыв', score=9)
+        title.name = 'Побег из Шоушенка'
+        title.save()
+        review_id = review.pk
+        review.delete()
+
+        response = self.get_changes(since=cursor, limit=2)
+        self.assertTrue(response.data['has_more'])
+        events = [(event['action'], event['model'], event['object_id'])
+                  for event in response.data['results']]
+        self.assertEqual(events, [('create', 'title', title.pk),
+                                  ('create', 'review', review_id)])
+
+        response = self.get_changes(since=response.data['next_cursor'])
+        self.assertFalse(response.data['has_more'])
+        events = [(event['action'], event['model'])
+                  for event in response.data['results']]
+        self.assertEqual(events, [('update', 'title'), ('delete', 'review')])
+        self.assertEqual(response.data['results'][1]['title_id'], title.pk)
+
+    def test_expired_cursor(self):
+        for year in (2001, 2002, 2003):
+            models.Title.objects.create(name='Произведение', year=year,
+                                        category=self.category)
+        start = self.get_changes().data['next_cursor'] - 3
+        ChangeLog.objects.exclude(
+            pk=ChangeLog.objects.order_by('-id').first().pk
+        ).update(created_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(prune(), 2)
+        response = self.get_changes(since=start)
+        self.assertEqual(response.status_code, 410)
+
+    def test_late_commit_is_not_skipped(self):
+        models.Title.objects.create(name='Побег', year=1994,
+                                    category=self.category)
+        late_id = ChangeLog.objects.latest('id').pk + 1
+        # Следующее событие заняло id позже «опоздавшего».
+        ChangeLog.objects.create(pk=late_id + 1, action=ChangeLog.UPDATE,
+                                 model=ChangeLog.TITLE, object_id=1)
+        cursor = self.get_changes().data['next_cursor']
+        # Транзакция с меньшим id закоммитилась после чтения курсора.
+        ChangeLog.objects.create(pk=late_id, action=ChangeLog.DELETE,
+                                 model=ChangeLog.TITLE, object_id=2)
+        response = self.get_changes(since=cursor)
+        self.assertEqual([event['id'] for event in response.data['results']],
+                         [late_id])
+        self.assertEqual(response.data['next_cursor'], cursor + 1)
+
+    def test_prune_keeps_cursor_at_boundary(self):
+        for year in (2001, 2002):
+            models.Title.objects.create(name='Произведение', year=year,
+                                        category=self.category)
+        cursor = self.get_changes().data['next_cursor']
+        ChangeLog.objects.update(created_at=timezone.now()
+                                 - timedelta(days=30))
+        self.assertEqual(prune(), 2)
+        self.assertFalse(ChangeLog.objects.exists())
+        # Потребитель дочитал всё удалённое: курсор действителен.
+        response = self.get_changes(since=cursor)
+        self.assertEqual((response.status_code, response.data['results']),
+                         (200, []))
+        self.assertEqual(self.get_changes().data['next_cursor'], cursor)
+        self.assertEqual(self.get_changes(since=cursor - 1).status_code, 410)
@@ -0,0 +1,114 @@
+from unittest import mock
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from api.cache import get_cache
+from reviews import models
+from users.models import User
+
+
+class ConditionalGetTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='reader',
+                                       email='reader@example.com')
+        cls.category = models.Category.objects.create(name='Фильм',
+                                                      slug='film')
+        cls.title = models.Title.objects.create(name='Побег', year=1994,
+                                                category=cls.category)
+        cls.review = models.Review.objects.create(
+            title=cls.title, author=cls.user, text='Отзыв', score=8
+        )
+
+    def setUp(self):
+        get_cache().clear()
+
+    def assertNotModified(self, url, queries=1, **headers):
+        # Только запрос версии: ни выборки, ни сериализации.
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 304, url)
+
+    def test_not_modified(self):
+        urls = (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{self.title.pk}/',
+            f'/api/v1/titles/{self.title.pk}/reviews/',
+            f'/api/v1/titles/{self.title.pk}/reviews/{self.review.pk}/',
+            f'/api/v1/titles/{self.title.pk}/reviews/{self.review.pk}'
+            f'/comments/',
+        )
+        for url in urls:
+            etag = self.client.get(url)['ETag']
+            self.assertNotModified(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_last_modified(self):
+        url = f'/api/v1/titles/{self.title.pk}/'
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertNotModified(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+    def test_changes_replace_etag(self):
+        title_url = f'/api/v1/titles/{self.title.pk}/'
+        reviews_url = f'{title_url}reviews/'
+        comments_url = f'{reviews_url}{self.review.pk}/comments/'
+        before = {url: self.client.get(url)['ETag']
+                  for url in (title_url, reviews_url, comments_url)}
+        models.Comment.objects.create(review=self.review, author=self.user,
+                                      text='Комментарий')
+        self.assertEqual(self.client.get(title_url)['ETag'],
+                         before[title_url])
+        for url in (reviews_url, comments_url):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=before[url])
+            self.assertEqual(response.status_code, 200, url)
+
+        self.category.name = 'Кино'
+        # Кэш ответов сбрасывается после коммита.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.save()
+        response = self.client.get(title_url,
+                                   HTTP_IF_NONE_MATCH=before[title_url])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['category']['name'], 'Кино')
+
+    def test_username_replaces_etag(self):
+        commenter = User.objects.create(username='commenter',
+                                        email='commenter@example.com')
+        models.Comment.objects.create(review=self.review, author=commenter,
+                                      text='Комментарий')
+        reviews_url = f'/api/v1/titles/{self.title.pk}/reviews/'
+        comments_url = f'{reviews_url}{self.review.pk}/comments/'
+        for user, url in ((self.user, reviews_url),
+                          (commenter, comments_url)):
+            etag = self.client.get(url)['ETag']
+            user.username = f'{user.username}-renamed'
+            user.save()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(response.data['results'][0]['author'],
+                             user.username)
+
+    def test_title_list_etag_follows_other_processes(self):
+        url = '/api/v1/titles/'
+        etag = self.client.get(url)['ETag']
+        # Запись другого процесса: сигналы и сброс кэша были не здесь.
+        models.Title.objects.filter(pk=self.title.pk).update(
+            name='Побег из Шоушенка', updated_at=timezone.now()
+        )
+        # Проверяется валидатор, а не кэш ответов этого процесса.
+        get_cache().clear()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_title_list_etag_from_shared_cache(self):
+        url = '/api/v1/titles/'
+        with mock.patch('api.views.is_shared', return_value=True):
+            etag = self.client.get(url)['ETag']
+            # Общий кэш: версия группы вместо запроса к базе.
+            self.assertNotModified(url, 0, HTTP_IF_NONE_MATCH=etag)
+            with self.captureOnCommitCallbacks(execute=True):
+                models.Title.objects.create(name='Сталкер', year=1979)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data['count']),
+                         (200, 2))
@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from rest_framework.test import APITestCase
+
+from reviews import models
+from users.models import User
+
+
+class ExportTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin',
+                                        email='admin@example.com',
+                                        role=User.ADMIN)
+        category = models.Category.objects.create(name='Фильм', slug='film')
+        genre = models.Genre.objects.create(name='Драма', slug='drama')
+        cls.title = models.Title.objects.create(name='Побег', year=1994,
+                                                category=category)
+        cls.title.genre.set([genre])
+        models.Review.objects.create(title=cls.title, author=cls.admin,
+                                     text='Да, "это" шедевр\nправда', score=9)
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def get_content(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_titles_ndjson(self):
+        lines = self.get_content('/api/v1/export/titles/').splitlines()
+        self.assertEqual(json.loads(lines[0]), {
+            'id': self.title.pk, 'name': 'Побег', 'year': 1994,
+            'rating': 9.0, 'description': '',
+            'genre': [{'name': 'Драма', 'slug': 'drama'}],
+            'category': {'name': 'Фильм', 'slug': 'film'},
+        })
+
+    def test_reviews_csv_matches_fill_db_layout(self):
+        content = self.get_content('/api/v1/export/reviews/?output=csv')
+        header, row = content.split('\r\n', 1)
+        self.assertEqual(header, 'id,title_id,text,author,score,pub_date')
+        self.assertIn('"Да, ""это"" шедевр\nправда"', row)
+
+    def test_admin_only(self):
+        self.client.force_authenticate(
+            User.objects.create(username='reader', email='r@example.com')
+        )
+        response = self.client.get('/api/v1/export/titles/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_unknown_dataset(self):
+        response = self.client.get('/api/v1/export/secrets/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_command_stdout(self):
+        stdout = StringIO()
+        call_command('export_data', 'reviews', stdout=stdout)
+        header, row = stdout.getvalue().split('\r\n', 1)
+        self.assertEqual(header, 'id,title_id,text,author,score,pub_date')
+        self.assertIn('"Да, ""это"" шедевр\nправда"', row)
+        self.assertTrue(row.endswith('\r\n'))
+
+    def test_command_dir(self):
+        stdout, stderr = StringIO(), StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            call_command('export_data', 'titles', 'genres', '--dir',
+                         directory, '--output', 'ndjson', stdout=stdout,
+                         stderr=stderr)
+            self.assertEqual(sorted(os.listdir(directory)),
+                             ['genres.ndjson', 'titles.ndjson'])
+        self.assertEqual(stdout.getvalue(), '')
+        self.assertIn('titles exported to', stderr.getvalue())
+
+    def test_command_unknown_dataset(self):
+        with self.assertRaisesMessage(CommandError, 'secrets'):
+            call_command('export_data', 'titles', 'secrets',
+                         stdout=StringIO())
@@ -0,0 +1,104 @@
+import datetime as dt
+from decimal import Decimal
+
+from django.test import override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from api.cache import get_cache
+from api.renderers import FastJSONRenderer
+from reviews import models
+from users.models import User
+
+
+class FastReadTests(APITestCase):
+    """Быстрое чтение отдаёт те же байты, что и сериализаторы DRF."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='читатель',
+                                       email='reader@example.com')
+        other = User.objects.create(username='critic',
+                                    email='critic@example.com')
+        category = models.Category.objects.create(name='Фильм', slug='film')
+        drama = models.Genre.objects.create(name='Драма', slug='drama')
+        comedy = models.Genre.objects.create(name='Комедия', slug='comedy')
+        cls.title = models.Title.objects.create(
+            name='Побег из Шоушенка', year=1994, category=category,
+            description='«Кавычки», "escape" \\ и  '
+        )
+        # Жанры добавлены не в порядке id.
+        cls.title.genre.add(comedy, drama)
+        untitled = models.Title.objects.create(name='Без категории',
+                                               year=-300)
+        untitled.genre.add(drama)
+        cls.review = models.Review.objects.create(
+            title=cls.title, author=cls.user, text='Отзыв\n\tс 😀', score=7
+        )
+        models.Review.objects.create(title=cls.title, author=other,
+                                     text='Второй', score=8)
+        models.Review.objects.filter(pk=cls.review.pk).update(
+            pub_date=timezone.now().replace(microsecond=123456)
+        )
+        models.Comment.objects.create(review=cls.review, author=other,
+                                      text='Комментарий')
+        models.Comment.objects.filter(review=cls.review).update(
+            pub_date=timezone.now().replace(microsecond=0)
+        )
+
+    def get(self, url, fast):
+        get_cache().clear()
+        with override_settings(FAST_READ_SERIALIZERS=fast):
+            return self.client.get(url)
+
+    def assertSameBytes(self, url):
+        expected = self.get(url, fast=False)
+        response = self.get(url, fast=True)
+        self.assertEqual(response.status_code, expected.status_code, url)
+        self.assertEqual(response.content, expected.content, url)
+        return response
+
+    def test_titles(self):
+        title = f'/api/v1/titles/{self.title.pk}/'
+        for url in ('/api/v1/titles/', '/api/v1/titles/?limit=1&offset=1',
+                    '/api/v1/titles/?genre=drama', '/api/v1/titles/?year=1994',
+                    '/api/v1/titles/?ordering=-rating', title,
+                    f'{title}?genre=comedy', f'{title}?genre=unknown',
+                    '/api/v1/titles/0/'):
+            self.assertSameBytes(url)
+
+    def test_reviews_and_comments(self):
+        reviews = f'/api/v1/titles/{self.title.pk}/reviews/'
+        comments = f'{reviews}{self.review.pk}/comments/'
+        response = self.assertSameBytes(f'{reviews}?pagination=cursor'
+                                        f'&limit=1')
+        self.assertSameBytes(response.data['next'])
+        for url in (reviews, f'{reviews}{self.review.pk}/', f'{reviews}0/',
+                    comments, f'{comments}?pagination=cursor',
+                    f'{comments}{self.review.comments.get().pk}/',
+                    '/api/v1/titles/0/reviews/'):
+            self.assertSameBytes(url)
+
+    def test_renderer_matches_json_renderer(self):
+        data = {
+            'text': 'a b c "d" \\ ё 😀',
+            'lazy': gettext_lazy('Отзыв'),
+            'numbers': [0, -1, 2 ** 63 - 1, 0.1, 7.5, 1 / 3, None, True,
+                        1e-4, 9999999999999998.0],
+            # Все рейтинги, возможные при числе отзывов до 50.
+            'ratings': [total / count for count in range(1, 51)
+                        for total in range(count, 10 * count + 1)],
+            'dates': [timezone.now(), dt.date(2020, 1, 2), dt.time(3, 4, 5)],
+            'decimal': Decimal('1.50'),
+            1: 'key',
+        }
+        for value in (data, [data], 'строка', 2 ** 70):
+            self.assertEqual(FastJSONRenderer().render(value),
+                             JSONRenderer().render(value))
+        context = {'indent': 2}
+        self.assertEqual(
+            FastJSONRenderer().render(data, renderer_context=context),
+            JSONRenderer().render(data, renderer_context=context)
+        )
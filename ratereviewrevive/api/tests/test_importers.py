@@ -0,0 +1,119 @@
+import csv
+import os
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+
+from api.cache import get_cache
+from rankings.models import TitleRanking
+from recommendations.models import SimilarTitle
+from reviews import models
+from reviews.importers import BulkImporter, truncate
+from reviews.parallel_import import Checkpoint, read_chunk, split_csv
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+
+
+def csv_rows(file):
+    with open(os.path.join(DATA_DIR, file), encoding='utf-8',
+              newline='') as f:
+        return list(csv.DictReader(f))
+
+
+class BulkImportTests(APITestCase):
+
+    def setUp(self):
+        get_cache().clear()
+
+    def fill_db(self):
+        out = StringIO()
+        call_command('fill_db', '--bulk', '--batch-size', '7', stdout=out)
+        return {line.split()[1]: int(line.split()[3])
+                for line in out.getvalue().splitlines()
+                if line.startswith('import ')}
+
+    def test_written_rows(self):
+        written = self.fill_db()
+        self.assertEqual(written['review.csv'], len(csv_rows('review.csv')))
+        self.assertEqual(models.Review.objects.count(),
+                         written['review.csv'])
+        # Повторная загрузка ничего не вставляет и так и сообщает.
+        self.assertEqual(set(self.fill_db().values()), {0})
+
+    def test_pub_date_from_csv(self):
+        self.fill_db()
+        row = csv_rows('review.csv')[0]
+        self.assertEqual(
+            models.Review.objects.get(pk=row['id']).pub_date,
+            datetime.fromisoformat(row['pub_date'].replace('Z', ''))
+            .replace(tzinfo=timezone.utc)
+        )
+        # Обычное создание по-прежнему ставит текущую дату.
+        title = models.Title.objects.first()
+        review = models.Review.objects.create(
+            title=title, author_id=csv_rows('users.csv')[-1]['id'],
+            text='Отзыв', score=5
+        )
+        self.assertGreater(review.pub_date, datetime(2023, 1, 1,
+                                                     tzinfo=timezone.utc))
+
+    def test_unknown_references_are_skipped(self):
+        importer = BulkImporter()
+        written = importer.load_rows('review.csv', csv_rows('review.csv'))
+        self.assertEqual(written, 0)
+        self.assertEqual(importer.skipped, len(csv_rows('review.csv')))
+
+    def test_truncate_resets_cache(self):
+        self.fill_db()
+        self.assertGreater(self.client.get('/api/v1/titles/').data['count'],
+                           0)
+        truncate()
+        self.assertEqual(self.client.get('/api/v1/titles/').data['count'], 0)
+
+    def test_truncate_after_import(self):
+        self.fill_db()
+        self.assertTrue(TitleRanking.objects.exists())
+        first, second = models.Title.objects.all()[:2]
+        SimilarTitle.objects.create(title=first, similar=second, score=0.5,
+                                    co_reviews=3)
+        truncate()
+        # Внешние ключи SQLite проверяются при коммите, в тесте — явно.
+        connection.check_constraints()
+        for model in (models.Title, TitleRanking, SimilarTitle):
+            self.assertFalse(model.objects.exists(), model.__name__)
+        self.fill_db()
+        self.assertTrue(TitleRanking.objects.exists())
+
+
+class ParallelImportTests(SimpleTestCase):
+
+    def test_chunks_cover_file(self):
+        # В отзывах есть многострочные значения в кавычках.
+        path = os.path.join(DATA_DIR, 'review.csv')
+        chunks = split_csv(path, 2)
+        self.assertEqual(len(chunks), (len(csv_rows('review.csv')) + 1) // 2)
+        rows = [row for start, stop in chunks
+                for row in read_chunk(path, start, stop)]
+        self.assertEqual(rows, csv_rows('review.csv'))
+
+    def test_checkpoint_resumes(self):
+        path = os.path.join(DATA_DIR, 'review.csv')
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint_path = os.path.join(directory, 'checkpoint.json')
+            state = Checkpoint(checkpoint_path).file_state('review.csv',
+                                                           path, 2)
+            checkpoint = Checkpoint(checkpoint_path)
+            checkpoint.mark_done('review.csv', state['chunks'][0][0])
+            resumed = Checkpoint(checkpoint_path).file_state('review.csv',
+                                                             path, 2)
+            self.assertEqual(resumed['chunks'],
+                             [list(chunk) for chunk in state['chunks']])
+            self.assertEqual(resumed['done'], [state['chunks'][0][0]])
+            checkpoint.remove()
+            self.assertFalse(os.path.exists(checkpoint_path))
@@ -0,0 +1,156 @@
+import json
+import os
+import re
+import tempfile
+
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from rest_framework.test import APITestCase
+
+from api import metrics
+from api.cache import get_cache
+from api.middleware import PerformanceMiddleware
+from reviews import models
+from users.models import User
+
+URL = '/api/v1/metrics/'
+SAMPLE = re.compile(r'^[a-z_]+(\{[a-z]+="[^"]*"(,[a-z]+="[^"]*")*\})? '
+                    r'[0-9.e+-]+$')
+
+
+def monitoring(**overrides):
+    return override_settings(PERFORMANCE_MONITORING={
+        **metrics.DEFAULTS, **overrides
+    })
+
+
+class MetricsTests(APITestCase):
+    """PerformanceMiddleware, хранилище маршрутов и /api/v1/metrics/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin',
+                                        email='admin@example.com',
+                                        role=User.ADMIN)
+        cls.user = User.objects.create(username='reader',
+                                       email='reader@example.com')
+        models.Category.objects.create(name='Книги', slug='books')
+
+    def setUp(self):
+        get_cache().clear()
+        metrics.store.clear()
+
+    def samples(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(URL)
+        self.client.force_authenticate(None)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode().splitlines()
+
+    def value(self, lines, name):
+        for line in lines:
+            if line.startswith(name + ' '):
+                return float(line.rsplit(' ', 1)[1])
+        self.fail(f'{name} не найдена')
+
+    def test_admin_only(self):
+        self.assertEqual(self.client.get(URL).status_code, 401)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(URL).status_code, 403)
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'],
+                         'text/plain; version=0.0.4')
+
+    def test_prometheus_format(self):
+        for _ in range(2):
+            self.client.get('/api/v1/categories/')
+        lines = self.samples()
+        declared = set()
+        for line in lines:
+            if line.startswith('# HELP '):
+                declared.add(line.split()[2])
+            elif line.startswith('# TYPE '):
+                _, _, name, kind = line.split()
+                self.assertIn(name, declared)
+                self.assertIn(kind, ('counter', 'histogram'))
+            else:
+                self.assertRegex(line, SAMPLE)
+                self.assertIn(re.sub(r'_(bucket|sum|count)$', '',
+                                     line.split('{')[0]), declared)
+        route = '{route="categories-list"}'
+        self.assertEqual(self.value(lines, f'api_requests_total{route}'), 2)
+        self.assertGreater(
+            self.value(lines, f'api_response_bytes_total{route}'), 0
+        )
+        name = 'api_request_duration_seconds'
+        buckets = [float(line.rsplit(' ', 1)[1]) for line in lines
+                   if line.startswith(f'{name}_bucket{{route='
+                                      f'"categories-list"')]
+        self.assertEqual(len(buckets), len(metrics.BUCKETS) + 1)
+        self.assertEqual(buckets, sorted(buckets))
+        self.assertEqual(buckets[-1], 2)
+        self.assertEqual(self.value(lines, f'{name}_count{route}'), 2)
+
+    def test_label_escaping(self):
+        self.assertEqual(metrics._escape('a"b\\c\nd'), 'a\\"b\\\\c\\nd')
+
+    def test_duplicate_queries(self):
+        def view(request):
+            for pk in (1, 1, 2):
+                list(User.objects.filter(pk=pk))
+            models.Category.objects.count()
+            return HttpResponse('ok')
+
+        PerformanceMiddleware(view)(RequestFactory().get('/'))
+        stats = dict(metrics.store.snapshot())['unresolved']
+        self.assertEqual(stats['queries'], 4)
+        # Повтор с теми же параметрами — дубль, с другими — похожий.
+        self.assertEqual(stats['duplicate_queries'], 1)
+        self.assertEqual(stats['similar_queries'], 2)
+
+    def test_slow_request_log(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'logs', 'slow.log')
+            with monitoring(SLOW_REQUEST_MS=0, SLOW_LOG_SAMPLE_RATE=1,
+                            SLOW_LOG_PATH=path):
+                self.client.get('/api/v1/categories/?search=books')
+            with open(path, encoding='utf-8') as f:
+                entries = [json.loads(line) for line in f]
+        self.assertEqual(len(entries), 1)
+        entry = entries[0]
+        self.assertEqual(entry['route'], 'categories-list')
+        self.assertEqual(entry['method'], 'GET')
+        self.assertEqual(entry['path'], '/api/v1/categories/?search=books')
+        self.assertTrue(entry['queries'])
+        self.assertEqual({'sql', 'ms'}, set(entry['queries'][0]))
+        stats = dict(metrics.store.snapshot())['categories-list']
+        self.assertEqual(stats['slow_requests'], 1)
+
+    def test_slow_log_sampling(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'slow.log')
+            with monitoring(SLOW_REQUEST_MS=0, SLOW_LOG_SAMPLE_RATE=0,
+                            SLOW_LOG_PATH=path):
+                self.client.get('/api/v1/categories/')
+            self.assertFalse(os.path.exists(path))
+            with monitoring(SLOW_REQUEST_MS=60_000, SLOW_LOG_SAMPLE_RATE=1,
+                            SLOW_LOG_PATH=path):
+                self.client.get('/api/v1/categories/')
+            self.assertFalse(os.path.exists(path))
+        stats = dict(metrics.store.snapshot())['categories-list']
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['slow_requests'], 1)
+
+    def test_routes_are_bounded(self):
+        with monitoring(MAX_ROUTES=1):
+            self.client.get('/api/v1/categories/')
+            self.client.get('/api/v1/genres/')
+        self.assertEqual([route for route, _ in metrics.store.snapshot()],
+                         ['genres-list'])
+
+    def test_disabled(self):
+        with monitoring(ENABLED=False):
+            self.client.get('/api/v1/categories/')
+        self.assertEqual(metrics.store.snapshot(), [])
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from users import outbox
+from users.models import OutgoingEmail
+
+OUTBOX = {'MAX_ATTEMPTS': 3, 'BACKOFF_SECONDS': 30,
+          'MAX_BACKOFF_SECONDS': 45}
+
+
+@override_settings(EMAIL_OUTBOX=OUTBOX)
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        self.email = outbox.enqueue_email('user@example.com', 'Код', '123')
+
+    def fail_sending(self):
+        return mock.patch.object(mail.EmailMessage, 'send',
+                                 side_effect=ConnectionError('smtp down'))
+
+    def make_due(self):
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+
+    def test_sent(self):
+        self.assertEqual(outbox.process_outbox(), (1, 0, 0))
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, OutgoingEmail.SENT)
+        self.assertIsNotNone(self.email.sent_at)
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
+        self.assertEqual(outbox.process_outbox(), (0, 0, 0))
+
+    def test_retry_with_backoff(self):
+        delays = []
+        for _ in range(2):
+            self.make_due()
+            started = timezone.now()
+            with self.fail_sending():
+                self.assertEqual(outbox.process_outbox(), (0, 1, 0))
+            self.email.refresh_from_db()
+            delays.append(self.email.next_attempt_at - started)
+            # До срока повтора письмо не берётся.
+            self.assertEqual(outbox.process_outbox(), (0, 0, 0))
+        self.assertEqual(self.email.status, OutgoingEmail.PENDING)
+        self.assertEqual(self.email.attempts, 2)
+        self.assertIn('smtp down', self.email.last_error)
+        # 30 с, затем 60 с, урезанные до MAX_BACKOFF_SECONDS.
+        self.assertAlmostEqual(delays[0].total_seconds(), 30, delta=1)
+        self.assertAlmostEqual(delays[1].total_seconds(), 45, delta=1)
+
+    def test_dead_letter(self):
+        for expected in ((0, 1, 0), (0, 1, 0), (0, 0, 1)):
+            self.make_due()
+            with self.fail_sending():
+                self.assertEqual(outbox.process_outbox(), expected)
+        self.make_due()
+        self.assertEqual(outbox.process_outbox(), (0, 0, 0))
+        self.email.refresh_from_db()
+        self.assertEqual((self.email.status, self.email.attempts),
+                         (OutgoingEmail.DEAD, 3))
+
+    def test_connection_failure_retries_batch(self):
+        outbox.enqueue_email('other@example.com', 'Код', '456')
+        with mock.patch.object(mail.get_connection().__class__, 'open',
+                               side_effect=OSError('refused')):
+            self.assertEqual(outbox.process_outbox(), (0, 2, 0))
+        self.assertEqual(mail.outbox, [])
+
+    def test_prune_sent(self):
+        now = timezone.now()
+        outbox.process_outbox()
+        old = outbox.enqueue_email('old@example.com', 'Код', '1')
+        OutgoingEmail.objects.filter(pk=old.pk).update(
+            status=OutgoingEmail.SENT, sent_at=now - timedelta(days=8)
+        )
+        dead = outbox.enqueue_email('dead@example.com', 'Код', '2')
+        OutgoingEmail.objects.filter(pk=dead.pk).update(
+            status=OutgoingEmail.DEAD, created_at=now - timedelta(days=30)
+        )
+        call_command('prune_outbox', stdout=StringIO())
+        self.assertEqual(
+            set(OutgoingEmail.objects.values_list('pk', flat=True)),
+            {self.email.pk, dead.pk}
+        )
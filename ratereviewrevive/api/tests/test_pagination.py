@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from api.cache import get_cache
+from reviews import models
+from users.models import User
+
+COMMENTS_COUNT = 8
+
+
+class KeysetPaginationTests(APITestCase):
+    """Курсоры next/previous, одинаковые pub_date и выбор режима."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='reader',
+                                       email='reader@example.com')
+        category = models.Category.objects.create(name='Книги', slug='books')
+        title = models.Title.objects.create(name='Произведение', year=2000,
+                                            category=category)
+        review = models.Review.objects.create(title=title, author=cls.user,
+                                              text='Отзыв', score=8)
+        comments = [
+            models.Comment.objects.create(review=review, author=cls.user,
+                                          text=f'Комментарий {i}')
+            for i in range(COMMENTS_COUNT)
+        ]
+        # Пары комментариев с одинаковой датой: порядок задаёт id.
+        now = timezone.now()
+        for i, comment in enumerate(comments):
+            models.Comment.objects.filter(pk=comment.pk).update(
+                pub_date=now - timedelta(minutes=COMMENTS_COUNT - i // 2)
+            )
+        cls.url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        cls.expected = list(
+            models.Comment.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+
+    def setUp(self):
+        get_cache().clear()
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response.json()
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            page = self.get(url)
+            pages.append([item['id'] for item in page['results']])
+            url = page[link]
+        return pages
+
+    def test_ties_ordered_by_id(self):
+        ids = [item['id'] for item in
+               self.get(f'{self.url}?pagination=cursor&limit=100')['results']]
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(len(set(ids)), COMMENTS_COUNT)
+
+    def test_next_walks_every_page(self):
+        pages = self.walk(f'{self.url}?pagination=cursor&limit=3', 'next')
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+        self.assertEqual(sum(pages, []), self.expected)
+
+    def test_previous_walks_back(self):
+        first = self.get(f'{self.url}?pagination=cursor&limit=3')
+        self.assertIsNone(first['previous'])
+        second = self.get(first['next'])
+        last = self.get(second['next'])
+        self.assertIsNone(last['next'])
+        pages = self.walk(last['previous'], 'previous')
+        self.assertEqual(sum(reversed(pages), []), self.expected[:6])
+        # Назад со второй страницы — ровно первая страница.
+        self.assertEqual(self.get(second['previous'])['results'],
+                         first['results'])
+
+    def test_malformed_cursor(self):
+        for cursor in ('garbage', 'bm90LWEtZGF0ZXwxfDA=', '%%%'):
+            response = self.client.get(f'{self.url}?cursor={cursor}')
+            self.assertEqual(response.status_code, 404, cursor)
+
+    def test_mode_switch(self):
+        offset = self.get(f'{self.url}?limit=3')
+        self.assertEqual(offset['count'], COMMENTS_COUNT)
+        self.assertEqual(
+            self.get(f'{self.url}?pagination=offset&limit=3')['results'],
+            offset['results']
+        )
+        cursor = self.get(f'{self.url}?pagination=cursor&limit=3')
+        self.assertNotIn('count', cursor)
+        self.assertIn('cursor=', cursor['next'])
+        # Курсор в запросе включает режим по ключу и без ?pagination=.
+        self.assertNotIn('count', self.get(cursor['next']))
+        # Неизвестный режим — режим вьюсета по умолчанию.
+        self.assertIn('count', self.get(f'{self.url}?pagination=pages'))
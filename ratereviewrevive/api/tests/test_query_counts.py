@@ -0,0 +1,117 @@
+from rest_framework.test import APITestCase
+
+from api.cache import get_cache
+from reviews import models
+from users.models import User
+
+TITLES_COUNT = 12
+
+
+class QueryCountTests(APITestCase):
+    """Число запросов к базе на каждый эндпоинт api/urls.py.
+
+    Ожидаемые значения не должны зависеть от размера страницы: рост
+    числа запросов вместе с limit означает N+1. Первый запрос списков
+    и деталей произведений, отзывов и комментариев — версия для ETag.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin',
+                                        email='admin@example.com',
+                                        role=User.ADMIN)
+        cls.user = User.objects.create(username='reader',
+                                       email='reader@example.com')
+        categories = [
+            models.Category.objects.create(name=f'Категория {i}',
+                                           slug=f'category-{i}')
+            for i in range(3)
+        ]
+        genres = [
+            models.Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+            for i in range(4)
+        ]
+        for i in range(TITLES_COUNT):
+            title = models.Title.objects.create(
+                name=f'Произведение {i}', year=2000 + i,
+                category=categories[i % len(categories)]
+            )
+            title.genre.set(genres[:i % len(genres) + 1])
+        cls.title = models.Title.objects.first()
+        cls.review = models.Review.objects.create(
+            title=cls.title, author=cls.user, text='Отзыв', score=8
+        )
+        models.Review.objects.create(title=cls.title, author=cls.admin,
+                                     text='Ещё отзыв', score=6)
+        for author in (cls.user, cls.admin, cls.user):
+            models.Comment.objects.create(review=cls.review, author=author,
+                                          text='Комментарий')
+
+    def setUp(self):
+        get_cache().clear()
+        self.client.force_authenticate(self.admin)
+
+    def assertGetQueries(self, url, expected):
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response
+
+    def test_titles(self):
+        for limit in (1, TITLES_COUNT):
+            get_cache().clear()
+            self.assertGetQueries(f'/api/v1/titles/?limit={limit}', 4)
+        self.assertGetQueries(f'/api/v1/titles/{self.title.id}/', 3)
+
+    def test_titles_filtered(self):
+        self.assertGetQueries('/api/v1/titles/?genre=genre-0&limit=5', 4)
+
+    def test_reviews(self):
+        self.assertGetQueries(f'/api/v1/titles/{self.title.id}/reviews/', 3)
+        self.assertGetQueries(
+            f'/api/v1/titles/{self.title.id}/reviews/{self.review.id}/', 2
+        )
+
+    def test_reviews_cursor_page(self):
+        self.assertGetQueries(
+            f'/api/v1/titles/{self.title.id}/reviews/?pagination=cursor', 2
+        )
+
+    def test_create_review(self):
+        title = models.Title.objects.last()
+        self.client.force_authenticate(self.user)
+        # Проверка произведения и повтора; в точке сохранения вставка,
+        # пересчёт рейтинга, запись в поисковый индекс и ленту изменений,
+        # место в таблицах лидеров (агрегаты, UPDATE, вставка строк).
+        with self.assertNumQueries(10):
+            response = self.client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                {'text': 'Новый отзыв', 'score': 5}
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_comments(self):
+        url = (f'/api/v1/titles/{self.title.id}/reviews/'
+               f'{self.review.id}/comments/')
+        self.assertGetQueries(url, 3)
+        comment = self.review.comments.first()
+        self.assertGetQueries(f'{url}{comment.id}/', 2)
+
+    def test_missing_parent(self):
+        other_title = models.Title.objects.last()
+        for url in (f'/api/v1/titles/{other_title.id + 1}/reviews/',
+                    f'/api/v1/titles/{other_title.id}/reviews/'
+                    f'{self.review.id}/comments/'):
+            # Версия для ETag не нашлась: родителя нет, дальше не идём.
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 404, url)
+
+    def test_categories_and_genres(self):
+        self.assertGetQueries('/api/v1/categories/', 2)
+        self.assertGetQueries('/api/v1/genres/', 2)
+
+    def test_users(self):
+        self.assertGetQueries('/api/v1/users/', 2)
+        self.assertGetQueries(f'/api/v1/users/{self.user.username}/', 1)
+        self.assertGetQueries('/api/v1/users/me/', 1)
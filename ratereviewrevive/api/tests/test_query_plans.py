@@ -0,0 +1,116 @@
+import re
+from unittest import skipUnless
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from api.benchmark import fill_template
+from api.cache import get_cache
+from api.management.commands.benchmark_api import READ_ROUTES, WRITE_ROUTES
+from reviews import models
+from users.models import User
+
+# Маршруты сверх таблиц benchmark_api.
+EXTRA_ROUTES = (
+    ('titles-by-year', 'get', '/api/v1/titles/?year_min=1990&year_max=2000',
+     False, None),
+    ('rankings', 'get', '/api/v1/rankings/?genre={genre}', False, None),
+    ('comments-delete', 'delete',
+     '/api/v1/titles/{title}/reviews/{review}/comments/{comment}/',
+     True, None),
+    ('reviews-delete', 'delete', '/api/v1/titles/{title}/reviews/{review}/',
+     True, None),
+)
+# Полный проход таблицы отзывов или комментариев, в том числе по индексу.
+FULL_SCAN = re.compile(r'^SCAN (reviews_review|reviews_comment)\b')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN — SQLite')
+class QueryPlanTests(APITestCase):
+    """Ни один запрос эндпоинтов не читает отзывы и комментарии целиком."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin',
+                                        email='admin@example.com',
+                                        role=User.ADMIN)
+        cls.reviewer = User.objects.create(username='reviewer',
+                                           email='reviewer@example.com')
+        category = models.Category.objects.create(name='Фильм', slug='film')
+        genre = models.Genre.objects.create(name='Драма', slug='drama')
+        title = models.Title.objects.create(name='Побег', year=1994,
+                                            category=category)
+        title.genre.add(genre)
+        review = models.Review.objects.create(title=title, author=cls.admin,
+                                              text='Отзыв', score=8)
+        comment = models.Comment.objects.create(review=review,
+                                                author=cls.admin,
+                                                text='Комментарий')
+        cls.values = {
+            'title': title.pk, 'review': review.pk, 'comment': comment.pk,
+            'genre': genre.slug, 'category': category.slug,
+            'word': 'Побег', 'username': cls.admin.username,
+        }
+
+    def setUp(self):
+        get_cache().clear()
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_no_full_scans(self):
+        full_scans = []
+        for name, method, template, needs_admin, data in (
+                READ_ROUTES + WRITE_ROUTES + EXTRA_ROUTES):
+            self.client.force_authenticate(
+                self.admin if needs_admin else self.reviewer
+            )
+            data = fill_template(data, self.values)
+            with CaptureQueriesContext(connection) as captured:
+                response = getattr(self.client, method)(
+                    template.format(**self.values), data, format='json'
+                )
+            self.assertLess(response.status_code, 400, name)
+            for query in captured.captured_queries:
+                if not query['sql'].startswith(('SELECT', 'UPDATE',
+                                                'DELETE')):
+                    continue
+                full_scans.extend(
+                    (name, detail, query['sql'])
+                    for detail in self.query_plan(query['sql'])
+                    if FULL_SCAN.match(detail)
+                )
+        self.assertEqual(full_scans, [])
+
+    def test_keyset_pages_use_composite_indexes(self):
+        reviews = (f'/api/v1/titles/{self.values["title"]}/reviews/'
+                   f'?pagination=cursor')
+        comments = (f'/api/v1/titles/{self.values["title"]}/reviews/'
+                    f'{self.values["review"]}/comments/?pagination=cursor')
+        for url, index in ((reviews, 'review_title_pub_date_idx'),
+                           (comments, 'comment_review_pub_date_idx')):
+            with CaptureQueriesContext(connection) as captured:
+                self.client.get(url)
+            page_sql = next(query['sql']
+                            for query in captured.captured_queries
+                            if '"pub_date" DESC' in query['sql'])
+            plan = ' '.join(self.query_plan(page_sql))
+            # Страница читается по индексу в нужном порядке, без сортировки.
+            self.assertIn(index, plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_year_filters_use_index(self):
+        for params, count in (('year=1994', 1), ('year_min=1994', 1),
+                              ('year_max=1993', 0),
+                              ('year_min=1990&year_max=2000', 1)):
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.get(f'/api/v1/titles/?{params}')
+            self.assertEqual(response.data['count'], count, params)
+            count_sql = next(query['sql']
+                             for query in captured.captured_queries
+                             if '"__count"' in query['sql'])
+            self.assertIn('title_year_idx',
+                          ' '.join(self.query_plan(count_sql)), params)
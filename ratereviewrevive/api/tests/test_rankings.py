@@ -0,0 +1,71 @@
+from rest_framework.test import APITestCase
+
+from rankings import leaderboard
+from rankings.models import TitleRanking
+from reviews import models
+from users.models import User
+
+
+class RankingsTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create(username=f'user{i}',
+                                         email=f'user{i}@example.com')
+                     for i in range(4)]
+        cls.category = models.Category.objects.create(name='Фильм',
+                                                      slug='film')
+        cls.drama = models.Genre.objects.create(name='Драма', slug='drama')
+        cls.comedy = models.Genre.objects.create(name='Комедия',
+                                                 slug='comedy')
+        cls.titles = [models.Title.objects.create(name=f'Произведение {i}',
+                                                  year=2000,
+                                                  category=cls.category)
+                      for i in range(3)]
+        cls.titles[0].genre.set([cls.drama])
+        cls.titles[1].genre.set([cls.drama, cls.comedy])
+
+    def review(self, title, user, score):
+        return models.Review.objects.create(title=title, author=user,
+                                            text='Отзыв', score=score)
+
+    def snapshot(self):
+        return sorted(TitleRanking.objects.values_list(
+            'scope', 'title_id', 'score', 'review_count'
+        ))
+
+    def test_incremental_updates_match_rebuild(self):
+        # Одна десятка против трёх девяток: байесовская оценка ставит
+        # выше произведение с большим числом отзывов.
+        self.review(self.titles[0], self.users[0], 10)
+        for user in self.users[:3]:
+            self.review(self.titles[1], user, 9)
+        moved = self.review(self.titles[2], self.users[3], 2)
+        moved.title = self.titles[0]
+        moved.save()
+        self.titles[2].genre.set([self.comedy])
+        self.titles[1].genre.remove(self.drama)
+        models.Review.objects.filter(author=self.users[2]).delete()
+
+        incremental = self.snapshot()
+        leaderboard.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_endpoint(self):
+        self.review(self.titles[0], self.users[0], 10)
+        for user in self.users[:3]:
+            self.review(self.titles[1], user, 9)
+        # Поиск жанра, места с произведениями и категориями, жанры.
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/v1/rankings/',
+                                       {'genre': 'drama'})
+        self.assertEqual(response.data['scope'],
+                         leaderboard.genre_scope(self.drama.pk))
+        self.assertEqual(
+            [(place['rank'], place['title']['id'])
+             for place in response.data['results']],
+            [(1, self.titles[1].pk), (2, self.titles[0].pk)]
+        )
+        response = self.client.get('/api/v1/rankings/',
+                                   {'by': 'reviews', 'limit': 1})
+        self.assertEqual(response.data['results'][0]['review_count'], 3)
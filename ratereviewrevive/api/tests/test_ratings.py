@@ -0,0 +1,81 @@
+from io import StringIO
+
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+
+from api.cache import get_cache
+from reviews import models
+from users.models import User
+
+
+class RatingAggregateTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = models.Category.objects.create(name='Фильм', slug='film')
+        cls.title = models.Title.objects.create(name='Побег', year=1994,
+                                                category=category)
+        cls.other = models.Title.objects.create(name='Сталкер', year=1979,
+                                                category=category)
+        cls.users = [User.objects.create(username=f'user{i}',
+                                         email=f'user{i}@example.com')
+                     for i in range(3)]
+
+    def setUp(self):
+        get_cache().clear()
+
+    def review(self, user, score, title=None):
+        return models.Review.objects.create(title=title or self.title,
+                                            author=user, text='Отзыв',
+                                            score=score)
+
+    def assertRating(self, title, rating_sum, rating_count, rating):
+        title.refresh_from_db()
+        self.assertEqual((title.rating_sum, title.rating_count, title.rating),
+                         (rating_sum, rating_count, rating))
+
+    def test_create_update_delete(self):
+        first = self.review(self.users[0], 8)
+        self.review(self.users[1], 5)
+        self.assertRating(self.title, 13, 2, 6.5)
+        first.score = 10
+        first.save()
+        self.assertRating(self.title, 15, 2, 7.5)
+        first.delete()
+        self.assertRating(self.title, 5, 1, 5.0)
+        models.Review.objects.filter(title=self.title).delete()
+        self.assertRating(self.title, 0, 0, None)
+
+    def test_review_moves_to_another_title(self):
+        review = self.review(self.users[0], 8)
+        self.review(self.users[1], 4)
+        review.title = self.other
+        review.score = 6
+        review.save()
+        self.assertRating(self.title, 4, 1, 4.0)
+        self.assertRating(self.other, 6, 1, 6.0)
+
+    def test_stale_title_save_keeps_aggregates(self):
+        stale = models.Title.objects.get(pk=self.title.pk)
+        self.review(self.users[0], 9)
+        stale.description = 'Описание'
+        stale.save()
+        self.assertRating(self.title, 9, 1, 9.0)
+
+    def test_recalculate_ratings(self):
+        self.review(self.users[0], 8)
+        self.review(self.users[1], 6)
+        self.review(self.users[2], 3, title=self.other)
+        models.Title.objects.update(rating_sum=0, rating_count=0,
+                                    rating=None)
+        url = f'/api/v1/titles/{self.title.pk}/'
+        self.assertIsNone(self.client.get(url).data['rating'])
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('recalculate_ratings', str(self.title.pk),
+                         stdout=StringIO())
+        self.assertRating(self.title, 14, 2, 7.0)
+        self.assertRating(self.other, 0, 0, None)
+        # Закэшированный ответ со старым рейтингом сброшен.
+        self.assertEqual(self.client.get(url).data['rating'], 7.0)
+        call_command('recalculate_ratings', stdout=StringIO())
+        self.assertRating(self.other, 3, 1, 3.0)
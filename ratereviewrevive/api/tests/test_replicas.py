@@ -0,0 +1,162 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connections
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from api.authentication import token_for_user, user_cache
+from api.cache import get_cache
+from api.middleware import PIN_COOKIE, PIN_KEY
+from ratereviewrevive.routers import (PrimaryReplicaRouter,
+                                      finish_replica_reads,
+                                      start_replica_reads)
+from reviews import models
+from users.models import User
+
+# Реплика из DB_REPLICAS, иначе вторая база SQLite из settings.py.
+REPLICA = ('replica_1' if 'replica_1' in settings.DATABASES
+           else 'replica_test')
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class RouterTests(SimpleTestCase):
+
+    def test_reads_go_to_replica_only_when_started(self):
+        router = PrimaryReplicaRouter()
+        self.assertEqual(router.db_for_read(models.Title), 'default')
+        token = start_replica_reads()
+        try:
+            self.assertEqual(router.db_for_read(models.Title), 'replica_1')
+            self.assertEqual(router.db_for_write(models.Title), 'default')
+        finally:
+            finish_replica_reads(token)
+        self.assertEqual(router.db_for_read(models.Title), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['default'], REPLICA_PIN_SECONDS=5)
+class ReadYourWritesTests(APITestCase):
+    """Запись оставляет клиента на основной базе: cookie и кэш."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='writer',
+                                       email='writer@example.com')
+        cls.title = models.Title.objects.create(name='Побег', year=1994)
+
+    def setUp(self):
+        get_cache().clear()
+
+    def test_write_pins_client_and_user(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {token_for_user(self.user)}'
+        )
+        response = self.client.get(f'/api/v1/titles/{self.title.pk}/')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertIsNone(get_cache().get(PIN_KEY.format(self.user.pk)))
+
+        response = self.client.post(
+            f'/api/v1/titles/{self.title.pk}/reviews/',
+            {'text': 'Отзыв', 'score': 8}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+        self.assertTrue(get_cache().get(PIN_KEY.format(self.user.pk)))
+
+    def test_malformed_header(self):
+        for header in ('Bearer a b', 'Bearer not-a-token'):
+            response = self.client.get('/api/v1/titles/',
+                                       HTTP_AUTHORIZATION=header)
+            self.assertEqual(response.status_code, 401, header)
+
+    def test_failed_write_does_not_pin(self):
+        response = self.client.post(
+            f'/api/v1/titles/{self.title.pk}/reviews/',
+            {'text': 'Отзыв', 'score': 8}
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+@skipUnless(REPLICA in settings.DATABASES,
+            'нет второй базы: DB_REPLICAS не задан, а база не SQLite')
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTests(APITestCase):
+    """Две базы SQLite: основная и «реплика» с отстающими данными."""
+    # Базы пропущенного класса раннер всё равно собирает.
+    databases = ({'default', REPLICA} if REPLICA in settings.DATABASES
+                 else {'default'})
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='writer',
+                                       email='writer@example.com')
+        cls.title = models.Title.objects.create(name='Основная', year=1994)
+        # Реплика отстаёт: название ещё старое, отзывов нет.
+        User.objects.using(REPLICA).bulk_create([cls.user])
+        models.Title.objects.using(REPLICA).bulk_create([
+            models.Title(pk=cls.title.pk, name='Реплика', year=1994)
+        ])
+
+    def setUp(self):
+        get_cache().clear()
+        user_cache.clear()
+        self.headers = {
+            'HTTP_AUTHORIZATION': f'Bearer {token_for_user(self.user)}'
+        }
+
+    def get(self, url, **headers):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 200)
+        return response, len(primary), len(replica)
+
+    def post_review(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/v1/titles/{self.title.pk}/reviews/',
+                {'text': 'Отзыв', 'score': 8}, **self.headers
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_reads_from_replica(self):
+        response, primary, replica = self.get(
+            f'/api/v1/titles/{self.title.pk}/reviews/'
+        )
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+        # Вьюсеты без read_from_replica читают основную базу.
+        _, primary, replica = self.get('/api/v1/categories/')
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_read_your_writes(self):
+        url = f'/api/v1/titles/{self.title.pk}/reviews/'
+        self.post_review()
+        # Тот же пользователь без cookie — по отметке в кэше.
+        self.client.cookies.clear()
+        response, _, replica = self.get(url, **self.headers)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(replica, 0)
+        # Другой клиент читает реплику, где отзыва ещё нет.
+        response, _, replica = self.get(url)
+        self.assertEqual(response.data['count'], 0)
+        self.assertGreater(replica, 0)
+
+    def test_cache_is_filled_from_primary(self):
+        url = f'/api/v1/titles/{self.title.pk}/'
+        self.post_review()
+        # Первым после записи приходит клиент, читающий реплику.
+        self.client.cookies.clear()
+        response, primary, _ = self.get(url)
+        self.assertEqual((response['X-Cache'], response.data['rating']),
+                         ('MISS', 8))
+        self.assertEqual(response.data['name'], 'Основная')
+        self.assertGreater(primary, 0)
+        # Из кэша и писавший видит свою оценку.
+        response, primary, _ = self.get(url, **self.headers)
+        self.assertEqual((response['X-Cache'], response.data['rating']),
+                         ('HIT', 8))
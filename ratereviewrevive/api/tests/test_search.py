@@ -0,0 +1,131 @@
+from unittest import mock, skipUnless
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from reviews import models
+from search import backends
+from search.tokenizer import normalize, tokenize
+from users.models import User
+
+
+class TokenizerTests(SimpleTestCase):
+
+    def test_cyrillic(self):
+        self.assertEqual(normalize('ЁЛКА Шоушенк'), 'елка шоушенк')
+        self.assertEqual(tokenize('Побег из Шоушенка, 1994!'),
+                         ['побег', 'из', 'шоушенка', '1994'])
+        self.assertEqual(tokenize(None), [])
+
+
+class SearchMixin:
+    """Одни и те же проверки для обоих бэкендов поиска."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(username='author',
+                                     email='author@example.com')
+        cls.title = models.Title.objects.create(
+            name='Побег из Шоушенка', year=1994,
+            description='Тюремная драма'
+        )
+        cls.other = models.Title.objects.create(
+            name='Ёжик в тумане', year=1975,
+            description='Мультфильм о шоушенкской дружбе'
+        )
+        cls.review = models.Review.objects.create(
+            title=cls.other, author=author, score=9,
+            text='Ёжик ищет лошадку в тумане'
+        )
+        cls.comment = models.Comment.objects.create(
+            review=cls.review, author=author, text='Согласен про ТУМАН'
+        )
+
+    def setUp(self):
+        backends._backend = None
+        self.addCleanup(setattr, backends, '_backend', None)
+        backends.get_backend().rebuild()
+
+    def search(self, query, **params):
+        response = self.client.get('/api/v1/search/',
+                                   {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(item['type'], item['id'])
+                for item in response.data['results']]
+
+    def test_case_and_yo(self):
+        for query in ('ЕЖИК', 'ёжик', 'ежик'):
+            self.assertIn(('title', self.other.pk), self.search(query))
+            self.assertIn(('review', self.review.pk), self.search(query))
+
+    def test_prefix(self):
+        # «шоушенк» находит и «Шоушенка», и «шоушенкской».
+        found = self.search('шоушенк')
+        self.assertIn(('title', self.title.pk), found)
+        self.assertIn(('title', self.other.pk), found)
+
+    def test_title_ranks_first(self):
+        # Слово из названия весомее слова из описания.
+        self.assertEqual(self.search('шоушенк')[0], ('title', self.title.pk))
+
+    def test_all_words_match(self):
+        self.assertEqual(self.search('ежик лошадку', type='review'),
+                         [('review', self.review.pk)])
+        self.assertEqual(self.search('ежик шоушенка'), [])
+
+    def test_index_follows_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.comment.text = 'Совсем другой текст'
+            self.comment.save()
+        self.assertEqual(self.search('туман', type='comment'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.review.delete()
+        self.assertEqual(self.search('лошадку'), [])
+
+
+@override_settings(SEARCH_BACKEND='memory')
+class MemorySearchTests(SearchMixin, APITestCase):
+    pass
+
+
+@override_settings(SEARCH_BACKEND='fts5')
+class Fts5SearchTests(SearchMixin, APITestCase):
+
+    def setUp(self):
+        if not backends.fts5_available():
+            self.skipTest('нет SQLite с FTS5')
+        super().setUp()
+
+
+@skipUnless(connection.vendor == 'postgresql', 'нет PostgreSQL')
+@override_settings(SEARCH_BACKEND='postgres')
+class PostgresSearchTests(SearchMixin, APITestCase):
+    pass
+
+
+@override_settings(SEARCH_BACKEND=None)
+class BackendChoiceTests(SimpleTestCase):
+
+    def setUp(self):
+        backends._backend = None
+        self.addCleanup(setattr, backends, '_backend', None)
+        for name in ('fts5_available', 'postgres_available'):
+            patcher = mock.patch.object(backends, name, return_value=False)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_memory_refused_without_debug(self):
+        with self.assertRaises(ImproperlyConfigured):
+            backends.get_backend()
+        self.assertIsNone(backends._backend)
+
+    @override_settings(DEBUG=True)
+    def test_memory_with_debug(self):
+        self.assertIsInstance(backends.get_backend(), backends.MemoryBackend)
+
+    def test_database_index_preferred(self):
+        backends.postgres_available.return_value = True
+        self.assertIsInstance(backends.get_backend(),
+                              backends.PostgresBackend)
@@ -0,0 +1,117 @@
+from unittest import mock, skipUnless
+
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from recommendations import similarity
+from recommendations.models import SimilarityBuild, SimilarTitle
+from reviews import models
+from users.models import User
+
+# Оценки пользователей: первые два произведения им нравятся или не
+# нравятся вместе, третье — наоборот.
+SCORES = {
+    'first': (9, 2, 8, 3),
+    'second': (10, 3, 7, 2),
+    'third': (2, 9, 3, 8),
+}
+
+
+class SimilarTitlesTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = models.Category.objects.create(name='Фильм', slug='film')
+        cls.users = [User.objects.create(username=f'user{i}',
+                                         email=f'user{i}@example.com')
+                     for i in range(4)]
+        cls.titles = {}
+        for year, (name, scores) in enumerate(SCORES.items(), start=2000):
+            title = models.Title.objects.create(name=name, year=year,
+                                                category=category)
+            cls.titles[name] = title
+            for user, score in zip(cls.users, scores):
+                models.Review.objects.create(title=title, author=user,
+                                             text='Отзыв', score=score)
+
+    def neighbours(self, name):
+        return dict(SimilarTitle.objects.filter(
+            title=self.titles[name]
+        ).values_list('similar__name', 'score'))
+
+    @skipUnless(similarity.available(), 'нужны numpy и scipy')
+    def test_adjusted_cosine(self):
+        import numpy as np
+
+        self.assertEqual(similarity.build(), (3, True))
+        self.assertEqual(set(self.neighbours('first')), {'second'})
+        # Отрицательное сходство в соседи не попадает.
+        self.assertEqual(self.neighbours('third'), {})
+        matrix = np.array(list(SCORES.values()), dtype=float)
+        centered = matrix - matrix.mean(axis=0)
+        first, second = centered[0], centered[1]
+        expected = first @ second / (np.linalg.norm(first)
+                                     * np.linalg.norm(second))
+        self.assertAlmostEqual(self.neighbours('first')['second'], expected)
+
+    @skipUnless(similarity.available(), 'нужны numpy и scipy')
+    def test_min_co_reviews(self):
+        with override_settings(SIMILAR_TITLES={'MIN_CO_REVIEWS': 5}):
+            similarity.build()
+        self.assertFalse(SimilarTitle.objects.exists())
+
+    @skipUnless(similarity.available(), 'нужны numpy и scipy')
+    def test_incremental_build(self):
+        similarity.build()
+        kept = SimilarTitle.objects.get(title=self.titles['first'])
+        self.assertEqual(similarity.build(), (0, False))
+        self.assertTrue(SimilarTitle.objects.filter(pk=kept.pk).exists())
+        # Новый отзыв сдвигает updated_at только третьего произведения.
+        models.Review.objects.create(
+            title=self.titles['third'], text='Отзыв', score=1,
+            author=User.objects.create(username='late',
+                                       email='late@example.com')
+        )
+        self.assertEqual(similarity.build(), (1, False))
+        self.assertTrue(SimilarTitle.objects.filter(pk=kept.pk).exists())
+        self.assertEqual(SimilarityBuild.objects.count(), 3)
+
+    @skipUnless(similarity.available(), 'нужны numpy и scipy')
+    def test_incremental_build_adds_new_neighbour(self):
+        similarity.build()
+        fourth = models.Title.objects.create(name='fourth', year=2010)
+        for user, score in zip(self.users, SCORES['first']):
+            models.Review.objects.create(title=fourth, author=user,
+                                         text='Отзыв', score=score)
+        # Первое и второе не менялись, но теперь похожи на четвёртое.
+        self.assertEqual(similarity.build(), (3, False))
+        self.assertIn('fourth', self.neighbours('first'))
+        self.assertIn('fourth', self.neighbours('second'))
+        self.assertNotIn('fourth', self.neighbours('third'))
+
+    def test_command_requires_numpy(self):
+        with mock.patch.object(similarity, 'np', None):
+            with self.assertRaises(CommandError):
+                call_command('build_similar_titles')
+
+    def test_endpoint(self):
+        first = self.titles['first']
+        for name, score in (('second', 0.9), ('third', 0.2)):
+            SimilarTitle.objects.create(title=first, score=score,
+                                        similar=self.titles[name],
+                                        co_reviews=4)
+        url = f'/api/v1/titles/{first.pk}/similar/'
+        # Существование, соседи с категориями, жанры соседей.
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(item['title']['name'], item['score'])
+                          for item in response.data['results']],
+                         [('second', 0.9), ('third', 0.2)])
+        response = self.client.get(f'{url}?limit=1')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(self.client.get(f'{url}?limit=0').status_code, 400)
+        missing = models.Title.objects.order_by('pk').last().pk + 1
+        response = self.client.get(f'/api/v1/titles/{missing}/similar/')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,54 @@
+import threading
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ratereviewrevive.sqlite import WriteQueue, run_write
+
+
+@skipUnless(connection.vendor == 'sqlite', 'профиль только для SQLite')
+class SqliteProfileTests(TestCase):
+
+    def test_pragmas(self):
+        with connection.cursor() as cursor:
+            for pragma, expected in (('synchronous', 1),
+                                     ('busy_timeout', 5000),
+                                     ('cache_size', -64000)):
+                cursor.execute(f'PRAGMA {pragma}')
+                self.assertEqual(cursor.fetchone()[0], expected, pragma)
+
+
+class WriteQueueTests(SimpleTestCase):
+
+    def test_runs_in_single_writer_thread(self):
+        queue = WriteQueue()
+        threads = set()
+
+        def write(value):
+            threads.add(threading.current_thread().name)
+            return value * 2
+
+        results = []
+        workers = [threading.Thread(
+            target=lambda value=value: results.append(queue.submit(write,
+                                                                   value))
+        ) for value in range(10)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(sorted(results), [value * 2 for value in range(10)])
+        self.assertEqual(threads, {'sqlite-writer'})
+
+    def test_exception_is_raised_in_caller(self):
+        queue = WriteQueue()
+        with self.assertRaises(ZeroDivisionError):
+            queue.submit(lambda: 1 / 0)
+        # Поток-писатель пережил ошибку.
+        self.assertEqual(queue.submit(lambda: 'ok'), 'ok')
+
+    @override_settings(SQLITE_PROFILE={'WRITE_QUEUE': False})
+    def test_disabled_queue_runs_inline(self):
+        self.assertEqual(run_write(threading.current_thread),
+                         threading.current_thread())
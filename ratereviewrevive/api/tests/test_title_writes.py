@@ -0,0 +1,184 @@
+import time
+from unittest import mock
+
+from django.db import connection
+from django.db.models.signals import m2m_changed
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from api import slugs
+from api.cache import invalidate
+from api.slugs import SLUG_CACHES, category_ids, genre_ids
+from reviews import models
+from users.models import User
+
+
+class TitleWriteTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin',
+                                        email='admin@example.com',
+                                        role=User.ADMIN)
+        cls.film = models.Category.objects.create(name='Фильм', slug='film')
+        models.Category.objects.create(name='Книга', slug='book')
+        cls.genres = [models.Genre.objects.create(name=name, slug=slug)
+                      for name, slug in (('Драма', 'drama'),
+                                         ('Комедия', 'comedy'),
+                                         ('Ужасы', 'horror'))]
+        cls.title = models.Title.objects.create(name='Побег', year=1994,
+                                                category=cls.film)
+        cls.title.genre.add(*cls.genres[:2])
+
+    def setUp(self):
+        for cache in SLUG_CACHES.values():
+            cache.clear()
+        self.client.force_authenticate(self.admin)
+        self.m2m_actions = []
+        m2m_changed.connect(self.record_m2m,
+                            sender=models.Title.genre.through)
+        self.addCleanup(m2m_changed.disconnect, self.record_m2m,
+                        sender=models.Title.genre.through)
+
+    def record_m2m(self, action, pk_set, **kwargs):
+        if action.startswith('post_'):
+            self.m2m_actions.append((action, pk_set))
+
+    def writes(self, captured, table):
+        return [query['sql'] for query in captured.captured_queries
+                if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+                and f'"{table}"' in query['sql'].split('WHERE')[0]]
+
+    def test_create(self):
+        data = {'name': 'Зелёная миля', 'year': 1999, 'category': 'film',
+                'genre': ['horror', 'drama']}
+        response = self.client.post('/api/v1/titles/', data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['category'],
+                         {'name': 'Фильм', 'slug': 'film'})
+        self.assertEqual([genre['slug'] for genre in response.data['genre']],
+                         ['drama', 'horror'])
+        # Справочники уже в кэше: повторное создание их не читает.
+        data['name'] = 'Форрест Гамп'
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post('/api/v1/titles/', data,
+                                        format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse([query for query in captured.captured_queries
+                          if '"slug" IN' in query['sql']])
+        self.assertEqual(len(self.writes(captured, 'reviews_title')), 1,
+                         'только INSERT, без отметки updated_at')
+
+    def test_unknown_slugs(self):
+        response = self.client.post('/api/v1/titles/', {
+            'name': 'Новое', 'year': 2000, 'category': 'song',
+            'genre': ['drama', 'western']
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('category', response.data)
+        self.assertIn('western', response.data['genre'][0])
+
+    def test_update_saves_once_and_diffs_genres(self):
+        kept = models.Title.genre.through.objects.get(
+            title=self.title, genre=self.genres[0]
+        )
+        url = f'/api/v1/titles/{self.title.pk}/'
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.patch(url, {
+                'description': 'Тюрьма', 'category': 'book',
+                'genre': ['drama', 'horror']
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['category']['slug'], 'book')
+        self.assertEqual([genre['slug'] for genre in response.data['genre']],
+                         ['drama', 'horror'])
+        title_updates = [sql for sql in self.writes(captured, 'reviews_title')
+                         if '"description"' in sql]
+        self.assertEqual(len(title_updates), 1)
+        # Оставшийся жанр не удалялся и не вставлялся заново.
+        self.assertTrue(models.Title.genre.through.objects.filter(
+            pk=kept.pk
+        ).exists())
+        self.assertEqual(self.m2m_actions, [
+            ('post_remove', {self.genres[1].pk}),
+            ('post_add', {self.genres[2].pk}),
+        ])
+
+    def test_partial_update_without_slugs(self):
+        response = self.client.patch(f'/api/v1/titles/{self.title.pk}/',
+                                     {'year': 1995}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['category']['slug'], 'film')
+        self.assertEqual(len(response.data['genre']), 2)
+        self.assertEqual(self.m2m_actions, [])
+
+    def test_slug_cache_follows_changes(self):
+        self.assertEqual(genre_ids.resolve(['drama']),
+                         {'drama': self.genres[0].pk})
+        self.genres[0].slug = 'drama-new'
+        self.genres[0].save()
+        self.assertEqual(genre_ids.resolve(['drama']), {})
+        models.Category.objects.filter(slug='book').get().delete()
+        self.assertEqual(category_ids.resolve(['book']), {})
+
+    def test_slug_cache_follows_other_processes(self):
+        self.assertEqual(category_ids.resolve(['book']).keys(), {'book'})
+        # Другой процесс переименовал категорию: сигналов здесь не было,
+        # сменилась только версия группы в общем кэше.
+        models.Category.objects.filter(slug='book').update(slug='novel')
+        invalidate('categories')
+        self.assertEqual(category_ids.resolve(['book']), {})
+
+    def test_slug_cache_expires_without_shared_cache(self):
+        self.assertEqual(category_ids.resolve(['book']).keys(), {'book'})
+        models.Category.objects.filter(slug='book').update(slug='novel')
+        # Версия в кэше этого процесса не сменилась, но срок вышел.
+        later = time.monotonic() + slugs.LOCAL_TTL_SECONDS
+        with mock.patch('time.monotonic', return_value=later):
+            self.assertEqual(category_ids.resolve(['book']), {})
+
+    def test_batch_create(self):
+        items = [
+            {'name': 'Один', 'year': 2001, 'category': 'film',
+             'genre': ['drama', 'comedy']},
+            {'name': 'Два', 'year': 2002, 'category': 'book'},
+            {'name': 'Один', 'year': 2001, 'category': 'film'},
+            {'name': 'Побег', 'year': 1994, 'category': 'film'},
+            {'name': 'Три', 'year': 2003, 'category': 'song'},
+            {'name': 'Четыре', 'year': 2004, 'category': 'film',
+             'genre': ['western']},
+            {'name': 'Пять', 'year': 3000, 'category': 'film'},
+        ]
+        response = self.client.post('/api/v1/titles/', items, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([result['status']
+                          for result in response.data['results']],
+                         [201, 201, 400, 400, 400, 400, 400])
+        first = models.Title.objects.get(pk=response.data['results'][0]['id'])
+        self.assertEqual(set(first.genre.values_list('slug', flat=True)),
+                         {'drama', 'comedy'})
+
+    def test_batch_queries_do_not_grow(self):
+        counts = []
+        for size in (2, 6):
+            for cache in SLUG_CACHES.values():
+                cache.clear()
+            items = [{'name': f'Пакет {size}-{i}', 'year': 2000,
+                      'category': 'film', 'genre': ['drama']}
+                     for i in range(size)]
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.post('/api/v1/titles/', items,
+                                            format='json')
+            self.assertEqual(response.data['created'], size)
+            counts.append(len(captured))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_batch_requires_admin(self):
+        self.client.force_authenticate(User.objects.create(
+            username='reader', email='reader@example.com'
+        ))
+        response = self.client.post('/api/v1/titles/', [
+            {'name': 'Один', 'year': 2001, 'category': 'film'}
+        ], format='json')
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,71 @@
+import inspect
+
+from rest_framework import viewsets
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from api.bulk import BulkCreate
+from api.fast import Reader
+from api.serializers import ReviewSerializer
+from api.urls import router
+from api.viewsets import NestedViewSetMixin
+from reviews import models
+from users.models import User
+
+
+class UnpaginatedReviews(NestedViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    serializer_class = ReviewSerializer
+    pagination_class = None
+
+    def get_parent_queryset(self):
+        return models.Title.objects.filter(pk=self.kwargs['title_id'])
+
+    def get_queryset(self):
+        return models.Review.objects.filter(
+            title_id=self.kwargs['title_id']
+        ).select_related('author')
+
+
+def subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from subclasses(subclass)
+
+
+class NestedViewSetTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = models.Title.objects.create(name='Побег', year=1994)
+        cls.empty = models.Title.objects.create(name='Сталкер', year=1979)
+        author = User.objects.create(username='author',
+                                     email='author@example.com')
+        models.Review.objects.create(title=cls.title, author=author,
+                                     text='Отзыв', score=8)
+
+    def list(self, title_id):
+        view = UnpaginatedReviews.as_view({'get': 'list'})
+        return view(APIRequestFactory().get('/'), title_id=title_id)
+
+    def test_unpaginated_list(self):
+        # Непустой список родителя не проверяет.
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.list(self.title.pk).data), 1)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.list(self.empty.pk).data, [])
+        missing = self.empty.pk + 1
+        self.assertEqual(self.list(missing).status_code, 404)
+
+    def test_hooks_are_implemented(self):
+        for prefix, viewset, basename in router.registry:
+            self.assertFalse(inspect.isabstract(viewset), basename)
+        for base in (Reader, BulkCreate):
+            for cls in subclasses(base):
+                self.assertFalse(inspect.isabstract(cls), cls.__name__)
+
+    def test_missing_hook_fails_on_instantiation(self):
+        class Broken(NestedViewSetMixin, viewsets.GenericViewSet):
+            pass
+
+        self.assertTrue(inspect.isabstract(Broken))
+        with self.assertRaises(TypeError):
+            Broken()
@@ -19,5 +19,14 @@ router.register('users', views.UserViewSet, 'users')
 urlpatterns = [
     path('v1/', include(router.urls)),
     path('v1/auth/signup/', views.create_user, name='signup'),
-    path('v1/auth/token/', views.check_token, name='check_token')
+    path('v1/auth/token/', views.check_token, name='check_token'),
+    path('v1/reviews/bulk/', views.bulk_reviews, name='bulk_reviews'),
+    path('v1/comments/bulk/', views.bulk_comments, name='bulk_comments'),
+    path('v1/export/<str:dataset>/', views.export_dataset, name='export'),
+    path('v1/changes/', views.changes, name='changes'),
+    path('v1/cache/stats/', views.cache_stats, name='cache_stats'),
+    path('v1/deletions/<int:pk>/', views.deletion_job, name='deletion'),
+    path('v1/metrics/', views.metrics, name='metrics'),
+    path('v1/rankings/', views.rankings, name='rankings'),
+    path('v1/search/', views.search, name='search')
 ]
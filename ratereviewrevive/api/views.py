@@ -1,112 +1,202 @@
-from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
-from django.http import JsonResponse
+from django.db.models import Count, Max, Prefetch
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.utils.datastructures import MultiValueDict
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
-from rest_framework_simplejwt.tokens import AccessToken
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from api import serializers
+from api.async_read import AsyncReadMixin
+from api.authentication import token_for_user
+from api.bulk import (BULK_MAX_ITEMS, BulkCommentCreate, BulkReviewCreate,
+                      BulkTitleCreate)
+from api.cache import (CachedResponseMixin, get_stats, group_version,
+                       is_shared)
+from api.conditional import (ConditionalGetMixin, NestedConditionalGetMixin,
+                             make_etag)
+from api.fast import (CommentReader, FastReadMixin, ReviewReader,
+                      TitleReader)
 from api.filters import TitleFilter
+from api.metrics import render_prometheus
+from api.pagination import OffsetOrKeysetPagination
 from api.permissions import (IsAdmin,
                              IsAdminOrReadOnly,
                              IsModeratorAuthorAdminOrReadOnly)
-from api.viewsets import ListCreateDestroyViewSet
+from api.viewsets import (BackgroundDeleteMixin, ListCreateDestroyViewSet,
+                          NestedViewSetMixin)
+from changes.feed import (CursorExpired, feed_setting, latest_cursor,
+                          read_changes)
+from rankings import leaderboard
+from ratereviewrevive.sqlite import run_write
+from recommendations import similarity
 from reviews import models
+from reviews.exporters import CONTENT_TYPES, DATASETS, OUTPUTS, export
+from search.backends import get_backend
 from users.models import User
+from users.outbox import enqueue_email
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(CachedResponseMixin, ListCreateDestroyViewSet):
+    cache_group = 'categories'
     queryset = models.Category.objects.all()
     serializer_class = serializers.CategorySerializer
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(CachedResponseMixin, ListCreateDestroyViewSet):
+    cache_group = 'genres'
     queryset = models.Genre.objects.all()
     serializer_class = serializers.GenreSerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(AsyncReadMixin, ConditionalGetMixin, CachedResponseMixin,
+                   FastReadMixin, BackgroundDeleteMixin,
+                   viewsets.ModelViewSet):
+    cache_group = 'titles'
     serializer_class = serializers.TitleSerializer
+    fast_reader = TitleReader()
+    # GET читает с реплики (ratereviewrevive/routers.py).
+    read_from_replica = True
     permission_classes = (IsAdminOrReadOnly,)
-    queryset = models.Title.objects.annotate(
-        rating=Avg('reviews__score')
+    # Жанры в порядке id: ответ не зависит от плана запроса.
+    queryset = models.Title.objects.filter(
+        pending_deletion=False
+    ).select_related(
+        'category'
+    ).prefetch_related(
+        Prefetch('genre', queryset=models.Genre.objects.order_by('id'))
     ).order_by('id')
     pagination_class = LimitOffsetPagination
     filter_backends = (DjangoFilterBackend, filters.SearchFilter,
                        filters.OrderingFilter)
     filterset_class = TitleFilter
 
-    def perform_create(self, serializer):
-        category = get_object_or_404(
-            models.Category, slug=self.request.data.get('category')
-        )
-        genre = models.Genre.objects.filter(
-            slug__in=MultiValueDict(self.request.data).getlist('genre')
+    def get_validators(self, request):
+        if self.action == 'retrieve':
+            updated_at = models.Title.objects.filter(
+                pk=self.kwargs['pk'], pending_deletion=False
+            ).values_list('updated_at', flat=True).first()
+            if updated_at is None:
+                raise NotFound()
+            return make_etag(request, updated_at.isoformat()), updated_at
+        if is_shared():
+            # Любое изменение списка сбрасывает версию группы кэша
+            # (api/signals.py), и общий кэш видят все процессы: версия
+            # группы и есть версия выборки, без запроса к базе.
+            return make_etag(request, group_version(self.cache_group)), None
+        # Удаление меняет число произведений, любая правка — максимум
+        # updated_at, поэтому пара описывает состояние выборки.
+        state = self.filter_queryset(self.get_queryset()).aggregate(
+            count=Count('id'), last=Max('updated_at')
         )
-        serializer.save(category=category, genre=genre)
+        return make_etag(request, state['count'], state['last']), None
+
+    def get_serializer_class(self):
+        if self.action in ('create', 'update', 'partial_update'):
+            return serializers.TitleWriteSerializer
+        return serializers.TitleSerializer
 
-    def perform_update(self, serializer):
-        serializer.save()
-        category = get_object_or_404(
-            models.Category, slug=self.request.data.get('category')
+    def create(self, request, *args, **kwargs):
+        # Список в теле — пакетное создание для импорта каталога.
+        if isinstance(request.data, list):
+            return bulk_create_response(BulkTitleCreate, request)
+        return super().create(request, *args, **kwargs)
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """Похожие произведения по оценкам тех же рецензентов."""
+        serializer = serializers.SimilarQuerySerializer(
+            data=request.query_params
         )
-        genre = models.Genre.objects.filter(
-            slug__in=MultiValueDict(self.request.data).getlist('genre')
+        serializer.is_valid(raise_exception=True)
+        if not models.Title.objects.filter(pk=pk,
+                                           pending_deletion=False).exists():
+            raise NotFound()
+        neighbours = similarity.similar_to(
+            pk, serializer.validated_data.get('limit')
         )
-        serializer.save(category=category, genre=genre)
+        return Response({'results': serializers.SimilarTitleSerializer(
+            neighbours, many=True
+        ).data}, status=status.HTTP_200_OK)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(AsyncReadMixin, NestedConditionalGetMixin,
+                    NestedViewSetMixin, FastReadMixin, viewsets.ModelViewSet):
+    version_field = 'reviews_version'
     serializer_class = serializers.ReviewSerializer
-    pagination_class = LimitOffsetPagination
+    fast_reader = ReviewReader()
+    read_from_replica = True
+    pagination_class = OffsetOrKeysetPagination
+    # 'cursor' переключает вьюсет на пагинацию по ключу (pub_date, id).
+    pagination_mode = 'offset'
     permission_classes = (IsModeratorAuthorAdminOrReadOnly,)
 
+    def get_parent_queryset(self):
+        return models.Title.objects.filter(pk=self.kwargs.get('title_id'),
+                                           pending_deletion=False)
+
     def perform_create(self, serializer):
-        title = get_object_or_404(models.Title, id=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        # Существование произведения проверено в ReviewSerializer.validate
+        # тем же запросом, что и повторный отзыв.
+        run_write(serializer.save, author=self.request.user,
+                  title_id=self.kwargs.get('title_id'))
 
     def get_queryset(self):
-        title = get_object_or_404(models.Title, id=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        return models.Review.objects.filter(
+            title_id=self.kwargs.get('title_id'),
+            title__pending_deletion=False
+        ).select_related('author')
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(AsyncReadMixin, NestedConditionalGetMixin,
+                     NestedViewSetMixin, FastReadMixin, viewsets.ModelViewSet):
+    version_field = 'title__reviews_version'
     serializer_class = serializers.CommentSerializer
-    pagination_class = LimitOffsetPagination
+    fast_reader = CommentReader()
+    read_from_replica = True
+    pagination_class = OffsetOrKeysetPagination
+    # 'cursor' переключает вьюсет на пагинацию по ключу (pub_date, id).
+    pagination_mode = 'offset'
     permission_classes = (IsModeratorAuthorAdminOrReadOnly,)
 
+    def get_parent_queryset(self):
+        return models.Review.objects.filter(
+            pk=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id'),
+            title__pending_deletion=False
+        )
+
     def perform_create(self, serializer):
-        review = get_object_or_404(models.Review,
-                                   id=self.kwargs.get('review_id'))
-        serializer.save(author=self.request.user, review=review)
+        self.check_parent_exists()
+        run_write(serializer.save, author=self.request.user,
+                  review_id=self.kwargs.get('review_id'))
 
     def get_queryset(self):
-        review = get_object_or_404(models.Review,
-                                   id=self.kwargs.get('review_id'))
-        return review.comments.all()
+        return models.Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id'),
+            review__title__pending_deletion=False
+        ).select_related('author')
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(BackgroundDeleteMixin, viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'patch', 'delete']
     serializer_class = serializers.UserSerializer
     permission_classes = (IsAuthenticated, IsAdmin)
     filter_backends = (filters.SearchFilter,)
     lookup_field = 'username'
-    queryset = User.objects.all()
+    queryset = User.objects.filter(pending_deletion=False).order_by('id')
     search_fields = ('username',)
 
     @action(detail=False, methods=['get', 'patch'],
             permission_classes=(IsAuthenticated,))
     def me(self, request):
-        user = request.user
+        # request.user собран из токена, полная запись читается здесь.
+        user = get_object_or_404(User, pk=request.user.pk)
 
         if request.method == 'PATCH':
             serializer = serializers.UserSerializer(user,
@@ -140,9 +230,10 @@ def create_user(request):
 
 
 def send_confirmation_email(email, token):
+    # Письмо уходит из очереди воркером process_outbox, а не в запросе.
     subject = 'Регистрация на RateReviewRevive'
     message = f'Код подтверждения: {token}'
-    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [email])
+    enqueue_email(email, subject, message)
 
 
 @api_view(['POST'])
@@ -153,8 +244,170 @@ def check_token(request):
     username = serializer.validated_data.get('username')
     user = get_object_or_404(User, username=username)
     if default_token_generator.check_token(user, confirmation_code):
-        jwt_token = AccessToken.for_user(user)
+        jwt_token = token_for_user(user)
         return JsonResponse(({'token': str(jwt_token)}),
                             status=status.HTTP_200_OK)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+def bulk_create_response(bulk_class, request):
+    items = request.data
+    if not isinstance(items, list) or not 0 < len(items) <= BULK_MAX_ITEMS:
+        return Response(
+            {'detail': f'Ожидается список из 1-{BULK_MAX_ITEMS} элементов.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    results = bulk_class(items, request.user).run()
+    created = sum(result['status'] == 201 for result in results)
+    return Response({'created': created,
+                     'failed': len(results) - created,
+                     'results': results}, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes((IsAuthenticated,))
+def bulk_reviews(request):
+    return bulk_create_response(BulkReviewCreate, request)
+
+
+@api_view(['POST'])
+@permission_classes((IsAuthenticated,))
+def bulk_comments(request):
+    return bulk_create_response(BulkCommentCreate, request)
+
+
+@api_view(['GET'])
+@permission_classes((IsAdmin,))
+def changes(request):
+    """События после курсора since; без since — только текущий курсор."""
+    serializer = serializers.ChangeFeedQuerySerializer(
+        data=request.query_params
+    )
+    serializer.is_valid(raise_exception=True)
+    since = serializer.validated_data.get('since')
+    if since is None:
+        return Response({'next_cursor': latest_cursor(), 'has_more': False,
+                         'results': []}, status=status.HTTP_200_OK)
+    limit = min(serializer.validated_data.get(
+        'limit', feed_setting('PAGE_SIZE')
+    ), feed_setting('MAX_PAGE_SIZE'))
+    try:
+        entries = read_changes(since, limit + 1,
+                               serializer.validated_data.get('model'))
+    except CursorExpired:
+        return Response(
+            {'detail': 'Курсор устарел: события после него удалены, '
+                       'нужна полная синхронизация.'},
+            status=status.HTTP_410_GONE
+        )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    return Response({
+        'next_cursor': entries[-1].position if entries else since,
+        'has_more': has_more,
+        'results': serializers.ChangeSerializer(entries, many=True).data,
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def rankings(request):
+    """Первые места таблицы лидеров: общей, жанра или категории."""
+    serializer = serializers.RankingQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    query = serializer.validated_data
+    scope = leaderboard.GLOBAL
+    if 'genre' in query:
+        genre = get_object_or_404(models.Genre, slug=query['genre'])
+        scope = leaderboard.genre_scope(genre.pk)
+    elif 'category' in query:
+        category = get_object_or_404(models.Category,
+                                     slug=query['category'])
+        scope = leaderboard.category_scope(category.pk)
+    places = leaderboard.top(scope, query['by'], query.get('limit'))
+    results = [{'rank': rank, **place} for rank, place in enumerate(
+        serializers.RankingSerializer(places, many=True).data, start=1
+    )]
+    return Response({'scope': scope, 'by': query['by'],
+                     'results': results}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def search(request):
+    serializer = serializers.SearchQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    kinds = serializer.validated_data.get('type') or set(
+        serializers.SearchQuerySerializer.SEARCH_TYPES
+    )
+    found = get_backend().search(serializer.validated_data['q'], kinds,
+                                 serializer.validated_data['limit'])
+    ids = {kind: [pk for found_kind, pk, _ in found if found_kind == kind]
+           for kind in kinds}
+    objects = {
+        'title': models.Title.objects.filter(
+            pending_deletion=False
+        ).in_bulk(ids.get('title', [])),
+        # Отзывы и комментарии скрытого произведения остаются в индексе
+        # до фонового удаления.
+        'review': models.Review.objects.filter(
+            title__pending_deletion=False
+        ).in_bulk(ids.get('review', [])),
+        'comment': models.Comment.objects.filter(
+            review__title__pending_deletion=False
+        ).select_related('review').in_bulk(ids.get('comment', [])),
+    }
+    results = []
+    for kind, pk, rank in found:
+        obj = objects[kind].get(pk)
+        if obj is None:
+            continue
+        if kind == 'title':
+            result = {'title_id': pk, 'text': obj.name}
+        elif kind == 'review':
+            result = {'title_id': obj.title_id, 'text': obj.text}
+        else:
+            result = {'title_id': obj.review.title_id,
+                      'review_id': obj.review_id, 'text': obj.text}
+        results.append({'type': kind, 'id': pk, 'rank': rank, **result})
+    return Response({'results': results}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes((IsAdmin,))
+def export_dataset(request, dataset):
+    # Параметр называется output: format занят выбором рендерера DRF.
+    output = request.query_params.get('output', 'ndjson')
+    if dataset not in DATASETS or output not in OUTPUTS:
+        return Response(
+            {'detail': f'Таблицы: {", ".join(DATASETS)}; '
+                       f'output: {", ".join(OUTPUTS)}.'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    response = StreamingHttpResponse(export(dataset, output),
+                                     content_type=CONTENT_TYPES[output])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{dataset}.{output}"'
+    )
+    return response
+
+
+@api_view(['GET'])
+@permission_classes((IsAdmin,))
+def cache_stats(request):
+    return Response(get_stats(), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes((IsAdmin,))
+def deletion_job(request, pk):
+    """Ход фонового удаления произведения или пользователя."""
+    job = get_object_or_404(models.DeletionJob, pk=pk)
+    return Response(serializers.DeletionJobSerializer(job).data,
+                    status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes((IsAdmin,))
+def metrics(request):
+    return HttpResponse(render_prometheus(),
+                        content_type='text/plain; version=0.0.4')
@@ -1,8 +1,15 @@
+from abc import ABC, abstractmethod
+
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, mixins, viewsets
+from rest_framework import filters, mixins, status, viewsets
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
 
 from api.permissions import IsAdminOrReadOnly
+from api.serializers import DeletionJobSerializer
+from reviews.deletion import deletion_setting, schedule
 
 
 class ListCreateDestroyViewSet(
@@ -16,3 +23,54 @@ class ListCreateDestroyViewSet(
     filter_backends = (DjangoFilterBackend, filters.SearchFilter)
     search_fields = ('name',)
     lookup_field = 'slug'
+
+
+class NestedViewSetMixin(ABC):
+    """Вьюсет вложенного ресурса: отзывы произведения, комментарии отзыва.
+
+    Дочерние объекты фильтруются по id родителя из URL без отдельной
+    загрузки родителя. Существование родителя проверяется только там,
+    где без этого не обойтись: при создании и при пустой странице
+    списка — чтобы отличить «нет родителя» (404) от «нет записей».
+    """
+
+    @abstractmethod
+    def get_parent_queryset(self):
+        """Выборка из одного родителя по id из URL."""
+
+    def check_parent_exists(self):
+        if not hasattr(self, '_parent_exists'):
+            self._parent_exists = self.get_parent_queryset().exists()
+        if not self._parent_exists:
+            raise NotFound()
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and not page:
+            self.check_parent_exists()
+        return page
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        # Без пагинатора пустой список проверяется здесь.
+        if self.paginator is None and not response.data:
+            self.check_parent_exists()
+        return response
+
+
+class BackgroundDeleteMixin:
+    """DELETE скрывает объект и отвечает 202 с заданием удаления.
+
+    Отзывы и комментарии удаляет пачками воркер process_deletions, ход
+    удаления — по ссылке из заголовка Location. С выключенной
+    настройкой BACKGROUND_DELETION['ENABLED'] удаление синхронное.
+    """
+
+    def destroy(self, request, *args, **kwargs):
+        if not deletion_setting('ENABLED'):
+            return super().destroy(request, *args, **kwargs)
+        job = schedule(self.get_object())
+        location = reverse('deletion', args=[job.pk], request=request)
+        return Response(DeletionJobSerializer(job).data,
+                        status=status.HTTP_202_ACCEPTED,
+                        headers={'Location': location})
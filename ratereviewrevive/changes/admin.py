@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import ChangeLog
+
+
+class ChangeLogAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'position',
+        'action',
+        'model',
+        'object_id',
+        'title_id',
+        'review_id',
+        'created_at'
+    )
+    list_filter = ('action', 'model')
+
+
+admin.site.register(ChangeLog, ChangeLogAdmin)
@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from changes.models import ChangeLog, FeedState
+from reviews import models
+
+DEFAULTS = {
+    'RETENTION_DAYS': 7,
+    'PAGE_SIZE': 100,
+    'MAX_PAGE_SIZE': 1000,
+    # Сколько событий нумерует один UPDATE.
+    'SEQUENCE_BATCH_SIZE': 1000,
+}
+MODEL_NAMES = {
+    models.Title: ChangeLog.TITLE,
+    models.Review: ChangeLog.REVIEW,
+    models.Comment: ChangeLog.COMMENT,
+}
+
+
+class CursorExpired(Exception):
+    """События после курсора уже удалены по сроку хранения."""
+
+
+def feed_setting(name):
+    return getattr(settings, 'CHANGE_FEED', {}).get(name, DEFAULTS[name])
+
+
+def entry_for(instance, action):
+    """Несохранённая запись ленты об изменении объекта."""
+    entry = ChangeLog(model=MODEL_NAMES[type(instance)],
+                      object_id=instance.pk, action=action)
+    if isinstance(instance, models.Review):
+        entry.title_id = instance.title_id
+    elif isinstance(instance, models.Comment):
+        entry.review_id = instance.review_id
+    return entry
+
+
+def locked_state():
+    """Строка FeedState под блокировкой; вызывать внутри atomic."""
+    state, _ = FeedState.objects.select_for_update().get_or_create(pk=1)
+    return state
+
+
+def assign_positions(state):
+    """Нумерует закоммиченные события, у которых ещё нет позиции.
+
+    Номера выдаются под блокировкой state: событие транзакции, которая
+    закоммитится позже, получит номер больше всех уже выданных, и
+    потребитель, читающий после курсора, его не пропустит.
+    """
+    batch_size = feed_setting('SEQUENCE_BATCH_SIZE')
+    while True:
+        entries = list(ChangeLog.objects.filter(
+            position__isnull=True
+        ).order_by('id').only('id')[:batch_size])
+        if not entries:
+            break
+        for entry in entries:
+            state.last_position += 1
+            entry.position = state.last_position
+        ChangeLog.objects.bulk_update(entries, ['position'])
+    state.save()
+
+
+def sequence():
+    """Нумерует новые события; возвращает состояние ленты."""
+    with transaction.atomic():
+        state = locked_state()
+        assign_positions(state)
+    return state
+
+
+def latest_cursor():
+    return sequence().last_position
+
+
+def read_changes(since, limit, model_names=None):
+    """События с позицией больше since, не больше limit штук.
+
+    Курсор устарел, если события после него уже удалены по сроку.
+    """
+    if since < sequence().pruned_through:
+        raise CursorExpired
+    entries = ChangeLog.objects.filter(position__gt=since)
+    if model_names:
+        entries = entries.filter(Q(model__in=model_names)
+                                 | Q(action=ChangeLog.RESET))
+    return list(entries.order_by('position')[:limit])
+
+
+def prune(now=None):
+    """Удаляет события старше срока хранения.
+
+    Удаляется непрерывный отрезок позиций до последнего устаревшего
+    события; его граница сохраняется в FeedState.pruned_through.
+    """
+    cutoff = (now or timezone.now()) - timedelta(
+        days=feed_setting('RETENTION_DAYS')
+    )
+    with transaction.atomic():
+        state = locked_state()
+        assign_positions(state)
+        through = ChangeLog.objects.filter(
+            created_at__lt=cutoff
+        ).aggregate(through=Max('position'))['through']
+        if through is None or through <= state.pruned_through:
+            return 0
+        deleted, _ = ChangeLog.objects.filter(
+            position__lte=through
+        ).delete()
+        state.pruned_through = through
+        state.save(update_fields=['pruned_through'])
+    return deleted
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from changes.feed import feed_setting, prune
+
+
+class Command(BaseCommand):
+    help = ('Удаляет из ленты изменений события старше '
+            'CHANGE_FEED["RETENTION_DAYS"] дней.')
+
+    def handle(self, *args, **options):
+        deleted = prune()
+        self.stdout.write(f'{deleted} changes older than '
+                          f'{feed_setting("RETENTION_DAYS")} days deleted')
@@ -0,0 +1,31 @@
+# Generated by Django 3.2 on 2026-10-18 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(blank=True, choices=[('title', 'title'), ('review', 'review'), ('comment', 'comment')], max_length=15, verbose_name='Модель')),
+                ('object_id', models.BigIntegerField(null=True, verbose_name='Id объекта')),
+                ('action', models.CharField(choices=[('create', 'create'), ('update', 'update'), ('delete', 'delete'), ('reset', 'reset')], max_length=15, verbose_name='Действие')),
+                ('title_id', models.BigIntegerField(null=True, verbose_name='Id произведения')),
+                ('review_id', models.BigIntegerField(null=True, verbose_name='Id отзыва')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Время')),
+            ],
+            options={
+                'verbose_name': 'Изменение',
+                'verbose_name_plural': 'Изменения',
+                'ordering': ('id',),
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2 on 2026-10-18 17:09
+
+from django.db import migrations, models
+from django.db.models import F, Max, Min
+
+
+def keep_id_cursors(apps, schema_editor):
+    """Выданные раньше курсоры — id событий; позиции с ними совпадают."""
+    alias = schema_editor.connection.alias
+    entries = apps.get_model('changes', 'ChangeLog').objects.using(alias)
+    entries.update(position=F('id'))
+    bounds = entries.aggregate(first=Min('id'), last=Max('id'))
+    apps.get_model('changes', 'FeedState').objects.using(alias).create(
+        pk=1,
+        last_position=bounds['last'] or 0,
+        pruned_through=bounds['first'] - 1 if bounds['first'] else 0,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('changes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_position', models.BigIntegerField(default=0, verbose_name='Последняя позиция')),
+                ('pruned_through', models.BigIntegerField(default=0, verbose_name='Удалено до позиции')),
+            ],
+            options={
+                'verbose_name': 'Состояние ленты',
+                'verbose_name_plural': 'Состояние ленты',
+            },
+        ),
+        migrations.AddField(
+            model_name='changelog',
+            name='position',
+            field=models.BigIntegerField(null=True, unique=True, verbose_name='Позиция'),
+        ),
+        migrations.RunPython(keep_id_cursors, migrations.RunPython.noop),
+    ]
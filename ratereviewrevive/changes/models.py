@@ -0,0 +1,57 @@
+from django.db import models
+
+
+class ChangeLog(models.Model):
+    """Событие ленты изменений; курсор потребителей — position.
+
+    Ссылки на объекты — простые числа, а не внешние ключи: запись
+    об удалении (tombstone) переживает сам объект.
+    """
+    TITLE = 'title'
+    REVIEW = 'review'
+    COMMENT = 'comment'
+    MODELS = ((TITLE, 'title'), (REVIEW, 'review'), (COMMENT, 'comment'))
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    # Данные загружены в обход сигналов: потребителю нужна полная
+    # пересинхронизация.
+    RESET = 'reset'
+    ACTIONS = ((CREATE, 'create'), (UPDATE, 'update'), (DELETE, 'delete'),
+               (RESET, 'reset'))
+
+    model = models.CharField('Модель', max_length=15, choices=MODELS,
+                             blank=True)
+    object_id = models.BigIntegerField('Id объекта', null=True)
+    action = models.CharField('Действие', max_length=15, choices=ACTIONS)
+    title_id = models.BigIntegerField('Id произведения', null=True)
+    review_id = models.BigIntegerField('Id отзыва', null=True)
+    created_at = models.DateTimeField('Время', auto_now_add=True,
+                                      db_index=True)
+    # Номер в порядке коммитов; выдаёт changes.feed.sequence(), пока
+    # событие не видно читателю, он пуст. id для курсора не годится:
+    # в PostgreSQL транзакции коммитятся не в порядке своих id.
+    position = models.BigIntegerField('Позиция', null=True, unique=True)
+
+    def __str__(self) -> str:
+        return f'{self.pk}: {self.action} {self.model} {self.object_id}'
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Изменение'
+        verbose_name_plural = 'Изменения'
+
+
+class FeedState(models.Model):
+    """Единственная строка: последняя выданная позиция и граница очистки.
+
+    Блокировка строки упорядочивает выдачу позиций параллельными
+    читателями.
+    """
+    last_position = models.BigIntegerField('Последняя позиция', default=0)
+    pruned_through = models.BigIntegerField('Удалено до позиции',
+                                            default=0)
+
+    class Meta:
+        verbose_name = 'Состояние ленты'
+        verbose_name_plural = 'Состояние ленты'
@@ -0,0 +1,48 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from changes.feed import MODEL_NAMES, entry_for
+from changes.models import ChangeLog
+from reviews import models
+from reviews.signals import bulk_created, data_imported
+
+
+@receiver(post_save)
+def log_save(sender, instance, created=False, raw=False, **kwargs):
+    if sender in MODEL_NAMES and not raw:
+        entry_for(instance, ChangeLog.CREATE if created
+                  else ChangeLog.UPDATE).save()
+
+
+@receiver(post_delete)
+def log_delete(sender, instance, **kwargs):
+    if sender in MODEL_NAMES:
+        entry_for(instance, ChangeLog.DELETE).save()
+
+
+@receiver(m2m_changed, sender=models.Title.genre.through)
+def log_title_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        entry_for(instance, ChangeLog.UPDATE).save()
+        return
+    # Изменение со стороны жанра: genre.title_set.add(...).
+    ChangeLog.objects.bulk_create(
+        ChangeLog(model=ChangeLog.TITLE, object_id=pk,
+                  action=ChangeLog.UPDATE)
+        for pk in pk_set or ()
+    )
+
+
+@receiver(bulk_created)
+def log_bulk_create(sender, instances, **kwargs):
+    if sender in MODEL_NAMES:
+        ChangeLog.objects.bulk_create(
+            entry_for(instance, ChangeLog.CREATE) for instance in instances
+        )
+
+
+@receiver(data_imported)
+def log_import(sender, **kwargs):
+    ChangeLog.objects.create(action=ChangeLog.RESET)
@@ -0,0 +1,122 @@
+from django.conf import settings
+
+from rankings.models import TitleRanking
+from reviews import models
+from reviews.importers import iter_batches
+
+DEFAULTS = {
+    # Байесовское среднее: к отзывам произведения добавляется
+    # PRIOR_WEIGHT воображаемых оценок PRIOR_MEAN, поэтому единственная
+    # десятка не обгоняет сотню девяток. Априорное среднее задано
+    # константой, а не считается по базе: иначе каждый отзыв менял бы
+    # оценки всех произведений.
+    'PRIOR_MEAN': 5.5,
+    'PRIOR_WEIGHT': 5,
+    # Произведения с меньшим числом отзывов в рейтинги не попадают.
+    'MIN_REVIEWS': 1,
+    'DEFAULT_LIMIT': 10,
+    'MAX_LIMIT': 100,
+}
+GLOBAL = 'global'
+ORDERINGS = {
+    'rating': ('-score', '-review_count', 'title_id'),
+    'reviews': ('-review_count', '-score', 'title_id'),
+}
+
+
+def rankings_setting(name):
+    return getattr(settings, 'RANKINGS', {}).get(name, DEFAULTS[name])
+
+
+def bayesian_score(rating_sum, rating_count):
+    weight = rankings_setting('PRIOR_WEIGHT')
+    return ((rankings_setting('PRIOR_MEAN') * weight + rating_sum)
+            / (weight + rating_count))
+
+
+def category_scope(category_id):
+    return f'category:{category_id}'
+
+
+def genre_scope(genre_id):
+    return f'genre:{genre_id}'
+
+
+def scopes(category_id, genre_ids):
+    result = [GLOBAL]
+    if category_id is not None:
+        result.append(category_scope(category_id))
+    result.extend(genre_scope(genre_id) for genre_id in genre_ids)
+    return result
+
+
+def _rows(title, genre_ids):
+    score = bayesian_score(title['rating_sum'], title['rating_count'])
+    return [TitleRanking(scope=scope, title_id=title['id'], score=score,
+                         review_count=title['rating_count'])
+            for scope in scopes(title['category_id'], genre_ids)]
+
+
+def refresh_title(title_id, rescope=False):
+    """Обновляет строки произведения после изменения его отзывов.
+
+    Если набор областей не менялся, хватает одного UPDATE; строки
+    пересоздаются, когда их ещё нет или когда rescope — сменились
+    жанры или категория.
+    """
+    # Агрегаты и жанры одним запросом: строка на каждый жанр.
+    # Скрытое до удаления произведение в рейтинги не возвращается.
+    rows = list(models.Title.objects.filter(
+        pk=title_id, pending_deletion=False
+    ).values_list(
+        'rating_sum', 'rating_count', 'category_id', 'genre'
+    ))
+    if not rows:
+        return
+    rating_sum, rating_count, category_id, _ = rows[0]
+    title = {'id': title_id, 'rating_sum': rating_sum,
+             'rating_count': rating_count, 'category_id': category_id}
+    places = TitleRanking.objects.filter(title_id=title_id)
+    if rating_count < rankings_setting('MIN_REVIEWS'):
+        places.delete()
+        return
+    if rescope:
+        places.delete()
+    elif places.update(score=bayesian_score(rating_sum, rating_count),
+                       review_count=rating_count):
+        return
+    genre_ids = [genre_id for *_, genre_id in rows if genre_id is not None]
+    TitleRanking.objects.bulk_create(_rows(title, genre_ids))
+
+
+def rebuild(batch_size=2000):
+    """Пересобирает все таблицы лидеров."""
+    TitleRanking.objects.all().delete()
+    titles = models.Title.objects.filter(
+        rating_count__gte=rankings_setting('MIN_REVIEWS'),
+        pending_deletion=False
+    ).order_by('pk').values('id', 'rating_sum', 'rating_count',
+                            'category_id')
+    created = 0
+    for batch in iter_batches(titles.iterator(batch_size), batch_size):
+        genres = {title['id']: [] for title in batch}
+        for title_id, genre_id in models.Title.genre.through.objects.filter(
+                title_id__in=genres).values_list('title_id', 'genre_id'):
+            genres[title_id].append(genre_id)
+        rows = [row for title in batch
+                for row in _rows(title, genres[title['id']])]
+        TitleRanking.objects.bulk_create(rows, batch_size=batch_size)
+        created += len(rows)
+    return created
+
+
+def top(scope, by='rating', limit=None):
+    """Первые limit мест области; читается по индексу (scope, ...)."""
+    limit = min(limit or rankings_setting('DEFAULT_LIMIT'),
+                rankings_setting('MAX_LIMIT'))
+    return list(
+        TitleRanking.objects.filter(scope=scope)
+        .order_by(*ORDERINGS[by])
+        .select_related('title__category')
+        .prefetch_related('title__genre')[:limit]
+    )
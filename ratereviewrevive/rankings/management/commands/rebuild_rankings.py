@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rankings.leaderboard import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает таблицы лидеров произведений с нуля.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            created = rebuild()
+        self.stdout.write(f'{created} ranking rows written')
@@ -0,0 +1,93 @@
+# Generated by Django 3.2 on 2026-10-18 16:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 2000
+# Копия rankings.leaderboard на момент миграции: миграция не зависит от
+# того, как код приложения изменится потом.
+DEFAULTS = {'PRIOR_MEAN': 5.5, 'PRIOR_WEIGHT': 5, 'MIN_REVIEWS': 1}
+
+
+def rankings_setting(name):
+    return getattr(settings, 'RANKINGS', {}).get(name, DEFAULTS[name])
+
+
+def fill_rankings(apps, schema_editor):
+    """Заполняет таблицы лидеров по историческим моделям, пачками."""
+    alias = schema_editor.connection.alias
+    Title = apps.get_model('reviews', 'Title')
+    TitleRanking = apps.get_model('rankings', 'TitleRanking')
+    weight = rankings_setting('PRIOR_WEIGHT')
+    prior = rankings_setting('PRIOR_MEAN') * weight
+    titles = Title.objects.using(alias).filter(
+        rating_count__gte=rankings_setting('MIN_REVIEWS')
+    ).order_by('pk').values_list('id', 'rating_sum', 'rating_count',
+                                 'category_id')
+    batch = []
+    for title in titles.iterator(BATCH_SIZE):
+        batch.append(title)
+        if len(batch) == BATCH_SIZE:
+            fill_batch(Title, TitleRanking, alias, batch, weight, prior)
+            batch = []
+    if batch:
+        fill_batch(Title, TitleRanking, alias, batch, weight, prior)
+
+
+def fill_batch(Title, TitleRanking, alias, batch, weight, prior):
+    genres = {title_id: [] for title_id, *_ in batch}
+    for title_id, genre_id in Title.genre.through.objects.using(
+            alias).filter(title_id__in=genres).values_list('title_id',
+                                                           'genre_id'):
+        genres[title_id].append(genre_id)
+    rows = []
+    for title_id, rating_sum, rating_count, category_id in batch:
+        scopes = ['global']
+        if category_id is not None:
+            scopes.append(f'category:{category_id}')
+        scopes.extend(f'genre:{genre_id}' for genre_id in genres[title_id])
+        score = (prior + rating_sum) / (weight + rating_count)
+        rows.extend(TitleRanking(scope=scope, title_id=title_id, score=score,
+                                 review_count=rating_count)
+                    for scope in scopes)
+    TitleRanking.objects.using(alias).bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('reviews', '0006_title_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=40, verbose_name='Область')),
+                ('score', models.FloatField(verbose_name='Байесовская оценка')),
+                ('review_count', models.PositiveIntegerField(verbose_name='Количество отзывов')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.title')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Места в рейтинге',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['scope', '-score', '-review_count', 'title'], name='ranking_top_rated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['scope', '-review_count', '-score', 'title'], name='ranking_most_reviewed_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='titleranking',
+            constraint=models.UniqueConstraint(fields=('scope', 'title'), name='unique_title_in_scope'),
+        ),
+        migrations.RunPython(fill_rankings, migrations.RunPython.noop),
+    ]
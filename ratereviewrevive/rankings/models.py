@@ -0,0 +1,35 @@
+from django.db import models
+
+from reviews.models import Title
+
+
+class TitleRanking(models.Model):
+    """Строка таблицы лидеров: произведение в одной области рейтинга.
+
+    Область — 'global', 'category:<id>' или 'genre:<id>'. Произведение
+    повторяется в каждой своей области, зато первые k мест любой области
+    читаются по индексу, без сортировки и соединений.
+    """
+    scope = models.CharField('Область', max_length=40)
+    title = models.ForeignKey(Title,
+                              on_delete=models.CASCADE,
+                              related_name='rankings')
+    score = models.FloatField('Байесовская оценка')
+    review_count = models.PositiveIntegerField('Количество отзывов')
+
+    def __str__(self) -> str:
+        return f'{self.scope}: {self.title_id}'
+
+    class Meta:
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтинге'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'title'],
+                                    name='unique_title_in_scope')
+        ]
+        indexes = [
+            models.Index(fields=['scope', '-score', '-review_count', 'title'],
+                         name='ranking_top_rated_idx'),
+            models.Index(fields=['scope', '-review_count', '-score', 'title'],
+                         name='ranking_most_reviewed_idx'),
+        ]
@@ -0,0 +1,82 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from rankings import leaderboard
+from rankings.models import TitleRanking
+from reviews import models
+from reviews.signals import (bulk_created, data_imported, ratings_rebuilt,
+                             soft_deleted)
+
+# Приёмники reviews.signals подключены раньше (приложение reviews стоит
+# выше в INSTALLED_APPS), поэтому агрегаты рейтинга здесь уже обновлены.
+
+
+@receiver(post_save, sender=models.Review)
+def refresh_on_review_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_rating', None)
+    if previous is not None and previous[0] != instance.title_id:
+        leaderboard.refresh_title(previous[0])
+    leaderboard.refresh_title(instance.title_id)
+
+
+@receiver(post_delete, sender=models.Review)
+def refresh_on_review_delete(sender, instance, **kwargs):
+    leaderboard.refresh_title(instance.title_id)
+
+
+@receiver(bulk_created, sender=models.Review)
+def refresh_on_bulk_create(sender, instances, **kwargs):
+    for title_id in {review.title_id for review in instances}:
+        leaderboard.refresh_title(title_id)
+
+
+@receiver(post_save, sender=models.Title)
+def rescope_on_title_save(sender, instance, created=False, raw=False,
+                          **kwargs):
+    # У нового произведения нет отзывов, а правка может сменить категорию.
+    if not created and not raw:
+        leaderboard.refresh_title(instance.pk, rescope=True)
+
+
+@receiver(m2m_changed, sender=models.Title.genre.through)
+def rescope_on_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    title_ids = (pk_set or ()) if reverse else (instance.pk,)
+    for title_id in title_ids:
+        leaderboard.refresh_title(title_id, rescope=True)
+
+
+@receiver(post_delete, sender=models.Genre)
+def drop_genre_scope(sender, instance, **kwargs):
+    TitleRanking.objects.filter(
+        scope=leaderboard.genre_scope(instance.pk)
+    ).delete()
+
+
+@receiver(post_delete, sender=models.Category)
+def drop_category_scope(sender, instance, **kwargs):
+    TitleRanking.objects.filter(
+        scope=leaderboard.category_scope(instance.pk)
+    ).delete()
+
+
+@receiver(soft_deleted, sender=models.Title)
+def drop_hidden_title(sender, instance, **kwargs):
+    TitleRanking.objects.filter(title_id=instance.pk).delete()
+
+
+@receiver(ratings_rebuilt)
+def refresh_rebuilt_ratings(sender, title_ids=None, **kwargs):
+    if title_ids is None:
+        leaderboard.rebuild()
+        return
+    for title_id in title_ids:
+        leaderboard.refresh_title(title_id)
+
+
+@receiver(data_imported)
+def rebuild_after_import(sender, **kwargs):
+    leaderboard.rebuild()
@@ -0,0 +1,63 @@
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Реплика, с которой читает текущий запрос; None — читать с основной.
+_read_alias = contextvars.ContextVar('read_alias', default=None)
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def start_replica_reads():
+    """Дальнейшие чтения — со случайной реплики; токен для finish."""
+    return _read_alias.set(random.choice(replicas()))
+
+
+def finish_replica_reads(token):
+    try:
+        _read_alias.reset(token)
+    except ValueError:
+        # Под ASGI process_view идёт через sync_to_async: токен создан в
+        # копии контекста, в контекст запроса попало только значение.
+        _read_alias.set(None if token.old_value is token.MISSING
+                        else token.old_value)
+
+
+@contextmanager
+def primary_reads():
+    """Чтения внутри блока — с основной базы, даже в запросе к реплике."""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Записи — в основную базу, чтения — туда же или на реплику.
+
+    На реплику уходят только чтения между start_replica_reads() и
+    finish_replica_reads(): их вызывает ReplicaMiddleware для GET
+    вьюсетов с read_from_replica. Всё остальное, включая чтения при
+    обработке записи, идёт в основную базу и видит только что
+    записанные данные.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Все базы проекта — основная и её копии (реплики и вторая база
+        # тестов), связи между ними допустимы.
+        databases = set(settings.DATABASES)
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -23,9 +23,14 @@ INSTALLED_APPS = [
     'reviews.apps.ReviewsConfig',
     'api.apps.ApiConfig',
     'users',
+    'search.apps.SearchConfig',
+    'changes.apps.ChangesConfig',
+    'rankings.apps.RankingsConfig',
+    'recommendations.apps.RecommendationsConfig',
 ]
 
 MIDDLEWARE = [
+    'api.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -33,6 +38,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'ratereviewrevive.urls'
@@ -56,11 +62,83 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'ratereviewrevive.wsgi.application'
 
+DB_ENGINE = os.getenv('DB_ENGINE', 'django.db.backends.sqlite3')
+SQLITE = DB_ENGINE == 'django.db.backends.sqlite3'
+
+
+def database(location):
+    """Настройки базы: для SQLite location — файл, иначе — хост[:порт]."""
+    if SQLITE:
+        return {'ENGINE': DB_ENGINE, 'NAME': BASE_DIR / location}
+    host, _, port = location.partition(':')
+    return {
+        'ENGINE': DB_ENGINE,
+        'NAME': os.getenv('DB_NAME', 'ratereviewrevive'),
+        'USER': os.getenv('POSTGRES_USER', 'postgres'),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+        'HOST': host,
+        'PORT': port or os.getenv('DB_PORT', '5432'),
+        # Постоянные соединения: не открывать новое на каждый запрос.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        # За PgBouncer в режиме transaction серверные курсоры
+        # .iterator() не переживают смену соединения.
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_PGBOUNCER') == 'True',
+    }
+
+
 DATABASES = {
+    'default': database(os.getenv('DB_NAME', 'db.sqlite3') if SQLITE
+                        else os.getenv('DB_HOST', 'localhost')),
+}
+# Реплики для чтения (ratereviewrevive/routers.py): хосты через пробел,
+# для SQLite — файлы-копии основной базы.
+DATABASE_REPLICAS = []
+for number, location in enumerate(os.getenv('DB_REPLICAS', '').split(),
+                                  start=1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = database(location)
+    if not SQLITE:
+        # Реплика доступна только на чтение, тесты читают основную базу.
+        DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+if SQLITE and not DATABASE_REPLICAS:
+    # Вторая база только для тестов маршрутизации (api/tests/
+    # test_replicas.py): без DATABASE_REPLICAS на неё ничего не читается,
+    # а тестовый раннер создаёт её в памяти.
+    DATABASES['replica_test'] = database('replica_test.sqlite3')
+# Прагмы SQLite (ratereviewrevive/sqlite.py), очередь записей отзывов и
+# комментариев в одном потоке процесса — SQLITE_WRITE_QUEUE=True.
+SQLITE_PROFILE = {
+    'ENABLED': True,
+    'JOURNAL_MODE': 'WAL',
+    'SYNCHRONOUS': 'NORMAL',
+    'MMAP_SIZE': 256 * 1024 * 1024,
+    'CACHE_SIZE': -64000,
+    'BUSY_TIMEOUT_MS': 5000,
+    'WRITE_QUEUE': os.getenv('SQLITE_WRITE_QUEUE') == 'True',
+}
+# Async-view для GET произведений, отзывов и комментариев под ASGI
+# (api/async_read.py): чтения из базы — в пуле из MAX_WORKERS потоков.
+ASYNC_READ_PATH = {
+    'ENABLED': os.getenv('ASYNC_READ_PATH') == 'True',
+    'MAX_WORKERS': int(os.getenv('ASYNC_READ_WORKERS', 8)),
+}
+DATABASE_ROUTERS = ['ratereviewrevive.routers.PrimaryReplicaRouter']
+# Сколько секунд после записи клиент читает с основной базы.
+REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', 5))
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Кэш ответов каталога (api/cache.py). Для нескольких процессов
+    # подойдёт FileBasedCache или Redis-совместимый бэкенд.
+    'api': {
+        'BACKEND': os.getenv('API_CACHE_BACKEND',
+                             'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('API_CACHE_LOCATION', 'api-responses'),
+        'TIMEOUT': int(os.getenv('API_CACHE_TIMEOUT', 300)),
+    },
 }
 
 AUTH_USER_MODEL = 'users.User'
@@ -100,12 +178,78 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     )
 }
 
+# Чтение произведений, отзывов и комментариев без сериализаторов DRF
+# (api/fast.py): ответы те же байт в байт, см. benchmark_serializers.
+FAST_READ_SERIALIZERS = True
+
+# Кэш пользователей для api.authentication.CachedJWTAuthentication.
+JWT_USER_CACHE = {
+    'TIMEOUT': 30,
+    'MAX_SIZE': 10000,
+}
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'send_e-mail')
 
 DEFAULT_FROM_EMAIL = 'admin@ratereviewrevive.net'
+
+# Очередь исходящих писем (users/outbox.py), отправляет process_outbox.
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_SECONDS': 30,
+    'RETENTION_DAYS': 7,
+}
+
+# Замеры запросов по маршрутам (api/middleware.py), метрики отдаются
+# администраторам по /api/v1/metrics/ в формате Prometheus.
+PERFORMANCE_MONITORING = {
+    'ENABLED': True,
+    'MAX_ROUTES': 200,
+    'SLOW_REQUEST_MS': 500,
+    'SLOW_LOG_SAMPLE_RATE': 0.1,
+    'SLOW_LOG_PATH': os.path.join(BASE_DIR, 'logs', 'slow_requests.log'),
+}
+
+# Лента изменений /api/v1/changes/, старые события удаляет prune_changes.
+CHANGE_FEED = {
+    'RETENTION_DAYS': 7,
+    'PAGE_SIZE': 100,
+    'MAX_PAGE_SIZE': 1000,
+    'SEQUENCE_BATCH_SIZE': 1000,
+}
+
+# Таблицы лидеров /api/v1/rankings/ (rankings/leaderboard.py).
+RANKINGS = {
+    'PRIOR_MEAN': 5.5,
+    'PRIOR_WEIGHT': 5,
+    'MIN_REVIEWS': 1,
+    'DEFAULT_LIMIT': 10,
+    'MAX_LIMIT': 100,
+}
+
+# DELETE произведений и пользователей скрывает их и отвечает 202,
+# отзывы и комментарии удаляет пачками воркер process_deletions
+# (reviews/deletion.py).
+BACKGROUND_DELETION = {
+    # DELETE отвечает 202 вместо 204; нужен запущенный воркер.
+    'ENABLED': os.getenv('BACKGROUND_DELETION') == 'True',
+    'BATCH_SIZE': 500,
+    'PAUSE_SECONDS': 0.05,
+    'LEASE_SECONDS': 300,
+    'RETRY_SECONDS': 60,
+}
+
+# Похожие произведения /api/v1/titles/{id}/similar/
+# (recommendations/similarity.py), пересчёт — build_similar_titles.
+SIMILAR_TITLES = {
+    'NEIGHBOURS': 20,
+    'MIN_CO_REVIEWS': 3,
+    'BATCH_SIZE': 256,
+    'DEFAULT_LIMIT': 10,
+}
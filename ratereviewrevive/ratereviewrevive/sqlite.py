@@ -0,0 +1,100 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+DEFAULTS = {
+    'ENABLED': True,
+    # WAL: читатели не ждут писателя, писатель — читателей.
+    'JOURNAL_MODE': 'WAL',
+    # В режиме WAL NORMAL не теряет целостность, fsync — на checkpoint.
+    'SYNCHRONOUS': 'NORMAL',
+    'MMAP_SIZE': 256 * 1024 * 1024,
+    # Отрицательное значение — в КиБ: 64 МБ страничного кэша.
+    'CACHE_SIZE': -64000,
+    # Сколько ждать освобождения блокировки вместо «database is locked».
+    'BUSY_TIMEOUT_MS': 5000,
+    # Создание отзывов и комментариев одним потоком процесса.
+    'WRITE_QUEUE': False,
+}
+
+
+def sqlite_setting(name):
+    return getattr(settings, 'SQLITE_PROFILE', {}).get(name, DEFAULTS[name])
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    """Прагмы профиля для каждого нового соединения SQLite."""
+    if connection.vendor != 'sqlite' or not sqlite_setting('ENABLED'):
+        return
+    pragmas = [
+        ('synchronous', sqlite_setting('SYNCHRONOUS')),
+        ('mmap_size', int(sqlite_setting('MMAP_SIZE'))),
+        ('cache_size', int(sqlite_setting('CACHE_SIZE'))),
+        ('busy_timeout', int(sqlite_setting('BUSY_TIMEOUT_MS'))),
+    ]
+    # Для базы в памяти (тесты) журнал WAL не применяется.
+    if not connection.is_in_memory_db():
+        pragmas.insert(0, ('journal_mode', sqlite_setting('JOURNAL_MODE')))
+    with connection.cursor() as cursor:
+        for name, value in pragmas:
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+class WriteQueue:
+    """Очередь записей, которые выполняет один поток-писатель.
+
+    SQLite допускает одного писателя: параллельные транзакции ждут
+    блокировку и при обновлении снимка получают «database is locked»
+    даже с busy_timeout. Поток-писатель выполняет записи процесса по
+    очереди, запросы ждут результат. Записи других процессов
+    по-прежнему ждут блокировку busy_timeout.
+    """
+
+    def __init__(self):
+        self._tasks = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, func, *args, **kwargs):
+        """Результат func в потоке-писателе; исключения пробрасываются."""
+        future = Future()
+        self._tasks.put((future, func, args, kwargs))
+        self._ensure_started()
+        return future.result()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='sqlite-writer', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            future, func, args, kwargs = self._tasks.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as error:
+                future.set_exception(error)
+                # Соединение после ошибки может быть сломано.
+                connections.close_all()
+
+
+write_queue = WriteQueue()
+
+
+def run_write(func, *args, **kwargs):
+    """Выполняет запись через очередь, если она включена для SQLite."""
+    if (sqlite_setting('WRITE_QUEUE')
+            and connections[DEFAULT_DB_ALIAS].vendor == 'sqlite'):
+        return write_queue.submit(func, *args, **kwargs)
+    return func(*args, **kwargs)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recommendations import similarity
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает похожие произведения по матрице оценок: '
+            'только изменённые после прошлой сборки или все (--full).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='пересчитать все произведения')
+        parser.add_argument('--batch-size', type=int,
+                            help='строк матрицы сходства в пакете')
+
+    def handle(self, *args, **options):
+        if not similarity.available():
+            raise CommandError('Нужны numpy и scipy: '
+                               'pip install numpy scipy.')
+        titles, full = similarity.build(options['full'],
+                                        options['batch_size'])
+        kind = 'full' if full else 'incremental'
+        self.stdout.write(f'{kind} build: {titles} titles refreshed')
@@ -0,0 +1,59 @@
+from django.db import models
+
+from reviews.models import Title
+
+
+class SimilarTitle(models.Model):
+    """Сосед произведения по оценкам одних и тех же пользователей.
+
+    Хранятся только первые NEIGHBOURS соседей каждого произведения:
+    список похожих читается по индексу (title, -score, similar) без
+    сортировки.
+    """
+    # Отдельный индекс не нужен: title — первое поле индекса
+    # similar_title_score_idx и ограничения уникальности.
+    title = models.ForeignKey(Title,
+                              on_delete=models.CASCADE,
+                              related_name='similar_titles',
+                              db_index=False)
+    # По этому индексу находятся списки, где встречается изменённое
+    # произведение.
+    similar = models.ForeignKey(Title,
+                                on_delete=models.CASCADE,
+                                related_name='+')
+    score = models.FloatField('Сходство')
+    co_reviews = models.PositiveIntegerField('Общих рецензентов')
+
+    def __str__(self) -> str:
+        return f'{self.title_id} ~ {self.similar_id}'
+
+    class Meta:
+        verbose_name = 'Похожее произведение'
+        verbose_name_plural = 'Похожие произведения'
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'similar'],
+                                    name='unique_similar_title')
+        ]
+        indexes = [
+            models.Index(fields=['title', '-score', 'similar'],
+                         name='similar_title_score_idx'),
+        ]
+
+
+class SimilarityBuild(models.Model):
+    """Запуск build_similar_titles.
+
+    Следующий запуск пересчитывает произведения, изменённые после
+    started_at последнего: отзывы сдвигают их updated_at.
+    """
+    started_at = models.DateTimeField('Начало')
+    full = models.BooleanField('Полная сборка')
+    titles = models.PositiveIntegerField('Пересчитано произведений')
+
+    def __str__(self) -> str:
+        return f'{self.started_at:%Y-%m-%d %H:%M:%S}'
+
+    class Meta:
+        verbose_name = 'Сборка похожих произведений'
+        verbose_name_plural = 'Сборки похожих произведений'
+        ordering = ('-started_at',)
@@ -0,0 +1,14 @@
+from django.db.models import Q
+from django.dispatch import receiver
+
+from recommendations.models import SimilarTitle
+from reviews import models
+from reviews.signals import soft_deleted
+
+
+@receiver(soft_deleted, sender=models.Title)
+def drop_hidden_title(sender, instance, **kwargs):
+    # Скрытое произведение пропадает и из списков похожих на другие.
+    SimilarTitle.objects.filter(
+        Q(title_id=instance.pk) | Q(similar_id=instance.pk)
+    ).delete()
@@ -0,0 +1,171 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from recommendations.models import SimilarityBuild, SimilarTitle
+from reviews import models
+from reviews.importers import iter_batches
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+DEFAULTS = {
+    # Сколько соседей хранится на произведение.
+    'NEIGHBOURS': 20,
+    # Сходство по одному-двум общим рецензентам — шум, такие пары
+    # не попадают в соседи.
+    'MIN_CO_REVIEWS': 3,
+    # Строк матрицы сходства в одном пакете: пакет — плотная матрица
+    # BATCH_SIZE × число произведений.
+    'BATCH_SIZE': 256,
+    'DEFAULT_LIMIT': 10,
+}
+
+
+def similarity_setting(name):
+    return getattr(settings, 'SIMILAR_TITLES', {}).get(name, DEFAULTS[name])
+
+
+def available():
+    return np is not None
+
+
+class ReviewMatrix:
+    """Оценки как разреженная матрица произведение × пользователь.
+
+    Из оценок вычитается средняя оценка автора (adjusted cosine): строгие
+    и щедрые рецензенты сравниваются по отклонениям от своей нормы.
+    Строки нормированы, поэтому сходство — скалярное произведение.
+    """
+
+    def __init__(self, chunk_size=50000):
+        reviews = models.Review.objects.filter(
+            title__pending_deletion=False
+        ).order_by().values_list(
+            'title_id', 'author_id', 'score'
+        ).iterator(chunk_size)
+        chunks = [np.array(batch, dtype=np.int64)
+                  for batch in iter_batches(reviews, chunk_size)]
+        data = (np.concatenate(chunks) if chunks
+                else np.empty((0, 3), dtype=np.int64))
+        self.title_ids, rows = np.unique(data[:, 0], return_inverse=True)
+        _, columns = np.unique(data[:, 1], return_inverse=True)
+        scores = data[:, 2].astype(np.float64)
+        users = columns.max() + 1 if len(columns) else 0
+        means = (np.bincount(columns, scores, users)
+                 / np.maximum(np.bincount(columns, minlength=users), 1))
+        shape = (len(self.title_ids), users)
+        centered = sparse.csr_matrix(
+            (scores - means[columns], (rows, columns)), shape=shape
+        )
+        norms = np.sqrt(np.asarray(centered.multiply(centered).sum(axis=1))
+                        ).ravel()
+        norms[norms == 0] = 1
+        self.vectors = sparse.diags(1 / norms) @ centered
+        # Кто оценил произведение — для числа общих рецензентов.
+        self.reviewed = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, columns)), shape=shape
+        )
+        self.index = {title_id: row for row, title_id in
+                      enumerate(self.title_ids.tolist())}
+
+    def neighbours(self, title_ids, batch_size, neighbours, min_co_reviews):
+        """Соседи title_ids: строки SimilarTitle без сохранения."""
+        rows = np.array([self.index[title_id] for title_id in title_ids
+                         if title_id in self.index], dtype=np.int64)
+        vectors_t = self.vectors.T.tocsr()
+        reviewed_t = self.reviewed.T.tocsr()
+        result = []
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            scores = (self.vectors[batch] @ vectors_t).toarray()
+            co_reviews = (self.reviewed[batch] @ reviewed_t).toarray()
+            scores[co_reviews < min_co_reviews] = 0
+            scores[np.arange(len(batch)), batch] = 0
+            count = min(neighbours, scores.shape[1])
+            top = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+            for position, row in enumerate(batch):
+                title_id = int(self.title_ids[row])
+                for column in top[position]:
+                    score = scores[position, column]
+                    # Отрицательное сходство — не рекомендация.
+                    if score > 0:
+                        result.append(SimilarTitle(
+                            title_id=title_id,
+                            similar_id=int(self.title_ids[column]),
+                            score=float(score),
+                            co_reviews=int(co_reviews[position, column]),
+                        ))
+        return result
+
+
+def changed_titles(since):
+    """Произведения с изменёнными отзывами и те, чьи соседи среди них.
+
+    Тех, кто может получить изменённое произведение в новые соседи,
+    добавляет build() по новым строкам соседей. Отзыв меняет и среднюю
+    оценку автора, а с ней векторы других произведений; такой сдвиг мал
+    и догоняется полной сборкой.
+    """
+    changed = set(models.Title.objects.filter(
+        updated_at__gte=since
+    ).values_list('pk', flat=True))
+    if not changed:
+        return changed
+    return changed | set(SimilarTitle.objects.filter(
+        similar__in=changed
+    ).values_list('title_id', flat=True))
+
+
+def build(full=False, batch_size=None):
+    """Пересчитывает соседей; (сколько произведений, полная ли сборка).
+
+    Без full пересчитываются только произведения, изменённые после
+    прошлой сборки. Матрица оценок читается целиком в обоих случаях:
+    сходство с изменённым произведением считается по всем остальным.
+    """
+    started_at = timezone.now()
+    last = SimilarityBuild.objects.first()
+    full = full or last is None
+    title_ids = None if full else changed_titles(last.started_at)
+    rows = []
+    if full or title_ids:
+        matrix = ReviewMatrix()
+        if full:
+            title_ids = matrix.title_ids.tolist()
+        options = (batch_size or similarity_setting('BATCH_SIZE'),
+                   similarity_setting('NEIGHBOURS'),
+                   similarity_setting('MIN_CO_REVIEWS'))
+        rows = matrix.neighbours(title_ids, *options)
+        if not full:
+            # Сходство симметрично: сосед изменённого произведения мог
+            # получить его в свои соседи, хотя сам не менялся.
+            gained = {row.similar_id for row in rows} - title_ids
+            title_ids |= gained
+            rows += matrix.neighbours(gained, *options)
+    with transaction.atomic():
+        stale = SimilarTitle.objects.all()
+        if not full:
+            stale = stale.filter(title_id__in=title_ids)
+        stale.delete()
+        SimilarTitle.objects.bulk_create(rows, batch_size=2000)
+        SimilarityBuild.objects.create(started_at=started_at, full=full,
+                                       titles=len(title_ids))
+    return len(title_ids), full
+
+
+def similar_to(title_id, limit=None):
+    """Соседи произведения по убыванию сходства; по индексу."""
+    limit = min(limit or similarity_setting('DEFAULT_LIMIT'),
+                similarity_setting('NEIGHBOURS'))
+    genres = models.Genre.objects.order_by('id')
+    return list(
+        SimilarTitle.objects.filter(title_id=title_id)
+        .order_by('-score', 'similar_id')
+        .select_related('similar__category')
+        .prefetch_related(Prefetch('similar__genre', queryset=genres))[:limit]
+    )
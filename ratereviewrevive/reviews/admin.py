@@ -9,7 +9,9 @@ class TitleAdmin(admin.ModelAdmin):
         'name',
         'year',
         'description',
-        'category'
+        'category',
+        'rating',
+        'rating_count'
     )
     search_fields = ('id', 'name')
     list_display_links = ('id', 'name')
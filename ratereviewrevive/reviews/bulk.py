@@ -0,0 +1,36 @@
+from django.db import NotSupportedError, connections, transaction
+
+from reviews.signals import bulk_created
+
+
+def bulk_insert(model, objects, using='default'):
+    """bulk_create, после которого у объектов есть id.
+
+    В одной транзакции с вставкой отправляется сигнал bulk_created:
+    по нему обновляются рейтинги, поисковый индекс и кэш ответов.
+    """
+    if not objects:
+        return objects
+    with transaction.atomic(using=using):
+        model.objects.using(using).bulk_create(objects)
+        if objects[0].pk is None:
+            _recover_ids(model, objects, using)
+        bulk_created.send(sender=model, instances=objects, using=using)
+    return objects
+
+
+def _recover_ids(model, objects, using):
+    # SQLite не возвращает id из bulk_create. Но внутри транзакции после
+    # вставки пишет только она, а AUTOINCREMENT выдаёт id по возрастанию
+    # в порядке строк: последние len(objects) id — наши.
+    if connections[using].vendor != 'sqlite':
+        raise NotSupportedError(
+            'bulk_insert требует базу, возвращающую id из bulk_create.'
+        )
+    ids = model.objects.using(using).order_by('-pk').values_list(
+        'pk', flat=True
+    )[:len(objects)]
+    for obj, pk in zip(objects, reversed(ids)):
+        obj.pk = pk
+        obj._state.adding = False
+        obj._state.db = using
@@ -0,0 +1,147 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from reviews.models import Comment, DeletionJob, Review, Title
+from reviews.signals import soft_deleted
+from users.models import User
+
+DEFAULTS = {
+    # Выключено: без воркера process_deletions ничего бы не удалялось.
+    'ENABLED': False,
+    # Строк в одной транзакции удаления.
+    'BATCH_SIZE': 500,
+    # Пауза между пачками: другие записи SQLite успевают взять
+    # блокировку базы.
+    'PAUSE_SECONDS': 0.05,
+    # Сколько секунд взятое задание скрыто от других воркеров; каждая
+    # пачка продлевает срок.
+    'LEASE_SECONDS': 300,
+    'RETRY_SECONDS': 60,
+}
+MODELS = {DeletionJob.TITLE: Title, DeletionJob.USER: User}
+
+
+def deletion_setting(name):
+    return getattr(settings, 'BACKGROUND_DELETION',
+                   {}).get(name, DEFAULTS[name])
+
+
+def steps(job):
+    """Выборки задания в порядке удаления.
+
+    Дети удаляются раньше родителей, поэтому каскад внутри пачки
+    почти ничего не собирает и не грузит в память.
+    """
+    pk = job.object_id
+    if job.model == DeletionJob.TITLE:
+        return [Comment.objects.filter(review__title_id=pk),
+                Review.objects.filter(title_id=pk),
+                Title.objects.filter(pk=pk)]
+    return [Comment.objects.filter(author_id=pk),
+            Comment.objects.filter(review__author_id=pk)
+            .exclude(author_id=pk),
+            Review.objects.filter(author_id=pk),
+            User.objects.filter(pk=pk)]
+
+
+def schedule(instance):
+    """Скрывает произведение или пользователя и ставит удаление в очередь."""
+    model = type(instance)
+    fields = {'pending_deletion': True}
+    if model is User:
+        # Токены пользователя перестают приниматься сразу.
+        fields['is_active'] = False
+    with transaction.atomic():
+        model.objects.filter(pk=instance.pk).update(**fields)
+        job = DeletionJob.objects.create(
+            model=next(name for name, job_model in MODELS.items()
+                       if job_model is model),
+            object_id=instance.pk
+        )
+        for name, value in fields.items():
+            setattr(instance, name, value)
+        soft_deleted.send(sender=model, instance=instance)
+    return job
+
+
+def claim_job():
+    """Забирает задание, срок аренды которого истёк, или None."""
+    now = timezone.now()
+    with transaction.atomic():
+        job = DeletionJob.objects.select_for_update(skip_locked=True).filter(
+            status__in=(DeletionJob.PENDING, DeletionJob.RUNNING),
+            locked_until__lte=now
+        ).order_by('created_at').first()
+        if job is None:
+            return None
+        job.status = DeletionJob.RUNNING
+        job.locked_until = now + timedelta(
+            seconds=deletion_setting('LEASE_SECONDS')
+        )
+        job.save(update_fields=['status', 'locked_until'])
+    return job
+
+
+def delete_batch(queryset, batch_size):
+    """Удаляет до batch_size строк выборки одной транзакцией.
+
+    delete() по списку id отправляет сигналы каждого объекта: рейтинги,
+    таблицы лидеров, поиск и лента изменений обновляются как обычно.
+    """
+    ids = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+    if ids:
+        with transaction.atomic():
+            queryset.model.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def run_job(job, batch_size=None):
+    batch_size = batch_size or deletion_setting('BATCH_SIZE')
+    if job.total is None:
+        job.total = sum(queryset.count() for queryset in steps(job))
+        job.save(update_fields=['total'])
+    for queryset in steps(job):
+        while True:
+            deleted = delete_batch(queryset, batch_size)
+            if not deleted:
+                break
+            job.deleted += deleted
+            DeletionJob.objects.filter(pk=job.pk).update(
+                deleted=F('deleted') + deleted,
+                locked_until=timezone.now() + timedelta(
+                    seconds=deletion_setting('LEASE_SECONDS')
+                )
+            )
+            time.sleep(deletion_setting('PAUSE_SECONDS'))
+    job.status = DeletionJob.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'finished_at'])
+
+
+def process_deletions(batch_size=None):
+    """Выполняет одно задание из очереди.
+
+    Возвращает (задание или None, удалено строк, текст ошибки или None).
+    """
+    job = claim_job()
+    if job is None:
+        return None, 0, None
+    started = job.deleted
+    try:
+        run_job(job, batch_size)
+    except Exception as error:
+        # Удалённые пачки не откатываются: повтор продолжит с остатка.
+        job.last_error = repr(error)
+        DeletionJob.objects.filter(pk=job.pk).update(
+            last_error=job.last_error,
+            locked_until=timezone.now() + timedelta(
+                seconds=deletion_setting('RETRY_SECONDS')
+            )
+        )
+        return job, job.deleted - started, job.last_error
+    return job, job.deleted - started, None
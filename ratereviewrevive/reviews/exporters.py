@@ -0,0 +1,136 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from reviews import models
+from reviews.importers import iter_batches
+from users.models import User
+
+DEFAULT_CHUNK_SIZE = 2000
+OUTPUTS = ('ndjson', 'csv')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+class Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+class Dataset:
+    """Выгружаемая таблица: колонки CSV совпадают с файлом fill_db.
+
+    Строки читаются через .values().iterator(chunk_size), поэтому память
+    не зависит от размера таблицы.
+    """
+
+    def __init__(self, model, filename, columns, fields=None, filters=None):
+        self.model = model
+        self.filename = filename
+        self.columns = columns
+        # Поле .values() для каждой колонки, если имена расходятся.
+        self.fields = fields or {}
+        # Скрытые произведения (ожидают удаления) не выгружаются.
+        self.filters = filters or {}
+
+    def rows(self):
+        return self.model.objects.filter(**self.filters).order_by('pk')
+
+    def batches(self, chunk_size):
+        fields = [self.fields.get(column, column) for column in self.columns]
+        queryset = self.rows().values(*fields)
+        for batch in iter_batches(queryset.iterator(chunk_size), chunk_size):
+            yield [{column: row[self.fields.get(column, column)]
+                    for column in self.columns} for row in batch]
+
+    def ndjson_batches(self, chunk_size):
+        return self.batches(chunk_size)
+
+
+class TitleDataset(Dataset):
+    """В NDJSON произведение выглядит как в API: с жанрами и рейтингом."""
+
+    def ndjson_batches(self, chunk_size):
+        queryset = self.rows().values(
+            'id', 'name', 'year', 'rating', 'description',
+            'category__name', 'category__slug'
+        )
+        for batch in iter_batches(queryset.iterator(chunk_size), chunk_size):
+            # Жанры пачки — одним запросом: prefetch_related с iterator()
+            # не работает.
+            genres = {row['id']: [] for row in batch}
+            for title_id, name, slug in models.Title.genre.through.objects \
+                    .filter(title_id__in=genres).order_by('pk') \
+                    .values_list('title_id', 'genre__name', 'genre__slug'):
+                genres[title_id].append({'name': name, 'slug': slug})
+            yield [{
+                'id': row['id'],
+                'name': row['name'],
+                'year': row['year'],
+                'rating': row['rating'],
+                'description': row['description'],
+                'genre': genres[row['id']],
+                'category': {'name': row['category__name'],
+                             'slug': row['category__slug']}
+                if row['category__slug'] is not None else None,
+            } for row in batch]
+
+
+DATASETS = {
+    'users': Dataset(User, 'users.csv',
+                     ('id', 'username', 'email', 'role', 'bio',
+                      'first_name', 'last_name')),
+    'categories': Dataset(models.Category, 'category.csv',
+                          ('id', 'name', 'slug')),
+    'genres': Dataset(models.Genre, 'genre.csv', ('id', 'name', 'slug')),
+    'titles': TitleDataset(models.Title, 'titles.csv',
+                           ('id', 'name', 'year', 'category', 'description'),
+                           {'category': 'category_id'},
+                           {'pending_deletion': False}),
+    'genre_title': Dataset(models.Title.genre.through, 'genre_title.csv',
+                           ('id', 'title_id', 'genre_id'),
+                           filters={'title__pending_deletion': False}),
+    'reviews': Dataset(models.Review, 'review.csv',
+                       ('id', 'title_id', 'text', 'author', 'score',
+                        'pub_date'),
+                       {'author': 'author_id'},
+                       {'title__pending_deletion': False}),
+    'comments': Dataset(models.Comment, 'comments.csv',
+                        ('id', 'review_id', 'text', 'author', 'pub_date'),
+                        {'author': 'author_id'},
+                        {'review__title__pending_deletion': False}),
+}
+
+_encoder = DjangoJSONEncoder()
+
+
+def _csv_value(value):
+    # Даты в том же виде, что в исходных CSV: 2019-09-24T21:08:21.567Z.
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return _encoder.default(value)
+
+
+def export(name, output='ndjson', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Строки выгрузки по пачкам: одна строка на chunk_size записей."""
+    dataset = DATASETS[name]
+    if output == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(dataset.columns)
+        for batch in dataset.batches(chunk_size):
+            yield ''.join(
+                writer.writerow([_csv_value(row[column])
+                                 for column in dataset.columns])
+                for row in batch
+            )
+        return
+    for batch in dataset.ndjson_batches(chunk_size):
+        yield ''.join(
+            json.dumps(row, ensure_ascii=False, cls=DjangoJSONEncoder) + '\n'
+            for row in batch
+        )
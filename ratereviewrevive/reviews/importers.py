@@ -0,0 +1,202 @@
+import csv
+import time
+from itertools import islice
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from reviews import models
+from reviews.signals import data_imported
+from users.models import User
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def iter_batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class BulkImporter:
+    """Пакетная загрузка CSV из static/data.
+
+    Внешние ключи проверяются по заранее загруженным множествам id,
+    строки пишутся через bulk_create пачками по batch_size, каждый файл
+    загружается в одной транзакции.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE,
+                 using=DEFAULT_DB_ALIAS):
+        self.batch_size = batch_size
+        self.using = using
+        self._ids = {}
+        self.skipped = 0
+
+    def existing_ids(self, model):
+        if model not in self._ids:
+            self._ids[model] = set(
+                model.objects.using(self.using)
+                .values_list('pk', flat=True).iterator()
+            )
+        return self._ids[model]
+
+    def resolve(self, model, value):
+        """Возвращает id, если такой объект есть в базе, иначе None."""
+        if not value:
+            return None
+        pk = int(value)
+        return pk if pk in self.existing_ids(model) else None
+
+    def build_user(self, row):
+        return User(
+            id=row['id'],
+            username=row['username'],
+            email=row['email'],
+            role=row['role'],
+            bio=row['bio'],
+            first_name=row['first_name'],
+            last_name=row['last_name']
+        )
+
+    def build_category(self, row):
+        return models.Category(id=row['id'], name=row['name'],
+                               slug=row['slug'])
+
+    def build_genre(self, row):
+        return models.Genre(id=row['id'], name=row['name'], slug=row['slug'])
+
+    def build_title(self, row):
+        return models.Title(
+            id=row['id'],
+            name=row['name'],
+            year=row['year'],
+            description=row.get('description', ''),
+            category_id=self.resolve(models.Category, row['category'])
+        )
+
+    def build_genre_title(self, row):
+        title_id = self.resolve(models.Title, row['title_id'])
+        genre_id = self.resolve(models.Genre, row['genre_id'])
+        if title_id is None or genre_id is None:
+            return None
+        return models.Title.genre.through(id=row['id'], title_id=title_id,
+                                          genre_id=genre_id)
+
+    def build_review(self, row):
+        title_id = self.resolve(models.Title, row['title_id'])
+        author_id = self.resolve(User, row['author'])
+        if title_id is None or author_id is None:
+            return None
+        return models.Review(
+            id=row['id'],
+            title_id=title_id,
+            text=row['text'],
+            author_id=author_id,
+            score=row['score'],
+            pub_date=row['pub_date']
+        )
+
+    def build_comment(self, row):
+        review_id = self.resolve(models.Review, row['review_id'])
+        author_id = self.resolve(User, row['author'])
+        if review_id is None or author_id is None:
+            return None
+        return models.Comment(
+            id=row['id'],
+            review_id=review_id,
+            text=row['text'],
+            author_id=author_id,
+            pub_date=row['pub_date']
+        )
+
+    LOADERS = {
+        'users.csv': (User, build_user),
+        'category.csv': (models.Category, build_category),
+        'genre.csv': (models.Genre, build_genre),
+        'titles.csv': (models.Title, build_title),
+        'genre_title.csv': (models.Title.genre.through, build_genre_title),
+        'review.csv': (models.Review, build_review),
+        'comments.csv': (models.Comment, build_comment)
+    }
+
+    def build_objects(self, rows, build):
+        for row in rows:
+            obj = build(self, row)
+            if obj is None:
+                self.skipped += 1
+                continue
+            yield obj
+
+    def write(self, model, objects):
+        """Пишет объекты пачками, возвращает число вставленных строк.
+
+        ignore_conflicts молча пропускает строки, которые уже есть в базе,
+        поэтому вставленные считаются по id пачки до и после записи.
+        """
+        written = 0
+        manager = model.objects.using(self.using)
+        for batch in iter_batches(objects, self.batch_size):
+            ids = [obj.pk for obj in batch]
+            existing = manager.filter(pk__in=ids).count()
+            manager.bulk_create(batch, ignore_conflicts=True)
+            written += manager.filter(pk__in=ids).count() - existing
+        return written
+
+    def load_rows(self, file, rows):
+        """Загружает строки одного файла, возвращает число записанных."""
+        model, build = self.LOADERS[file]
+        objects = self.build_objects(rows, build)
+        with transaction.atomic(using=self.using):
+            written = self.write(model, objects)
+        # Загруженная модель пополнилась: множество её id перечитаем.
+        self._ids.pop(model, None)
+        return written
+
+    def load_file(self, file, path):
+        started = time.monotonic()
+        with open(path, encoding='utf-8', newline='') as f:
+            written = self.load_rows(file, csv.DictReader(f))
+        return written, time.monotonic() - started
+
+
+def delete_order(roots):
+    """Модели roots и все, кто ссылается на них, — зависимые раньше.
+
+    Список строится по обратным связям, поэтому новые таблицы со ссылкой
+    на произведения (рейтинги, похожие) попадают в него сами.
+    """
+    order, seen = [], set()
+
+    def visit(model):
+        if model in seen:
+            return
+        seen.add(model)
+        for field in model._meta.get_fields(include_hidden=True):
+            if field.auto_created and (field.one_to_many
+                                       or field.one_to_one):
+                visit(field.related_model)
+        order.append(model)
+
+    for model in roots:
+        visit(model)
+    return order
+
+
+def truncate(using=DEFAULT_DB_ALIAS):
+    """Очищает таблицы контента в порядке, обратном зависимостям.
+
+    Удаление идёт прямым DELETE, без сборщика каскадов и сигналов,
+    поэтому после него отправляется data_imported: кэши API и поиск
+    сбрасываются. Администраторов и персонал не трогаем.
+    """
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            for model in delete_order((models.Title, models.Genre,
+                                       models.Category)):
+                cursor.execute(f'DELETE FROM {model._meta.db_table}')
+        User.objects.using(using).filter(is_staff=False,
+                                         is_superuser=False).delete()
+    data_imported.send(sender=truncate)
@@ -0,0 +1,42 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.exporters import DATASETS, DEFAULT_CHUNK_SIZE, OUTPUTS, export
+
+
+class Command(BaseCommand):
+    help = ('Выгружает таблицы в NDJSON или CSV. CSV в каталоге --dir '
+            'повторяет набор файлов fill_db и загружается обратно.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('datasets', nargs='*',
+                            help=f'из {", ".join(DATASETS)}; '
+                                 'по умолчанию все таблицы')
+        parser.add_argument('--output', choices=OUTPUTS, default='csv')
+        parser.add_argument('--dir',
+                            help='каталог для файлов; без него выгрузка '
+                                 'одной таблицы идёт в stdout')
+        parser.add_argument('--chunk-size', type=int,
+                            default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        names = options['datasets'] or list(DATASETS)
+        unknown = [name for name in names if name not in DATASETS]
+        if unknown:
+            raise CommandError(f'Неизвестные таблицы: {", ".join(unknown)}.')
+        output, chunk_size = options['output'], options['chunk_size']
+        if not options['dir']:
+            for name in names:
+                for chunk in export(name, output, chunk_size):
+                    self.stdout.write(chunk, ending='')
+            return
+        os.makedirs(options['dir'], exist_ok=True)
+        for name in names:
+            filename = (DATASETS[name].filename if output == 'csv'
+                        else f'{name}.ndjson')
+            path = os.path.join(options['dir'], filename)
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                for chunk in export(name, output, chunk_size):
+                    f.write(chunk)
+            self.stderr.write(f'{name} exported to {path}')
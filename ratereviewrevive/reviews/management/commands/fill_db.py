@@ -6,6 +6,11 @@ from django.shortcuts import get_object_or_404
 
 from ratereviewrevive.settings import BASE_DIR
 from reviews import models
+from reviews.importers import DEFAULT_BATCH_SIZE, BulkImporter, truncate
+from reviews.parallel_import import (DEFAULT_CHUNK_ROWS, Checkpoint,
+                                     ParallelImporter)
+from reviews.ratings import rebuild_ratings
+from reviews.signals import data_imported
 from users.models import User
 
 
@@ -95,12 +100,85 @@ class Command(BaseCommand):
         'comments.csv': create_comments
     }
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir', default=os.path.join(BASE_DIR, 'static', 'data'),
+            help='каталог с CSV-файлами'
+        )
+        parser.add_argument(
+            '--bulk', action='store_true',
+            help='пакетная загрузка через bulk_create'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='размер пачки для --bulk'
+        )
+        parser.add_argument(
+            '--truncate', action='store_true',
+            help='очистить таблицы перед загрузкой'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=0,
+            help='число процессов для параллельной пакетной загрузки'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_ROWS,
+            help='строк в одном куске файла для --workers'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=os.path.join(BASE_DIR, '.fill_db_checkpoint.json'),
+            help='файл контрольной точки для возобновления --workers'
+        )
+
+    def _path(self, file):
+        return os.path.join(self.data_dir, file)
+
     def _create_data(self):
         file = 'genre.csv'
         for file, func in self.DATA_FILES.items():
-            path_to_file = os.path.join(BASE_DIR, 'static', 'data', file)
+            path_to_file = self._path(file)
             self.read_csv(path_to_file, func)
             print(f'import {file} completed')
 
+    def _bulk_create_data(self, batch_size):
+        importer = BulkImporter(batch_size=batch_size)
+        for file in self.DATA_FILES:
+            written, elapsed = importer.load_file(file, self._path(file))
+            rate = written / elapsed if elapsed else written
+            self.stdout.write(
+                f'import {file} completed: {written} rows '
+                f'in {elapsed:.2f}s ({rate:.0f} rows/s)'
+            )
+        # bulk_create не отправляет сигналы, рейтинги пересчитываем сами.
+        rebuild_ratings()
+        if importer.skipped:
+            self.stdout.write(
+                f'skipped {importer.skipped} rows with unknown references'
+            )
+
+    def _parallel_create_data(self, options):
+        ParallelImporter(
+            {file: self._path(file) for file in self.DATA_FILES},
+            workers=options['workers'],
+            checkpoint_path=options['checkpoint'],
+            batch_size=options['batch_size'],
+            chunk_rows=options['chunk_size'],
+            report=self.stdout.write
+        ).run()
+        rebuild_ratings()
+
     def handle(self, *args, **options):
-        self._create_data()
+        self.data_dir = options['data_dir']
+        if options['truncate']:
+            # Загруженные ранее куски больше не в базе.
+            Checkpoint(options['checkpoint']).remove()
+            truncate()
+        if options['workers']:
+            self._parallel_create_data(options)
+        elif options['bulk']:
+            self._bulk_create_data(options['batch_size'])
+        else:
+            self._create_data()
+            return
+        data_imported.send(sender=self.__class__)
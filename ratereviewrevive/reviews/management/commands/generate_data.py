@@ -0,0 +1,95 @@
+import csv
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+WORDS = ('побег', 'крёстный', 'отец', 'жизнь', 'любовь', 'война', 'мир',
+         'история', 'город', 'ночь', 'звезда', 'дорога', 'время', 'море',
+         'film', 'story', 'night', 'road', 'time', 'world')
+ROLES = ('user', 'user', 'user', 'moderator', 'admin')
+START_DATE = datetime(2015, 1, 1, tzinfo=timezone.utc)
+
+
+class Command(BaseCommand):
+    help = ('Генерирует синтетический набор CSV в формате fill_db '
+            'для нагрузочных тестов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='каталог для CSV-файлов')
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=1000000)
+        parser.add_argument('--comments', type=int, default=5000000)
+        parser.add_argument('--users', type=int, default=0,
+                            help='по умолчанию — минимум для уникальности '
+                                 'пар автор-произведение')
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def text(self, words):
+        return ' '.join(self.random.choice(WORDS) for _ in range(words))
+
+    def date(self):
+        return (START_DATE + timedelta(
+            seconds=self.random.randrange(8 * 365 * 24 * 3600)
+        )).isoformat().replace('+00:00', 'Z')
+
+    def write(self, file, header, rows):
+        path = os.path.join(self.output, file)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+        self.stdout.write(f'{file} written')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.output = options['output']
+        os.makedirs(self.output, exist_ok=True)
+        titles, reviews = options['titles'], options['reviews']
+        if reviews and not titles:
+            raise CommandError('Для отзывов нужны произведения.')
+        # Отзыв i пишет автор i // titles на произведение i % titles:
+        # пара автор-произведение уникальна, как требует модель.
+        users = max(options['users'], -(-reviews // titles) if titles else 1)
+
+        self.write('users.csv',
+                   ('id', 'username', 'email', 'role', 'bio', 'first_name',
+                    'last_name'),
+                   ((i, f'user{i}', f'user{i}@ratereviewrevive.fake',
+                     self.random.choice(ROLES), '', '', '')
+                    for i in range(1, users + 1)))
+        self.write('category.csv', ('id', 'name', 'slug'),
+                   ((i, f'Категория {i}', f'category-{i}')
+                    for i in range(1, options['categories'] + 1)))
+        self.write('genre.csv', ('id', 'name', 'slug'),
+                   ((i, f'Жанр {i}', f'genre-{i}')
+                    for i in range(1, options['genres'] + 1)))
+        self.write('titles.csv', ('id', 'name', 'year', 'category'),
+                   ((i, self.text(3).capitalize(),
+                     self.random.randint(1900, 2023),
+                     self.random.randint(1, options['categories']))
+                    for i in range(1, titles + 1)))
+        self.write('genre_title.csv', ('id', 'title_id', 'genre_id'),
+                   self.genre_title_rows(titles, options['genres']))
+        self.write('review.csv',
+                   ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+                   ((i + 1, i % titles + 1, self.text(20), i // titles + 1,
+                     self.random.randint(1, 10), self.date())
+                    for i in range(reviews)))
+        self.write('comments.csv',
+                   ('id', 'review_id', 'text', 'author', 'pub_date'),
+                   ((i, self.random.randint(1, reviews), self.text(10),
+                     self.random.randint(1, users), self.date())
+                    for i in range(1, options['comments'] + 1)
+                    if reviews))
+
+    def genre_title_rows(self, titles, genres):
+        row_id = 0
+        for title_id in range(1, titles + 1):
+            count = self.random.randint(1, min(genres, 3))
+            for genre_id in self.random.sample(range(1, genres + 1), count):
+                row_id += 1
+                yield row_id, title_id, genre_id
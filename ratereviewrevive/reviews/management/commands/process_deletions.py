@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.deletion import deletion_setting, process_deletions
+
+
+class Command(BaseCommand):
+    help = ('Удаляет скрытые произведения и пользователей с их отзывами '
+            'и комментариями пачками в коротких транзакциях.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=deletion_setting('BATCH_SIZE'))
+        parser.add_argument('--loop', action='store_true',
+                            help='работать постоянно, опрашивая очередь')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='пауза между опросами пустой очереди, с')
+
+    def handle(self, *args, **options):
+        while True:
+            job, deleted, error = process_deletions(options['batch_size'])
+            if job is not None:
+                self.stdout.write(f'{job}: {deleted} rows deleted')
+            if error is not None:
+                self.stderr.write(f'{job}: {error}')
+            if not options['loop']:
+                return
+            if job is None:
+                time.sleep(options['interval'])
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.ratings import rebuild_ratings
+from reviews.signals import ratings_rebuilt
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённые рейтинги произведений по отзывам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('title_ids', nargs='*', type=int,
+                            help='id произведений (по умолчанию все)')
+
+    def handle(self, *args, **options):
+        title_ids = options['title_ids'] or None
+        with transaction.atomic():
+            updated = rebuild_ratings(title_ids)
+            ratings_rebuilt.send(sender=self.__class__, title_ids=title_ids)
+        self.stdout.write(f'ratings recalculated for {updated} titles')
@@ -1,5 +1,6 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 from users.models import User
 
@@ -8,8 +9,11 @@ TEXT_SYMB_LIM = 30
 
 class PublishedModel(models.Model):
     """Абстрактная модель. Добавляет дату публикации."""
+    # Значение по умолчанию, а не auto_now_add: импорт передаёт дату
+    # из CSV, и она сохраняется как есть.
     pub_date = models.DateTimeField('Дата добавления',
-                                    auto_now_add=True,
+                                    default=timezone.now,
+                                    editable=False,
                                     db_index=True)
 
     class Meta:
@@ -60,19 +64,72 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         verbose_name='Категория произведения'
     )
+    # Агрегаты рейтинга хранятся в самом произведении и поддерживаются
+    # сигналами отзывов (см. reviews/signals.py), чтобы список произведений
+    # не пересчитывал Avg по всей таблице отзывов на каждый запрос.
+    rating_sum = models.PositiveIntegerField('Сумма оценок',
+                                             default=0,
+                                             editable=False)
+    rating_count = models.PositiveIntegerField('Количество оценок',
+                                               default=0,
+                                               editable=False)
+    rating = models.FloatField('Рейтинг',
+                               null=True,
+                               blank=True,
+                               editable=False)
+    # Для ETag и Last-Modified (api/conditional.py): время изменения
+    # представления произведения (поля, жанры, категория, рейтинг) и
+    # счётчик изменений его отзывов и комментариев.
+    updated_at = models.DateTimeField('Изменено',
+                                      auto_now=True,
+                                      db_index=True)
+    reviews_version = models.PositiveBigIntegerField('Версия отзывов',
+                                                     default=0,
+                                                     editable=False)
+    # Скрыто из API и ждёт удаления воркером process_deletions
+    # (reviews/deletion.py).
+    pending_deletion = models.BooleanField('Ожидает удаления',
+                                           default=False,
+                                           editable=False)
+
+    # Поля, которые меняются только запросами UPDATE: счётчики с F()
+    # и отметка удаления.
+    COUNTER_FIELDS = ('rating_sum', 'rating_count', 'rating',
+                      'reviews_version', 'pending_deletion')
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Агрегаты рейтинга и счётчик версий меняются только запросами
+        # UPDATE: save() устаревшего экземпляра не должен их затирать.
+        if (not self._state.adding and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Произведение"
         verbose_name_plural = "Произведения"
+        indexes = [
+            # Проверка уникальности пары название-год в TitleSerializer.
+            models.Index(fields=['name', 'year'], name='title_name_year_idx'),
+            # Фильтры year, year_min и year_max.
+            models.Index(fields=['year'], name='title_year_idx'),
+        ]
 
 
 class Review(PublishedModel):
+    # Отдельный индекс не нужен: title_id — первое поле индекса
+    # review_title_pub_date_idx и ограничения уникальности.
     title = models.ForeignKey(Title,
                               on_delete=models.CASCADE,
-                              related_name='reviews')
+                              related_name='reviews',
+                              db_index=False)
     text = models.TextField('Текст отзыва')
     author = models.ForeignKey(User,
                                on_delete=models.CASCADE,
@@ -85,6 +142,15 @@ class Review(PublishedModel):
     def __str__(self):
         return self.text[:TEXT_SYMB_LIM]
 
+    def save(self, *args, **kwargs):
+        # Рейтинг произведения обновляется в той же транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
@@ -94,12 +160,19 @@ class Review(PublishedModel):
                 name='unique_review_from_one_user'
             )
         ]
+        indexes = [
+            # Отзывы произведения по дате: пагинация по ключу.
+            models.Index(fields=['title', 'pub_date'],
+                         name='review_title_pub_date_idx'),
+        ]
 
 
 class Comment(PublishedModel):
+    # Индекс по review_id — начало comment_review_pub_date_idx.
     review = models.ForeignKey(Review,
                                on_delete=models.CASCADE,
-                               related_name='comments')
+                               related_name='comments',
+                               db_index=False)
     text = models.TextField('Текст комментария')
     author = models.ForeignKey(User,
                                on_delete=models.CASCADE,
@@ -112,3 +185,51 @@ class Comment(PublishedModel):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['review', 'pub_date'],
+                         name='comment_review_pub_date_idx'),
+        ]
+
+
+class DeletionJob(models.Model):
+    """Фоновое удаление произведения или пользователя.
+
+    Отзывы и комментарии удаляются пачками в коротких транзакциях
+    (reviews/deletion.py); deleted и total показывают ход удаления.
+    """
+    TITLE = 'title'
+    USER = 'user'
+    MODELS = ((TITLE, 'title'), (USER, 'user'))
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    STATUSES = ((PENDING, 'pending'), (RUNNING, 'running'), (DONE, 'done'))
+
+    model = models.CharField('Модель', max_length=15, choices=MODELS)
+    object_id = models.PositiveBigIntegerField('Id объекта')
+    status = models.CharField(
+        'Статус',
+        max_length=15,
+        choices=STATUSES,
+        default=PENDING
+    )
+    total = models.PositiveIntegerField('Строк к удалению', null=True,
+                                        blank=True)
+    deleted = models.PositiveIntegerField('Удалено строк', default=0)
+    # Задание занято воркером до этого времени; упавший воркер его
+    # не держит.
+    locked_until = models.DateTimeField('Занято до', default=timezone.now)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    finished_at = models.DateTimeField('Завершено', null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.model} {self.object_id}: {self.status}'
+
+    class Meta:
+        verbose_name = 'Удаление'
+        verbose_name_plural = 'Удаления'
+        indexes = [
+            models.Index(fields=['status', 'locked_until'],
+                         name='deletion_due_idx'),
+        ]
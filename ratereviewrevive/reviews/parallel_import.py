@@ -0,0 +1,200 @@
+import csv
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.db import OperationalError, connections
+
+from reviews.importers import DEFAULT_BATCH_SIZE, BulkImporter
+
+DEFAULT_CHUNK_ROWS = 50000
+LOCK_RETRIES = 5
+
+# Файл загружается только после всех файлов, на которые ссылаются его
+# внешние ключи.
+DEPENDENCIES = {
+    'users.csv': (),
+    'category.csv': (),
+    'genre.csv': (),
+    'titles.csv': ('category.csv',),
+    'genre_title.csv': ('titles.csv', 'genre.csv'),
+    'review.csv': ('titles.csv', 'users.csv'),
+    'comments.csv': ('review.csv', 'users.csv'),
+}
+
+# Импортёр живёт в процессе-воркере между задачами, чтобы множества id
+# зависимостей читались из базы один раз на процесс.
+_worker_importer = None
+
+
+def _offset_lines(f, offset, stop=None):
+    """Отдаёт строки файла, запоминая в offset[0] позицию после строки."""
+    while stop is None or offset[0] < stop:
+        line = f.readline()
+        if not line:
+            return
+        offset[0] += len(line)
+        yield line.decode('utf-8')
+
+
+def split_csv(path, chunk_rows):
+    """Делит CSV на куски по chunk_rows записей.
+
+    Границы — байтовые смещения начала записей, поэтому многострочные
+    значения в кавычках не разрываются, а кусок читается через seek.
+    """
+    chunks = []
+    with open(path, 'rb') as f:
+        f.readline()
+        offset = [f.tell()]
+        start, rows = offset[0], 0
+        for _ in csv.reader(_offset_lines(f, offset)):
+            rows += 1
+            if rows == chunk_rows:
+                chunks.append((start, offset[0]))
+                start, rows = offset[0], 0
+        if rows:
+            chunks.append((start, offset[0]))
+    return chunks
+
+
+def read_chunk(path, start, stop):
+    with open(path, 'rb') as f:
+        fieldnames = next(csv.reader([f.readline().decode('utf-8')]))
+        f.seek(start)
+        yield from csv.DictReader(_offset_lines(f, [start], stop),
+                                  fieldnames=fieldnames)
+
+
+def _init_worker():
+    # Соединения, унаследованные от родителя через fork, не используем.
+    for conn in connections.all():
+        conn.connection = None
+
+
+def load_chunk(file, path, start, stop, batch_size):
+    global _worker_importer
+    if _worker_importer is None or _worker_importer.batch_size != batch_size:
+        _worker_importer = BulkImporter(batch_size=batch_size)
+    for attempt in range(LOCK_RETRIES):
+        try:
+            return _worker_importer.load_rows(file,
+                                              read_chunk(path, start, stop))
+        except OperationalError as error:
+            # SQLite допускает одного писателя: ждём своей очереди.
+            if 'locked' not in str(error) or attempt == LOCK_RETRIES - 1:
+                raise
+            time.sleep(2 ** attempt)
+
+
+class Checkpoint:
+    """JSON-файл с планом кусков и списком уже загруженных."""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.data = json.load(f)
+
+    def file_state(self, file, path, chunk_rows):
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        state = self.data.get(file)
+        if state is None or state['signature'] != signature:
+            state = {
+                'signature': signature,
+                'chunks': split_csv(path, chunk_rows),
+                'done': [],
+            }
+            self.data[file] = state
+            self.save()
+        return state
+
+    def mark_done(self, file, start):
+        self.data[file]['done'].append(start)
+        self.save()
+
+    def save(self):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ParallelImporter:
+    """Загружает файлы по графу зависимостей в пуле процессов.
+
+    Независимые файлы грузятся одновременно, большие делятся на куски
+    по диапазонам строк. Каждый кусок — отдельная транзакция; после неё
+    кусок отмечается в контрольной точке, и при повторном запуске уже
+    загруженные куски не читаются. Строки пишутся с ignore_conflicts,
+    поэтому кусок, упавший между коммитом и отметкой, можно повторить.
+    """
+
+    def __init__(self, paths, workers, checkpoint_path,
+                 batch_size=DEFAULT_BATCH_SIZE,
+                 chunk_rows=DEFAULT_CHUNK_ROWS, report=print):
+        self.paths = paths
+        self.workers = workers
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.batch_size = batch_size
+        self.chunk_rows = chunk_rows
+        self.report = report
+
+    def run(self):
+        pending = dict(DEPENDENCIES)
+        finished = set()
+        remaining = {}
+        written = {}
+        started = {}
+        running = {}
+        # Дочерние процессы откроют собственные соединения.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(self.workers, mp_context=context,
+                                 initializer=_init_worker) as pool:
+            while pending or running:
+                for file in [file for file, deps in pending.items()
+                             if finished.issuperset(deps)]:
+                    del pending[file]
+                    path = self.paths[file]
+                    state = self.checkpoint.file_state(file, path,
+                                                       self.chunk_rows)
+                    done = set(state['done'])
+                    chunks = [chunk for chunk in state['chunks']
+                              if chunk[0] not in done]
+                    remaining[file] = len(chunks)
+                    written[file] = 0
+                    started[file] = time.monotonic()
+                    for start, stop in chunks:
+                        future = pool.submit(load_chunk, file, path, start,
+                                             stop, self.batch_size)
+                        running[future] = (file, start)
+                    if not chunks:
+                        finished.add(file)
+                        self.report(f'import {file} already completed')
+                if not running:
+                    continue
+                completed, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    file, start = running.pop(future)
+                    written[file] += future.result()
+                    self.checkpoint.mark_done(file, start)
+                    remaining[file] -= 1
+                    if not remaining[file]:
+                        finished.add(file)
+                        self._report_file(file, written[file],
+                                          time.monotonic() - started[file])
+        self.checkpoint.remove()
+
+    def _report_file(self, file, written, elapsed):
+        rate = written / elapsed if elapsed else written
+        self.report(f'import {file} completed: {written} rows '
+                    f'in {elapsed:.2f}s ({rate:.0f} rows/s)')
@@ -0,0 +1,61 @@
+from django.db.models import (Avg, Count, F, FloatField, IntegerField,
+                              OuterRef, Subquery, Sum, Value)
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from reviews.models import Review, Title
+
+
+def apply_score_delta(title_id, score_delta, count_delta):
+    """Сдвигает сохранённые агрегаты рейтинга произведения.
+
+    Все три поля меняются одним UPDATE с выражениями F(), поэтому
+    параллельные отзывы не затирают изменения друг друга. Тем же
+    запросом сдвигаются версии произведения для ETag.
+    """
+    new_sum = F('rating_sum') + score_delta
+    new_count = F('rating_count') + count_delta
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        rating=(Cast(new_sum, FloatField())
+                / NullIf(Cast(new_count, FloatField()), Value(0.0))),
+        reviews_version=F('reviews_version') + 1,
+        updated_at=timezone.now(),
+    )
+
+
+def bump_reviews_version(titles):
+    """Отмечает изменение отзывов или комментариев произведений."""
+    titles.update(reviews_version=F('reviews_version') + 1)
+
+
+def touch_titles(titles):
+    """Отмечает изменение представления произведений без их save()."""
+    titles.update(updated_at=timezone.now())
+
+
+def rebuild_ratings(title_ids=None):
+    """Пересчитывает агрегаты рейтинга с нуля по таблице отзывов."""
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    titles = Title.objects.all()
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+    return titles.update(
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0,
+            output_field=IntegerField()
+        ),
+        rating_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('id')).values('total')),
+            0,
+            output_field=IntegerField()
+        ),
+        rating=Subquery(reviews.annotate(avg=Avg('score')).values('avg'),
+                        output_field=FloatField()),
+        reviews_version=F('reviews_version') + 1,
+        updated_at=timezone.now(),
+    )
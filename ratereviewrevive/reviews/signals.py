@@ -0,0 +1,132 @@
+from collections import defaultdict
+
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.db.models import Q
+from django.dispatch import Signal, receiver
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.ratings import (apply_score_delta, bump_reviews_version,
+                             touch_titles)
+
+# Отправляется после загрузки данных в обход save() и сигналов моделей.
+data_imported = Signal()
+# Отправляется reviews.bulk.bulk_insert с аргументом instances: объекты
+# созданы bulk_create, post_save для них не было.
+bulk_created = Signal()
+# Отправляется reviews.deletion.schedule с аргументом instance: объект
+# скрыт из API, а удалит его воркер process_deletions.
+soft_deleted = Signal()
+# Отправляется командой recalculate_ratings с аргументом title_ids (None —
+# все произведения): агрегаты пересчитаны запросом UPDATE.
+ratings_rebuilt = Signal()
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_score(sender, instance, **kwargs):
+    """Запоминает прежние произведение и оценку редактируемого отзыва."""
+    instance._previous_rating = None
+    if instance.pk is not None:
+        instance._previous_rating = Review.objects.filter(
+            pk=instance.pk
+        ).values_list('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance,
+                                            '_previous_rating', None)
+    if previous is None:
+        apply_score_delta(instance.title_id, instance.score, 1)
+        return
+    previous_title_id, previous_score = previous
+    if previous_title_id == instance.title_id:
+        if previous_score != instance.score:
+            apply_score_delta(instance.title_id,
+                              instance.score - previous_score, 0)
+        else:
+            bump_reviews_version(Title.objects.filter(pk=instance.title_id))
+        return
+    apply_score_delta(previous_title_id, -previous_score, -1)
+    apply_score_delta(instance.title_id, instance.score, 1)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    apply_score_delta(instance.title_id, -instance.score, -1)
+
+
+@receiver(bulk_created, sender=Review)
+def update_rating_on_bulk_create(sender, instances, **kwargs):
+    """Один UPDATE на произведение, а не на каждый отзыв."""
+    deltas = defaultdict(int)
+    counts = defaultdict(int)
+    for review in instances:
+        deltas[review.title_id] += review.score
+        counts[review.title_id] += 1
+    for title_id, count in counts.items():
+        apply_score_delta(title_id, deltas[title_id], count)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_version_on_comment(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_reviews_version(Title.objects.filter(
+            reviews=instance.review_id
+        ))
+
+
+@receiver(bulk_created, sender=Comment)
+def bump_version_on_bulk_comments(sender, instances, **kwargs):
+    bump_reviews_version(Title.objects.filter(
+        reviews__in={comment.review_id for comment in instances}
+    ))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_on_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        touch_titles(Title.objects.filter(pk__in=pk_set or ()))
+    elif not getattr(instance, '_skip_genre_touch', False):
+        touch_titles(Title.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_titles(sender, instance, raw=False, **kwargs):
+    # Произведение показывает название и slug категории.
+    if not raw:
+        touch_titles(Title.objects.filter(category=instance))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def touch_genre_titles(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_titles(Title.objects.filter(genre=instance))
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_username(sender, instance, **kwargs):
+    instance._previous_username = None
+    if instance.pk is not None:
+        instance._previous_username = User.objects.filter(
+            pk=instance.pk
+        ).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def bump_version_on_username(sender, instance, created, raw=False,
+                             **kwargs):
+    """Списки отзывов и комментариев показывают имя автора."""
+    previous = getattr(instance, '_previous_username', None)
+    if created or raw or previous in (None, instance.username):
+        return
+    bump_reviews_version(Title.objects.filter(pk__in=Review.objects.filter(
+        Q(author=instance) | Q(comments__author=instance)
+    ).values('title_id')))
@@ -0,0 +1,299 @@
+import bisect
+import math
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+
+from reviews import models
+from search.tokenizer import tokenize
+
+FTS_TABLE = 'search_document'
+KINDS = {'title': 1, 'review': 2, 'comment': 3}
+KIND_NAMES = {code: kind for kind, code in KINDS.items()}
+# Во сколько раз слово из названия произведения весомее слова из текста.
+TITLE_WEIGHT = 5.0
+
+
+def document_for(instance):
+    """(вид, id, название, текст) индексируемого объекта."""
+    if isinstance(instance, models.Title):
+        return 'title', instance.pk, instance.name, instance.description
+    if isinstance(instance, models.Review):
+        return 'review', instance.pk, '', instance.text
+    return 'comment', instance.pk, '', instance.text
+
+
+def iter_documents(chunk_size=2000):
+    for pk, name, description in models.Title.objects.values_list(
+            'pk', 'name', 'description').iterator(chunk_size):
+        yield 'title', pk, name, description
+    for kind, model in (('review', models.Review),
+                        ('comment', models.Comment)):
+        for pk, text in model.objects.values_list(
+                'pk', 'text').iterator(chunk_size):
+            yield kind, pk, '', text
+
+
+class SqlBackend:
+    """Общая часть индексов в таблице FTS_TABLE базы.
+
+    Индекс лежит в базе и виден всем процессам. Ключ строки кодирует вид
+    и id объекта, удаление идёт по первичному ключу. В таблицу пишутся
+    уже нормализованные токены, поэтому регистр и «ё» кириллицы
+    обрабатываются так же, как в запасном индексе.
+    """
+    key_column = None
+    insert_sql = None
+
+    @staticmethod
+    def _rowid(kind, pk):
+        return pk * 4 + KINDS[kind]
+
+    def _row(self, kind, pk, title, body):
+        return (self._rowid(kind, pk), ' '.join(tokenize(title)),
+                ' '.join(tokenize(body)))
+
+    def index(self, kind, pk, title, body, created=False):
+        with connection.cursor() as cursor:
+            if not created:
+                self._delete(cursor, kind, pk)
+            cursor.execute(self.insert_sql, self._row(kind, pk, title, body))
+
+    def index_many(self, documents):
+        """Добавляет новые документы одним executemany."""
+        with connection.cursor() as cursor:
+            cursor.executemany(self.insert_sql, [
+                self._row(*document) for document in documents
+            ])
+
+    def remove(self, kind, pk):
+        with connection.cursor() as cursor:
+            self._delete(cursor, kind, pk)
+
+    def _delete(self, cursor, kind, pk):
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE {self.key_column} = %s',
+            [self._rowid(kind, pk)]
+        )
+
+    def rebuild(self):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {FTS_TABLE}')
+                cursor.executemany(
+                    self.insert_sql,
+                    (self._row(*document) for document in iter_documents())
+                )
+
+
+class Fts5Backend(SqlBackend):
+    """Индекс в виртуальной таблице SQLite FTS5, ранжирование bm25."""
+    key_column = 'rowid'
+    insert_sql = (f'INSERT INTO {FTS_TABLE} (rowid, title, body) '
+                  f'VALUES (%s, %s, %s)')
+
+    def search(self, query, kinds, limit):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Каждое слово запроса ищется как префикс: «шоушенк» найдёт
+        # «шоушенке». Слова соединяются через AND.
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        codes = ', '.join(str(KINDS[kind]) for kind in kinds)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, bm25({FTS_TABLE}, {TITLE_WEIGHT}, 1.0) '
+                f'AS rank FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid %% 4 IN ({codes}) '
+                f'ORDER BY rank LIMIT %s',
+                [match, limit]
+            )
+            rows = cursor.fetchall()
+        return [(KIND_NAMES[rowid % 4], rowid // 4, -rank)
+                for rowid, rank in rows]
+
+
+class PostgresBackend(SqlBackend):
+    """Индекс tsvector в таблице PostgreSQL под GIN, ранжирование ts_rank.
+
+    Токены уже нормализованы, поэтому используется конфигурация simple:
+    без стемминга, как в FTS5. Слова названия получают вес A, текста — D.
+    """
+    key_column = 'id'
+    insert_sql = (f"INSERT INTO {FTS_TABLE} (id, document) VALUES "
+                  f"(%s, setweight(to_tsvector('simple', %s), 'A') "
+                  f"|| to_tsvector('simple', %s))")
+    # Веса {D, C, B, A} для ts_rank; больше 1 PostgreSQL не принимает.
+    weights = f'{{{1 / TITLE_WEIGHT}, 0, 0, 1}}'
+
+    def search(self, query, kinds, limit):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        match = ' & '.join(f'{token}:*' for token in tokens)
+        codes = ', '.join(str(KINDS[kind]) for kind in kinds)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id, ts_rank(%s::float4[], document, query) AS rank "
+                f"FROM {FTS_TABLE}, to_tsquery('simple', %s) query "
+                f"WHERE document @@ query AND id %% 4 IN ({codes}) "
+                f"ORDER BY rank DESC LIMIT %s",
+                [self.weights, match, limit]
+            )
+            rows = cursor.fetchall()
+        return [(KIND_NAMES[pk % 4], pk // 4, rank) for pk, rank in rows]
+
+
+class MemoryBackend:
+    """Инвертированный индекс в памяти процесса с ранжированием BM25.
+
+    Строится из базы при первом поиске, дальше обновляется сигналами
+    после коммита. Каждый процесс держит свою копию и видит только свои
+    записи, поэтому индекс — для разработки: без DEBUG он выбирается
+    только явным SEARCH_BACKEND = 'memory'.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        self._terms = []
+
+    def _add(self, key, title, body):
+        frequencies = defaultdict(float)
+        for token in tokenize(title):
+            frequencies[token] += TITLE_WEIGHT
+        for token in tokenize(body):
+            frequencies[token] += 1
+        with self._lock:
+            self._discard(key)
+            for term, frequency in frequencies.items():
+                if term not in self._postings:
+                    bisect.insort(self._terms, term)
+                self._postings[term][key] = frequency
+            self._documents[key] = (sum(frequencies.values()),
+                                    tuple(frequencies))
+
+    def _discard(self, key):
+        _, terms = self._documents.pop(key, (0, ()))
+        for term in terms:
+            docs = self._postings[term]
+            del docs[key]
+            if not docs:
+                del self._postings[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+
+    def _expand(self, prefix):
+        start = bisect.bisect_left(self._terms, prefix)
+        end = bisect.bisect_left(self._terms, prefix + '\uffff')
+        return self._terms[start:end]
+
+    def index(self, kind, pk, title, body, created=False):
+        if self._built:
+            transaction.on_commit(
+                lambda: self._add((kind, pk), title, body)
+            )
+
+    def index_many(self, documents):
+        if self._built:
+            documents = list(documents)
+            transaction.on_commit(lambda: [
+                self._add((kind, pk), title, body)
+                for kind, pk, title, body in documents
+            ])
+
+    def remove(self, kind, pk):
+        if self._built:
+            transaction.on_commit(lambda: self._remove((kind, pk)))
+
+    def _remove(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def search(self, query, kinds, limit):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        if not self._built:
+            self.rebuild()
+        with self._lock:
+            total = len(self._documents)
+            average = sum(length for length, _ in
+                          self._documents.values()) / total if total else 0
+            scores = None
+            for token in tokens:
+                token_scores = defaultdict(float)
+                for term in self._expand(token):
+                    docs = self._postings[term]
+                    idf = math.log(1 + (total - len(docs) + 0.5)
+                                   / (len(docs) + 0.5))
+                    for key, frequency in docs.items():
+                        norm = self.k1 * (1 - self.b + self.b
+                                          * self._documents[key][0]
+                                          / average)
+                        token_scores[key] += (idf * frequency * (self.k1 + 1)
+                                              / (frequency + norm))
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {key: score + token_scores[key]
+                              for key, score in scores.items()
+                              if key in token_scores}
+        ranked = sorted(((score, key) for key, score in scores.items()
+                         if key[0] in kinds), reverse=True)[:limit]
+        return [(kind, pk, score) for score, (kind, pk) in ranked]
+
+    def rebuild(self):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._terms.clear()
+            for kind, pk, title, body in iter_documents():
+                self._add((kind, pk), title, body)
+            self._built = True
+
+
+BACKENDS = {'fts5': Fts5Backend, 'postgres': PostgresBackend,
+            'memory': MemoryBackend}
+_backend = None
+
+
+def fts5_available():
+    return (connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names())
+
+
+def postgres_available():
+    return (connection.vendor == 'postgresql'
+            and FTS_TABLE in connection.introspection.table_names())
+
+
+def get_backend():
+    """Бэкенд из settings.SEARCH_BACKEND, по умолчанию индекс в базе.
+
+    Индекс в памяти без явной настройки допускается только с DEBUG.
+    """
+    global _backend
+    if _backend is None:
+        name = getattr(settings, 'SEARCH_BACKEND', None)
+        if name is None:
+            if fts5_available():
+                name = 'fts5'
+            elif postgres_available():
+                name = 'postgres'
+            elif settings.DEBUG:
+                name = 'memory'
+            else:
+                raise ImproperlyConfigured(
+                    'Нет индекса поиска в базе: нужны SQLite с FTS5 или '
+                    'PostgreSQL с применёнными миграциями search. Индекс '
+                    "в памяти включается явно: SEARCH_BACKEND = 'memory'."
+                )
+        _backend = BACKENDS[name]()
+    return _backend
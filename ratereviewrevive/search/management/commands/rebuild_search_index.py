@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from search.backends import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс произведений и отзывов.'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        backend.rebuild()
+        self.stdout.write(f'search index rebuilt ({type(backend).__name__})')
@@ -0,0 +1,74 @@
+import re
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+BATCH_SIZE = 2000
+# Копия search.tokenizer на момент миграции: миграция не зависит от
+# того, как код приложения изменится потом.
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokens(text):
+    return ' '.join(TOKEN_RE.findall(
+        (text or '').casefold().replace('ё', 'е')
+    ))
+
+
+def iter_documents(apps, alias):
+    for pk, name, description in apps.get_model(
+            'reviews', 'Title').objects.using(alias).values_list(
+                'pk', 'name', 'description').iterator(BATCH_SIZE):
+        yield pk * 4 + 1, tokens(name), tokens(description)
+    for code, model_name in ((2, 'Review'), (3, 'Comment')):
+        for pk, text in apps.get_model(
+                'reviews', model_name).objects.using(alias).values_list(
+                    'pk', 'text').iterator(BATCH_SIZE):
+            yield pk * 4 + code, '', tokens(text)
+
+
+def create_fts_table(apps, schema_editor):
+    """Создаёт таблицу FTS5, если база — SQLite с поддержкой FTS5.
+
+    Иначе поиск работает на индексе в памяти (search/backends.py).
+    Документы читаются и пишутся пачками по BATCH_SIZE.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                'CREATE VIRTUAL TABLE search_document USING fts5(title, body)'
+            )
+        except OperationalError:
+            return
+        documents = iter_documents(apps, connection.alias)
+        while True:
+            batch = [document for _, document in
+                     zip(range(BATCH_SIZE), documents)]
+            if not batch:
+                break
+            cursor.executemany(
+                'INSERT INTO search_document (rowid, title, body) '
+                'VALUES (%s, %s, %s)',
+                batch
+            )
+
+
+def drop_fts_table(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS search_document')
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('reviews', '0006_title_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
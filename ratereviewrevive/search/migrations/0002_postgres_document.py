@@ -0,0 +1,75 @@
+import re
+
+from django.db import migrations
+
+BATCH_SIZE = 2000
+# Копия search.tokenizer на момент миграции.
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokens(text):
+    return ' '.join(TOKEN_RE.findall(
+        (text or '').casefold().replace('ё', 'е')
+    ))
+
+
+def iter_documents(apps, alias):
+    for pk, name, description in apps.get_model(
+            'reviews', 'Title').objects.using(alias).values_list(
+                'pk', 'name', 'description').iterator(BATCH_SIZE):
+        yield pk * 4 + 1, tokens(name), tokens(description)
+    for code, model_name in ((2, 'Review'), (3, 'Comment')):
+        for pk, text in apps.get_model(
+                'reviews', model_name).objects.using(alias).values_list(
+                    'pk', 'text').iterator(BATCH_SIZE):
+            yield pk * 4 + code, '', tokens(text)
+
+
+def create_document_table(apps, schema_editor):
+    """Создаёт таблицу tsvector под GIN, если база — PostgreSQL.
+
+    Индекс в базе виден всем процессам, в отличие от индекса в памяти.
+    Документы читаются и пишутся пачками по BATCH_SIZE.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TABLE search_document '
+            '(id bigint PRIMARY KEY, document tsvector NOT NULL)'
+        )
+        cursor.execute(
+            'CREATE INDEX search_document_gin ON search_document '
+            'USING GIN (document)'
+        )
+        documents = iter_documents(apps, connection.alias)
+        while True:
+            batch = [document for _, document in
+                     zip(range(BATCH_SIZE), documents)]
+            if not batch:
+                break
+            cursor.executemany(
+                "INSERT INTO search_document (id, document) VALUES "
+                "(%s, setweight(to_tsvector('simple', %s), 'A') "
+                "|| to_tsvector('simple', %s))",
+                batch
+            )
+
+
+def drop_document_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS search_document')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_document_table, drop_document_table),
+    ]
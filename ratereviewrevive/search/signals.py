@@ -0,0 +1,38 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from reviews import models
+from reviews.signals import bulk_created, data_imported, soft_deleted
+from search.backends import document_for, get_backend
+
+INDEXED_MODELS = (models.Title, models.Review, models.Comment)
+
+
+@receiver(post_save)
+def index_document(sender, instance, created=False, raw=False, **kwargs):
+    if sender in INDEXED_MODELS and not raw:
+        get_backend().index(*document_for(instance), created=created)
+
+
+@receiver(post_delete)
+def remove_document(sender, instance, **kwargs):
+    if sender in INDEXED_MODELS:
+        kind, pk, _, _ = document_for(instance)
+        get_backend().remove(kind, pk)
+
+
+@receiver(bulk_created)
+def index_bulk_documents(sender, instances, **kwargs):
+    if sender in INDEXED_MODELS and instances:
+        get_backend().index_many(document_for(instance)
+                                 for instance in instances)
+
+
+@receiver(soft_deleted, sender=models.Title)
+def remove_hidden_title(sender, instance, **kwargs):
+    get_backend().remove('title', instance.pk)
+
+
+@receiver(data_imported)
+def rebuild_after_import(sender, **kwargs):
+    get_backend().rebuild()
@@ -0,0 +1,16 @@
+import re
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Приводит текст к виду, в котором он хранится в индексе.
+
+    casefold() понижает регистр и кириллицы; «ё» сводится к «е», так как
+    в текстах их пишут вперемешку.
+    """
+    return text.casefold().replace('ё', 'е')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text or ''))
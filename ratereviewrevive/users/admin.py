@@ -1,5 +1,21 @@
 from django.contrib import admin
 
-from .models import User
+from .models import OutgoingEmail, User
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'recipient',
+        'subject',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'sent_at'
+    )
+    list_filter = ('status',)
+    search_fields = ('recipient',)
+
 
 admin.site.register(User)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
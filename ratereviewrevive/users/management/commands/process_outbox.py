@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.outbox import outbox_setting, process_outbox
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди исходящих.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=outbox_setting('BATCH_SIZE'))
+        parser.add_argument('--loop', action='store_true',
+                            help='работать постоянно, опрашивая очередь')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='пауза между опросами пустой очереди, с')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, retried, dead = process_outbox(options['batch_size'])
+            if sent or retried or dead:
+                self.stdout.write(f'sent {sent}, retry later {retried}, '
+                                  f'dead {dead}')
+            if not options['loop']:
+                return
+            if not (sent or retried or dead):
+                time.sleep(options['interval'])
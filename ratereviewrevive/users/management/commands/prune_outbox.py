@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from users.outbox import outbox_setting, prune_sent
+
+
+class Command(BaseCommand):
+    help = ('Удаляет из очереди исходящих письма, отправленные раньше '
+            'EMAIL_OUTBOX["RETENTION_DAYS"] дней.')
+
+    def handle(self, *args, **options):
+        deleted = prune_sent()
+        self.stdout.write(f'{deleted} sent emails older than '
+                          f'{outbox_setting("RETENTION_DAYS")} days deleted')
@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import mail
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import OutgoingEmail
+
+DEFAULTS = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_SECONDS': 30,
+    'MAX_BACKOFF_SECONDS': 3600,
+    # Сколько секунд взятая в работу пачка скрыта от других воркеров.
+    'LEASE_SECONDS': 300,
+    # Сколько дней хранятся отправленные письма; dead не удаляются.
+    'RETENTION_DAYS': 7,
+}
+
+
+def outbox_setting(name):
+    return getattr(settings, 'EMAIL_OUTBOX', {}).get(name, DEFAULTS[name])
+
+
+def enqueue_email(recipient, subject, body):
+    """Ставит письмо в очередь; отправит его воркер process_outbox."""
+    return OutgoingEmail.objects.create(recipient=recipient,
+                                        subject=subject,
+                                        body=body)
+
+
+def retry_delay(attempts):
+    delay = outbox_setting('BACKOFF_SECONDS') * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, outbox_setting('MAX_BACKOFF_SECONDS')))
+
+
+def claim_batch(batch_size):
+    """Забирает пачку писем, которым пора уйти.
+
+    Срок следующей попытки сдвигается на время аренды: параллельный
+    воркер их не возьмёт, а письма упавшего воркера вернутся в очередь.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(next_attempt_at=now + timedelta(
+            seconds=outbox_setting('LEASE_SECONDS')
+        ))
+    return emails
+
+
+def process_outbox(batch_size=None):
+    """Отправляет одну пачку через одно SMTP-соединение.
+
+    Возвращает (отправлено, отложено, в dead letter).
+    """
+    emails = claim_batch(batch_size or outbox_setting('BATCH_SIZE'))
+    if not emails:
+        return 0, 0, 0
+    sent = retried = dead = 0
+    connection = mail.get_connection()
+    try:
+        connection.open()
+        open_error = None
+    except Exception as error:
+        open_error = error
+    for email in emails:
+        email.attempts += 1
+        try:
+            if open_error is not None:
+                raise open_error
+            mail.EmailMessage(email.subject, email.body,
+                              settings.DEFAULT_FROM_EMAIL, [email.recipient],
+                              connection=connection).send()
+        except Exception as error:
+            email.last_error = repr(error)
+            if email.attempts >= outbox_setting('MAX_ATTEMPTS'):
+                email.status = OutgoingEmail.DEAD
+                dead += 1
+            else:
+                email.next_attempt_at = (timezone.now()
+                                         + retry_delay(email.attempts))
+                retried += 1
+        else:
+            email.status = OutgoingEmail.SENT
+            email.sent_at = timezone.now()
+            sent += 1
+    if open_error is None:
+        connection.close()
+    OutgoingEmail.objects.bulk_update(
+        emails, ['status', 'attempts', 'next_attempt_at', 'last_error',
+                 'sent_at']
+    )
+    return sent, retried, dead
+
+
+def prune_sent(now=None):
+    """Удаляет письма, отправленные раньше срока хранения."""
+    cutoff = (now or timezone.now()) - timedelta(
+        days=outbox_setting('RETENTION_DAYS')
+    )
+    deleted, _ = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.SENT, sent_at__lt=cutoff
+    ).delete()
+    return deleted